@@ -12,8 +12,10 @@ import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output, State
 
-from data_input import get_dashboard_data
-from make_figures import make_table, make_revenue_chart, make_attendance_table
+from dashboard_cache import get_cached_dashboard_data
+from make_figures import (
+    get_table_page, make_table, make_revenue_chart, make_attendance_table
+)
 
 # load environment variables
 username = os.environ.get('USERNAME')
@@ -21,15 +23,9 @@ password = os.environ.get('PASSWORD')
 ga_tracking_id = os.environ.get('GA_TRACKING_ID')
 
 # load data
-df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings = get_dashboard_data()
-min_revenue_sum = df_dashboard['min_revenue'].sum()
-potential_revenue_sum = df_dashboard['potential_revenue'].sum()
-max_approved_revenue_sum = df_dashboard['max_revenue'].sum()
-
-# figures
-child_table = make_table(df_dashboard)
-revenue_chart = make_revenue_chart(df_dashboard)
-summary_table = make_attendance_table(df_dashboard)
+def load_dashboard_data():
+    '''Returns dashboard data, recomputed only when the input files change'''
+    return get_cached_dashboard_data()
 
 # dash app
 app = dash.Dash(__name__,
@@ -62,83 +58,86 @@ navbar = dbc.Navbar(
 )
 
 # summary cards
-attendance_summary_card = dbc.Card(
-    [
-        dbc.CardBody(
-            [   html.H3('Total Attendance',
-                        style={'font-size': '1.5rem'}),
-                summary_table
-            ]
-        )
-    ],
-    className='h-100',
-)
-
-revenue_summary_card = dbc.Card(
-    [
-        dbc.CardBody(
-            [
-                html.H3('Total Revenue',
-                        style={'font-size': '1.5rem'}),
-                revenue_chart
-            ]
-        )
-    ],
-    className='h-100',
-)
-
-# detail cards
-attendance_copy_card = dbc.Card(
-    [
-        dbc.CardHeader(
-            html.H2(
-                dbc.Button(
-                    'More details on attendance risk',
-                    color='link',
-                    id='toggle-1'
-                )
+def make_attendance_summary_card(summary_table):
+    return dbc.Card(
+        [
+            dbc.CardBody(
+                [   html.H3('Total Attendance',
+                            style={'font-size': '1.5rem'}),
+                    summary_table
+                ]
             )
-        ),
-        dbc.Collapse(
+        ],
+        className='h-100',
+    )
+
+def make_revenue_summary_card(revenue_chart):
+    return dbc.Card(
+        [
             dbc.CardBody(
                 [
-                    html.P(
-                        [
-                            html.Strong('Sure bet: '),
-                            html.Span('maximum payment expected! Based on attendance rate for full and part days')
-                        ]
-                    ),
-                    html.P(
-                        [
-                            html.Strong('On track: '),
-                            html.Span('likely to meet attendance rate for full payment')
-                        ]
-                    ),
-                    html.P(
-                        [
-                            html.Strong('At risk: '),
-                            html.Span('may not meet attendance rate for full payment - encourage family to attend')
-                        ]
-                    ),
-                     html.P(
-                        [
-                            html.Strong('Not met: '),
-                            html.Span("full payment not possible; you'll get paid for days attended only")
-                        ]
-                    ),
-                     html.P(
-                        [
-                            html.Strong('Not enough info: '),
-                            html.Span('email us ' + str(days_req_for_warnings)
-                                        + '+ days of attendance records to get projections')
-                        ]
-                    )
+                    html.H3('Total Revenue',
+                            style={'font-size': '1.5rem'}),
+                    revenue_chart
                 ]
+            )
+        ],
+        className='h-100',
+    )
+
+# detail cards
+def make_attendance_copy_card(days_req_for_warnings):
+    return dbc.Card(
+        [
+            dbc.CardHeader(
+                html.H2(
+                    dbc.Button(
+                        'More details on attendance risk',
+                        color='link',
+                        id='toggle-1'
+                    )
+                )
             ),
-            id='collapse-1'
-        )
-    ]
-)
+            dbc.Collapse(
+                dbc.CardBody(
+                    [
+                        html.P(
+                            [
+                                html.Strong('Sure bet: '),
+                                html.Span('maximum payment expected! Based on attendance rate for full and part days')
+                            ]
+                        ),
+                        html.P(
+                            [
+                                html.Strong('On track: '),
+                                html.Span('likely to meet attendance rate for full payment')
+                            ]
+                        ),
+                        html.P(
+                            [
+                                html.Strong('At risk: '),
+                                html.Span('may not meet attendance rate for full payment - encourage family to attend')
+                            ]
+                        ),
+                         html.P(
+                            [
+                                html.Strong('Not met: '),
+                                html.Span("full payment not possible; you'll get paid for days attended only")
+                            ]
+                        ),
+                         html.P(
+                            [
+                                html.Strong('Not enough info: '),
+                                html.Span('email us ' + str(days_req_for_warnings)
+                                            + '+ days of attendance records to get projections')
+                            ]
+                        )
+                    ]
+                ),
+                id='collapse-1'
+            )
+        ]
+    )
 
 revenue_copy_card = dbc.Card(
     [
@@ -185,9 +184,11 @@ revenue_copy_card = dbc.Card(
     ]
 )
 
-accordion = html.Div(
-    [attendance_copy_card, revenue_copy_card], className='accordion'
-)
+def make_accordion(days_req_for_warnings):
+    return html.Div(
+        [make_attendance_copy_card(days_req_for_warnings), revenue_copy_card],
+        className='accordion'
+    )
 
 # email copy
 email_copy = html.Div(
@@ -208,58 +209,77 @@ email_copy = html.Div(
     )
 )
 
+def serve_layout():
+    '''Builds the layout with the latest dashboard data on each page load'''
+    (
+        df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings,
+        summary
+    ) = load_dashboard_data()
 
-app.layout = html.Div(
-    [
-        navbar,
-        dbc.Container(
-            [
-                html.H1(children='Your dashboard'),
+    # figures
+    child_table = make_table(df_dashboard)
+    revenue_chart = make_revenue_chart(summary)
+    summary_table = make_attendance_table(summary)
 
-                html.H2('Estimates as of ' + latest_date,
-                        style={'font-size': '1.5rem'}),
+    return html.Div(
+        [
+            navbar,
+            dbc.Container(
+                [
+                    html.H1(children='Your dashboard'),
 
-                html.Div(
-                    dbc.Alert('At-risk case warnings will be available with '
-                                + str(days_req_for_warnings)
-                                + ' days of attendance data',
-                                color='warning',
-                                is_open=is_data_insufficient)
-                ),
+                    html.H2('Estimates as of ' + latest_date,
+                            style={'font-size': '1.5rem'}),
 
-                # Summary statistics
-                html.Div(
-                    [
-                        dbc.Row(
-                            [
-                                dbc.Col(
-                                    attendance_summary_card,
-                                    width=4
-                                ),
-                                dbc.Col(
-                                    revenue_summary_card,
-                                    width=8
-                                )
-                            ],
-                            no_gutters=True,
-                            align='stretch'
-                        ),
-                    ]
-                ),
+                    html.Div(
+                        dbc.Alert('At-risk case warnings will be available with '
+                                    + str(days_req_for_warnings)
+                                    + ' days of attendance data',
+                                    color='warning',
+                                    is_open=is_data_insufficient)
+                    ),
 
-                accordion,
+                    # Summary statistics
+                    html.Div(
+                        [
+                            dbc.Row(
+                                [
+                                    dbc.Col(
+                                        make_attendance_summary_card(summary_table),
+                                        width=4
+                                    ),
+                                    dbc.Col(
+                                        make_revenue_summary_card(revenue_chart),
+                                        width=8
+                                    )
+                                ],
+                                no_gutters=True,
+                                align='stretch'
+                            ),
+                        ]
+                    ),
 
-                html.Br(),
+                    make_accordion(days_req_for_warnings),
 
-                # Child level table
-                html.Div(
-                    child_table
-                ),
-                email_copy
-            ]
-        )
-    ]
+                    html.Br(),
+
+                    # Child level table
+                    html.Div(
+                        child_table
+                    ),
+                    email_copy
+                ]
+            )
+        ]
+    )
+
+# callbacks only use the static accordion components and the child level
+# table, so validate against those instead of loading data to build the full
+# layout at startup
+app.validation_layout = html.Div(
+    [navbar, make_accordion(None), make_table(pd.DataFrame()), email_copy]
 )
+app.layout = serve_layout
 
 # callbacks
 @app.callback(
@@ -282,6 +302,27 @@ def toggle_accordion(n1, n2, is_open1, is_open2):
         return False, not is_open2
     return False, False
 
+@app.callback(
+    [Output('child_level', 'data'), Output('child_level', 'page_count')],
+    [
+        Input('child_level', 'page_current'),
+        Input('child_level', 'page_size'),
+        Input('child_level', 'sort_by'),
+        Input('child_level', 'filter_query'),
+    ],
+    prevent_initial_call=True,
+)
+def update_child_table(page_current, page_size, sort_by, filter_query):
+    '''
+    Serves a page of the child level table from the cached dashboard data,
+    sorted and filtered as requested
+    '''
+    df_dashboard = load_dashboard_data()[0]
+    data, page_count = get_table_page(
+        df_dashboard, page_current, page_size, sort_by, filter_query
+    )
+    return data, page_count
+
 app.index_string=f"""<!DOCTYPE html>
 <html>
     <head>
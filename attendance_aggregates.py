@@ -0,0 +1,262 @@
+import csv
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from data_input import (
+    CACHE_PATH,
+    build_dashboard_data,
+    clean_attendance_data,
+    count_days_attended,
+    generate_child_id,
+    get_attendance_data,
+    get_attendance_data_chunks,
+    get_input_paths,
+    get_payment_data
+)
+from utilities import parse_date, parse_unique
+
+# constants
+STATE_PATH = CACHE_PATH.joinpath('attendance')
+STATE_VERSION = 2
+# bytes before the processed offset used to check the file was only appended to
+TAIL_CHECK_BYTES = 4096
+# rows read at a time when streaming an attendance file
+DEFAULT_CHUNKSIZE = 100000
+
+def get_state_path(attendance_path):
+    '''Returns the path of the stored aggregates for an attendance file'''
+    path_hash = hashlib.sha256(str(Path(attendance_path).resolve()).encode())
+    return STATE_PATH.joinpath(path_hash.hexdigest() + '.json')
+
+def read_tail_hash(f, offset):
+    '''Returns the hash of the bytes just before offset in an open file'''
+    start = max(offset - TAIL_CHECK_BYTES, 0)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+def load_state(state_path):
+    '''Loads stored aggregates, returns None if there are none'''
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+def save_state(state_path, state):
+    '''Saves aggregates, replacing the previous state atomically'''
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(state_path.name + '.' + str(os.getpid()) + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def state_to_days_attended(state):
+    '''Returns the stored full and part days attended as a dataframe by child_id'''
+    days_attended = pd.DataFrame.from_dict(
+        state['days_attended'],
+        orient='index',
+        columns=['full_days_attended', 'part_days_attended']
+    )
+    days_attended.index.name = 'child_id'
+    return days_attended
+
+def add_days_attended(days_attended, new_days_attended):
+    '''Adds up two dataframes of full and part days attended by child_id'''
+    return (
+        days_attended.add(new_days_attended, fill_value=0)
+                     .astype('int64')
+                     .sort_index()
+    )
+
+def get_latest_date(*dates):
+    '''Returns the latest of dates, ignoring missing dates'''
+    return max([date for date in dates if not pd.isna(date)], default=pd.NaT)
+
+def split_complete_rows(data):
+    '''
+    Splits bytes read from a csv file after the last line break.
+
+    Returns the complete rows and the rest, a last row that may still be being
+    written
+    '''
+    end = data.rfind(b'\n') + 1
+    return data[:end], data[end:]
+
+def has_all_fields(header, row):
+    '''Returns whether a csv row (bytes) has as many fields as the header'''
+    def count_fields(line):
+        return len(next(csv.reader([line.decode(errors='replace')])))
+    return count_fields(row) == count_fields(header)
+
+def add_attendance_rows(days_attended, max_check_out_date, data):
+    '''
+    Adds the days attended and check out dates of the attendance rows in data
+    (bytes of a csv file with header) to the aggregates.
+
+    Returns the updated days attended by child_id and max check out date
+    '''
+    attendance_clean = (
+        get_attendance_data(io.BytesIO(data))
+            .pipe(clean_attendance_data)
+            .pipe(generate_child_id)
+    )
+    return (
+        add_days_attended(days_attended, count_days_attended(attendance_clean)),
+        get_latest_date(max_check_out_date, attendance_clean['check_out_date'].max())
+    )
+
+def update_attendance_aggregates(attendance_path, state_path=None):
+    '''
+    Updates stored days attended per child with the rows appended to an
+    attendance file since the last update.
+
+    Only the bytes after the last processed offset are parsed. The aggregates
+    are rebuilt from the start of the file if it was modified other than by
+    appending rows.
+
+    Rows are stored up to the last line break. A last row without one may
+    still be being written, so it is parsed again on the next update. It is
+    included in the returned aggregates if it has all fields, as files may
+    end without a line break.
+
+    Returns a dataframe of full and part days attended by child_id, as
+    count_days_attended, and the max check out date.
+    '''
+    state_path = Path(state_path or get_state_path(attendance_path))
+    state = load_state(state_path)
+
+    with open(attendance_path, 'rb') as f:
+        header = f.readline()
+        file_size = os.fstat(f.fileno()).st_size
+        if (
+            state is None
+            or state['header'] != header.decode()
+            or state['offset'] > file_size
+            or state['tail_hash'] != read_tail_hash(f, state['offset'])
+        ):
+            state = {
+                'version': STATE_VERSION,
+                'header': header.decode(),
+                'offset': len(header),
+                'tail_hash': None,
+                'max_check_out_date': None,
+                'days_attended': {},
+            }
+        f.seek(state['offset'])
+        new_rows, last_row = split_complete_rows(f.read())
+        offset = state['offset'] + len(new_rows)
+        tail_hash = read_tail_hash(f, offset)
+
+    days_attended = state_to_days_attended(state)
+    max_check_out_date = pd.Timestamp(state['max_check_out_date'])
+
+    if new_rows.strip():
+        days_attended, max_check_out_date = add_attendance_rows(
+            days_attended, max_check_out_date, header + new_rows
+        )
+
+    if new_rows:
+        save_state(
+            state_path,
+            {
+                'version': STATE_VERSION,
+                'header': header.decode(),
+                'offset': offset,
+                'tail_hash': tail_hash,
+                'max_check_out_date': (
+                    None if pd.isna(max_check_out_date) else max_check_out_date.isoformat()
+                ),
+                'days_attended': {
+                    child_id: [int(full_days), int(part_days)]
+                    for child_id, full_days, part_days in days_attended.itertuples()
+                },
+            }
+        )
+
+    if last_row.strip() and has_all_fields(header, last_row):
+        days_attended, max_check_out_date = add_attendance_rows(
+            days_attended, max_check_out_date, header + last_row
+        )
+    return days_attended, max_check_out_date
+
+def filter_month(attendance_df, month):
+    '''
+    Keeps attendance rows checked in during month (pd.Period), before the rest
+    of the cleaning.
+    '''
+    check_in_date = parse_unique(attendance_df['check_in_date'], parse_date)
+    in_month = (
+        (check_in_date >= month.start_time.to_datetime64())
+        & (check_in_date < (month + 1).start_time.to_datetime64())
+    )
+    return attendance_df.loc[in_month].copy()
+
+def stream_attendance_aggregates(attendance_path, chunksize=DEFAULT_CHUNKSIZE,
+                                 month=None):
+    '''
+    Counts days attended per child reading chunksize rows of an attendance file
+    at a time, so memory use is bounded by the chunk size rather than the file
+    size.
+
+    If month (e.g. '2020-09') is set, rows checked in during other months are
+    dropped before they are cleaned.
+
+    Returns a dataframe of full and part days attended by child_id, as
+    count_days_attended, and the max check out date.
+    '''
+    if month is not None:
+        month = pd.Period(month, freq='M')
+    days_attended = pd.DataFrame(
+        columns=['full_days_attended', 'part_days_attended'], dtype='int64'
+    )
+    max_check_out_date = pd.NaT
+    for chunk in get_attendance_data_chunks(attendance_path, chunksize):
+        if month is not None:
+            chunk = filter_month(chunk, month)
+        if chunk.empty:
+            continue
+        chunk = chunk.pipe(clean_attendance_data).pipe(generate_child_id)
+        days_attended = add_days_attended(days_attended, count_days_attended(chunk))
+        max_check_out_date = get_latest_date(
+            max_check_out_date, chunk['check_out_date'].max()
+        )
+    days_attended.index.name = 'child_id'
+    return days_attended, max_check_out_date
+
+def get_streamed_dashboard_data(attendance_path=None, payment_path=None,
+                                chunksize=DEFAULT_CHUNKSIZE, month=None):
+    '''
+    Returns data for dashboard as get_dashboard_data, counting days attended
+    while streaming the attendance file in chunks.
+    '''
+    if attendance_path is None or payment_path is None:
+        attendance_path, payment_path = get_input_paths()
+    days_attended, max_check_out_date = stream_attendance_aggregates(
+        attendance_path, chunksize, month
+    )
+    return build_dashboard_data(
+        days_attended, max_check_out_date, get_payment_data(payment_path)
+    )
+
+def get_incremental_dashboard_data(attendance_path=None, payment_path=None,
+                                   state_path=None):
+    '''
+    Returns data for dashboard as get_dashboard_data, with days attended
+    updated incrementally from the rows appended to the attendance file.
+    '''
+    if attendance_path is None or payment_path is None:
+        attendance_path, payment_path = get_input_paths()
+    days_attended, max_check_out_date = update_attendance_aggregates(
+        attendance_path, state_path
+    )
+    return build_dashboard_data(
+        days_attended, max_check_out_date, get_payment_data(payment_path)
+    )
@@ -0,0 +1,62 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import os
+
+from data_input import (
+    DATA_PATH,
+    find_tenant_files,
+    get_dashboard_data
+)
+
+def run_tenant_dashboards(data_path=DATA_PATH, attendance_file_=None,
+                          payment_file_=None, max_workers=None, max_in_flight=None):
+    '''
+    Computes dashboard data for every tenant under data_path in a pool of
+    worker processes.
+
+    At most max_in_flight tenants (default twice the number of workers) are
+    submitted at a time. An error for one tenant, e.g. a ValueError from
+    validate_copay, is returned for that tenant and does not stop the others.
+
+    Yields (tenant, result, error) tuples as tenants finish, where result is
+    the get_dashboard_data tuple or None if error is set.
+    '''
+    tenant_files = iter(
+        find_tenant_files(data_path, attendance_file_, payment_file_).items()
+    )
+    max_workers = max_workers or os.cpu_count()
+    max_in_flight = max_in_flight or 2 * max_workers
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {}
+
+        def submit_next():
+            # returns False once every tenant has been submitted
+            try:
+                tenant, (attendance_path, payment_path) = next(tenant_files)
+            except StopIteration:
+                return False
+            future = executor.submit(get_dashboard_data, attendance_path, payment_path)
+            in_flight[future] = tenant
+            return True
+
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                tenant = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as error:
+                    yield tenant, None, error
+                else:
+                    yield tenant, result, None
+                submit_next()
+
+if __name__ == '__main__':
+    for tenant, result, error in run_tenant_dashboards():
+        if error is not None:
+            print(tenant, 'failed:', repr(error))
+        else:
+            print(tenant, 'done, estimates as of', result[1])
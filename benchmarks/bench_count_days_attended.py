@@ -0,0 +1,71 @@
+'''
+Compares count_days_attended against the previous row-wise implementation.
+
+Run from the repo root: python -m benchmarks.bench_count_days_attended [rows ...]
+'''
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_input import count_days_attended
+
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+
+def rowwise_count_days_attended(attendance_df):
+    '''Previous implementation, mapping each row's time in care to days'''
+    def count_part_days(time_in_care):
+        if time_in_care < 5:
+            return 1
+        elif 12 < time_in_care < 17:
+            return 1
+        return 0
+
+    def count_full_days(time_in_care):
+        if time_in_care < 5:
+            return 0
+        elif time_in_care < 17:
+            return 1
+        elif time_in_care <= 24:
+            return 2
+        raise ValueError('Value should not be more than 24')
+
+    time_in_care = (
+        attendance_df['hours_in_care'] + (attendance_df['mins_in_care'] / 60)
+    )
+    attendance_df['part_days_attended'] = time_in_care.map(count_part_days)
+    attendance_df['full_days_attended'] = time_in_care.map(count_full_days)
+    return (
+        attendance_df.groupby('child_id')
+                     [['full_days_attended', 'part_days_attended']]
+                     .sum()
+    )
+
+def make_attendance(num_rows, num_children=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            'child_id': rng.integers(0, num_children, num_rows).astype(str),
+            'hours_in_care': rng.integers(0, 24, num_rows),
+            'mins_in_care': rng.integers(0, 60, num_rows),
+        }
+    )
+
+def time_call(fn, df):
+    start = time.perf_counter()
+    result = fn(df.copy())
+    return time.perf_counter() - start, result
+
+if __name__ == '__main__':
+    rows = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS
+    print(f"{'rows':>12} {'row-wise (s)':>14} {'vectorized (s)':>16} {'speedup':>9}")
+    for num_rows in rows:
+        df = make_attendance(num_rows)
+        rowwise_time, expected = time_call(rowwise_count_days_attended, df)
+        vectorized_time, result = time_call(count_days_attended, df)
+        pd.testing.assert_frame_equal(result, expected)
+        print(
+            f'{num_rows:>12,} {rowwise_time:>14.3f} {vectorized_time:>16.3f}'
+            f' {rowwise_time / vectorized_time:>8.1f}x'
+        )
@@ -0,0 +1,41 @@
+'''
+Compares attendance and payment load times across csv backends on generated
+files.
+
+Run from the repo root: python -m benchmarks.bench_csv_backends [rows]
+'''
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_data import generate_provider_data, write_provider_data
+from csv_backends import BACKENDS
+from data_input import get_attendance_data, get_payment_data
+
+DEFAULT_ROWS = 1_000_000
+
+def time_load(load, filepath, backend, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load(filepath, backend)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        attendance_path, payment_path = write_provider_data(
+            tmp_dir, *generate_provider_data(num_rows, num_rows)
+        )
+
+        print(f"{'file':<12} {'rows':>10} " + ' '.join(f'{b + " (s)":>12}' for b in BACKENDS))
+        for name, load, filepath in [
+            ('attendance', get_attendance_data, attendance_path),
+            ('payment', get_payment_data, payment_path),
+        ]:
+            times = [time_load(load, filepath, backend) for backend in BACKENDS]
+            print(
+                f'{name:<12} {num_rows:>10,} '
+                + ' '.join(f'{load_time:>12.3f}' for load_time in times)
+            )
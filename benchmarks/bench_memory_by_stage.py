@@ -0,0 +1,66 @@
+'''
+Reports the memory used by the frames at each stage of the dashboard
+calculations, with the compact schema and with the previous object and float64
+columns.
+
+Run from the repo root: python -m benchmarks.bench_memory_by_stage [copies]
+
+The attendance rows of the input files (USER_DIR, ATTENDANCE_FILE and
+PAYMENT_FILE) are repeated copies times to mimic larger frames.
+'''
+import sys
+
+import pandas as pd
+
+from data_input import (
+    clean_attendance_data,
+    clean_payment_data,
+    combine_payment_and_attendance,
+    count_days_attended,
+    generate_child_id,
+    get_attendance_data,
+    get_dashboard_data,
+    get_input_paths,
+    get_memory_usage,
+    get_payment_data
+)
+
+def as_object_schema(df):
+    '''Returns df with category columns as objects and ints as float64'''
+    return df.astype(
+        {
+            col: object if pd.api.types.is_categorical_dtype(df[col]) else 'float64'
+            for col in df.columns
+            if pd.api.types.is_categorical_dtype(df[col])
+            or pd.api.types.is_integer_dtype(df[col])
+        }
+    )
+
+def format_mb(num_bytes):
+    return f'{num_bytes / 1024 ** 2:.2f}'
+
+if __name__ == '__main__':
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    attendance_path, payment_path = get_input_paths()
+
+    attendance = get_attendance_data(attendance_path)
+    attendance = pd.concat([attendance] * copies, ignore_index=True)
+    stages = [('attendance loaded', attendance.copy())]
+    attendance = attendance.pipe(clean_attendance_data).pipe(generate_child_id)
+    stages.append(('attendance cleaned', attendance))
+    days_attended = count_days_attended(attendance)
+    stages.append(('days attended', days_attended))
+
+    payment = get_payment_data(payment_path)
+    stages.append(('payment loaded', payment.copy()))
+    payment = payment.pipe(clean_payment_data).pipe(generate_child_id)
+    stages.append(('merged', combine_payment_and_attendance(payment, days_attended)))
+    stages.append(('dashboard', get_dashboard_data(attendance_path, payment_path)[0]))
+
+    print(f"{'stage':<20} {'rows':>10} {'object (MB)':>12} {'compact (MB)':>13}")
+    for stage, df in stages:
+        print(
+            f'{stage:<20} {len(df):>10,}'
+            f' {format_mb(get_memory_usage(as_object_schema(df))):>12}'
+            f' {format_mb(get_memory_usage(df)):>13}'
+        )
@@ -0,0 +1,55 @@
+'''
+Measures the peak memory allocated while running the dashboard calculations
+on synthetic data, with tracemalloc, which tracks numpy and pandas buffers.
+
+Run from the repo root: python -m benchmarks.bench_peak_memory [children ...]
+'''
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetic_data import write_synthetic_data
+from data_input import (
+    calculate_days_in_month_from_date,
+    count_days_attended,
+    get_clean_attendance_data,
+    get_memory_usage,
+    get_payment_data,
+    process_dashboard_data
+)
+
+DEFAULT_CHILDREN = [10_000, 100_000, 500_000]
+
+def measure_peak_memory(num_children):
+    '''
+    Returns the peak bytes allocated by process_dashboard_data and the bytes
+    of its inputs, for num_children children with a few rows each.
+    '''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        attendance_path, payment_path = write_synthetic_data(
+            tmp_dir, 1, num_children, 4 * num_children
+        )['provider1']
+        attendance = get_clean_attendance_data(attendance_path)
+        payment = get_payment_data(payment_path)
+    days_attended = count_days_attended(attendance)
+    days_in_month, days_left = calculate_days_in_month_from_date(
+        attendance['check_out_date'].max()
+    )
+    del attendance
+    input_bytes = get_memory_usage(payment) + get_memory_usage(days_attended)
+
+    tracemalloc.start()
+    process_dashboard_data(days_attended, payment, days_in_month, days_left)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, input_bytes
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_CHILDREN
+    print(f"{'children':>10} {'inputs (MB)':>12} {'peak (MB)':>10} {'peak / inputs':>14}")
+    for num_children in sizes:
+        peak, input_bytes = measure_peak_memory(num_children)
+        print(
+            f'{num_children:>10,} {input_bytes / 1024 ** 2:>12.1f}'
+            f' {peak / 1024 ** 2:>10.1f} {peak / input_bytes:>14.2f}'
+        )
@@ -0,0 +1,134 @@
+'''
+Times each stage of get_dashboard_data on synthetic data of increasing size
+and flags stages slower than the stored baselines.
+
+Run from the repo root:
+python -m benchmarks.bench_pipeline [--sizes 1000 100000] [--save]
+
+Stages are the ones recorded by instrumentation.StageProfiler, keyed by stage
+name in the baselines. Every run starts without input caches, so the loading
+stages include parsing the csv files.
+
+Exits with status 1 if any stage is more than tolerance times slower than its
+baseline. Baselines are machine specific, re-save them when changing machines.
+'''
+import argparse
+import json
+import os
+from pathlib import Path
+import platform
+import shutil
+import sys
+import tempfile
+
+from benchmarks.synthetic_data import write_synthetic_data
+from data_input import get_dashboard_data
+from input_cache import CACHE_DIR_NAME
+from instrumentation import StageProfiler
+
+# constants
+BASELINES_PATH = Path(__file__).parent.joinpath('baselines.json')
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+# attendance rows per child, about a month of weekdays
+ROWS_PER_CHILD = 20
+# differences below this are treated as noise
+MIN_REGRESSION_SECONDS = 0.02
+
+def run_stages(attendance_path, payment_path):
+    '''
+    Runs get_dashboard_data without input caches, returns wall seconds per
+    stage name
+    '''
+    shutil.rmtree(
+        Path(attendance_path).parent.joinpath(CACHE_DIR_NAME), ignore_errors=True
+    )
+    profiler = StageProfiler(log_records=False)
+    get_dashboard_data(attendance_path, payment_path, profiler=profiler)
+    timings = {}
+    for record in profiler.records:
+        timings[record['stage']] = timings.get(record['stage'], 0) + record['wall_s']
+    return timings
+
+def benchmark_size(num_rows, repeat):
+    '''Returns the best seconds per stage over repeat runs on num_rows rows'''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_synthetic_data(
+            tmp_dir, 1, max(num_rows // ROWS_PER_CHILD, 1), num_rows
+        )
+        runs = [run_stages(*paths['provider1']) for _ in range(repeat)]
+    return {stage: min(run[stage] for run in runs) for stage in runs[0]}
+
+def get_machine():
+    return {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def load_baselines(baselines_path):
+    try:
+        with open(baselines_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'machine': None, 'results': {}}
+
+def find_regressions(results, baselines, tolerance):
+    '''Returns (size, stage, seconds, baseline seconds) of regressed stages'''
+    regressions = []
+    for size, timings in results.items():
+        for stage, seconds in timings.items():
+            baseline = baselines['results'].get(size, {}).get(stage)
+            if (
+                baseline is not None
+                and seconds > tolerance * baseline
+                and seconds - baseline > MIN_REGRESSION_SECONDS
+            ):
+                regressions.append((size, stage, seconds, baseline))
+    return regressions
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='attendance rows to benchmark')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per size, sizes over 1M rows run once')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='slowdown over the baseline flagged as a regression')
+    parser.add_argument('--baselines', type=Path, default=BASELINES_PATH)
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as the new baselines')
+    args = parser.parse_args(args)
+
+    baselines = load_baselines(args.baselines)
+    if baselines['machine'] not in [None, get_machine()]:
+        print('Baselines were recorded on another machine:', baselines['machine'])
+
+    results = {}
+    print(f"{'rows':>12} {'stage':<60} {'seconds':>9} {'baseline':>9} {'ratio':>6}")
+    for num_rows in args.sizes:
+        repeat = max(1, min(args.repeat, 1_000_000 // num_rows))
+        size = str(num_rows)
+        results[size] = benchmark_size(num_rows, repeat)
+        for stage, seconds in results[size].items():
+            baseline = baselines['results'].get(size, {}).get(stage)
+            print(
+                f'{num_rows:>12,} {stage:<60} {seconds:>9.4f}'
+                + (f' {baseline:>9.4f} {seconds / baseline:>6.2f}' if baseline else '')
+            )
+
+    regressions = find_regressions(results, baselines, args.tolerance)
+    for size, stage, seconds, baseline in regressions:
+        print(
+            f'REGRESSION {int(size):,} rows {stage}: {seconds:.4f}s'
+            f' vs baseline {baseline:.4f}s'
+        )
+
+    if args.save:
+        baselines['machine'] = get_machine()
+        baselines['results'].update(results)
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
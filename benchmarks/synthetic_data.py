@@ -0,0 +1,201 @@
+'''
+Generates synthetic attendance and billing csv files in the input formats of
+data/user1, for benchmarks and scaling tests.
+
+Run from the repo root to write a data directory:
+python -m benchmarks.synthetic_data <data_path> [providers] [children] [attendance rows]
+'''
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# constants
+ATTENDANCE_FILE = 'Attendance-Calculation.csv'
+PAYMENT_FILE = 'Billing-Reconciliation.csv'
+BILLING_TITLE = (
+    'From Business Info Upload >>,,,From Onboarding >>,,,,,,,,,,'
+    'Billing rate calculations >>,,,,,,,'
+)
+FIRST_NAMES = [
+    'Shirley', 'Dolores', 'Sojourner', 'Ralph', 'Fannie', 'Bayard', 'Ella',
+    'Medgar', 'Septima', 'Cesar', 'Diane', 'Hosea', 'Ruby', 'Fred', 'Daisy',
+]
+LAST_NAMES = [
+    'Chisholm', 'Huerta', 'Truth', 'Abernathy', 'Hamer', 'Rustin', 'Baker',
+    'Evers', 'Clark', 'Chavez', 'Nash', 'Williams', 'Bridges', 'Korematsu',
+    'Bates',
+]
+# full day rate by age group, quality add on and part day rates follow
+FULL_DAY_RATES = {'Under 2': 39.99, '2': 37.26, '3+': 33.9}
+QUALITY_ADD_ON_SHARE = 0.15
+FAMILY_COPAYS = [0., 15., 29., 50.]
+
+def to_letters(value):
+    '''Returns a non-negative int as lowercase base 26 letters'''
+    letters = chr(ord('a') + value % 26)
+    if value >= 26:
+        return to_letters(value // 26) + letters
+    return letters
+
+def make_names(num_children):
+    '''Returns unique alphabetic first and last names, so child ids are unique'''
+    index = np.arange(num_children)
+    suffix = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    first_name = np.array(FIRST_NAMES, dtype=object)[index % len(FIRST_NAMES)]
+    last_name = (
+        np.array(LAST_NAMES, dtype=object)[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        + np.array([to_letters(i) for i in range(suffix[-1] + 1)], dtype=object)[suffix]
+    )
+    return first_name, last_name
+
+def format_times(minutes):
+    '''Formats minutes since midnight as h:mm AM/PM strings'''
+    minutes_of_day = np.arange(24 * 60)
+    hours = minutes_of_day // 60
+    labels = np.array(
+        [
+            f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+            for hour, minute in zip(hours, minutes_of_day % 60)
+        ],
+        dtype=object
+    )
+    return labels[minutes]
+
+def generate_provider_data(num_children, num_attendance_rows, biz_name='Provider 1',
+                           children_per_case=2, school_age_share=0.3,
+                           ineligible_share=0.05, missing_hours_share=0.95,
+                           month='2020-09', days_recorded=20, seed=0):
+    '''
+    Generates the billing and attendance of one provider.
+
+    Children are grouped in cases of children_per_case. school_age_share and
+    ineligible_share are the shares of school age and ineligible children.
+    Attendance rows are spread over the first days_recorded days of month, and
+    missing_hours_share of them have check in and out times without hours and
+    minutes in care, the others hours and minutes without times.
+
+    Returns a tuple of attendance and payment dataframes with the csv columns.
+    '''
+    rng = np.random.default_rng(seed)
+    month = pd.Period(month, freq='M')
+    first_name, last_name = make_names(num_children)
+
+    # billing
+    case_index = np.arange(num_children) // children_per_case
+    age_group = rng.choice(list(FULL_DAY_RATES), num_children)
+    full_day_rate = pd.Series(age_group).map(FULL_DAY_RATES).to_numpy()
+    family_copay = rng.choice(FAMILY_COPAYS, case_index[-1] + 1)[case_index]
+    children_in_case = np.bincount(case_index)[case_index]
+    # blank approved days are read as zero
+    full_days_approved = pd.array(rng.integers(0, 23, num_children), dtype='Int64')
+    full_days_approved[full_days_approved == 0] = pd.NA
+    part_days_approved = rng.integers(0, 16, num_children)
+    payment = pd.DataFrame(
+        {
+            'Business Name': biz_name,
+            'Business County': 'Cook',
+            'Business QRIS rating': 'Gold',
+            'First name': first_name,
+            'Last name': last_name,
+            'Date of birth': '01/01/2017',
+            'School age': np.where(
+                rng.random(num_children) < school_age_share, 'Yes', 'No'
+            ),
+            'Case number': pd.Series(case_index + 1).map('10000-{:011d}'.format),
+            'Full days approved': full_days_approved,
+            'Part days (or school days) approved': part_days_approved,
+            'Effective on': '05/05/' + str(month.year),
+            'Expires on': '05/05/' + str(month.year + 1),
+            'Co-pay (monthly)': family_copay,
+            'Billing month': month.strftime('%m/%Y'),
+            'Eligibility': np.where(
+                rng.random(num_children) < ineligible_share, 'Ineligible', 'Eligible'
+            ),
+            'Age (Months)': age_group,
+            'Full day rate': full_day_rate,
+            'Full day rate quality add-on': (
+                full_day_rate * QUALITY_ADD_ON_SHARE
+            ).round(4),
+            'Part day rate': (full_day_rate / 2).round(4),
+            'Part day rate quality add-on': (
+                full_day_rate / 2 * QUALITY_ADD_ON_SHARE
+            ).round(4),
+            'Co-pay per child': (family_copay / children_in_case).round(2),
+        }
+    )
+
+    # attendance
+    child = np.sort(rng.integers(0, num_children, num_attendance_rows))
+    day = rng.integers(1, days_recorded + 1, num_attendance_rows)
+    check_in = rng.integers(6 * 60, 11 * 60, num_attendance_rows)
+    # mix of part days, full days and long days
+    minutes_in_care = rng.choice(
+        [2 * 60, 4 * 60, 8 * 60, 9 * 60, 12 * 60],
+        num_attendance_rows,
+        p=[0.1, 0.15, 0.4, 0.25, 0.1]
+    ) + rng.integers(-30, 30, num_attendance_rows)
+    check_out = check_in + minutes_in_care
+    dates = np.array(
+        [(month.start_time + pd.Timedelta(days=d - 1)).strftime('%m/%d/%Y')
+         for d in range(1, days_recorded + 1)],
+        dtype=object
+    )[day - 1]
+    missing_hours = rng.random(num_attendance_rows) < missing_hours_share
+    attendance = pd.DataFrame(
+        {
+            'First name': first_name[child],
+            'Last name': last_name[child],
+            'Check in time': np.where(missing_hours, format_times(check_in), None),
+            'Check in date': dates,
+            'Check out time': np.where(missing_hours, format_times(check_out), None),
+            'Check out date': dates,
+            'Hours in care': np.where(missing_hours, np.nan, minutes_in_care // 60),
+            'Minutes in care': np.where(missing_hours, np.nan, minutes_in_care % 60),
+        }
+    )
+    return attendance, payment
+
+def write_provider_data(provider_path, attendance, payment):
+    '''
+    Writes attendance and payment dataframes as csv files in provider_path.
+
+    Returns the attendance and payment file paths.
+    '''
+    provider_path = Path(provider_path)
+    provider_path.mkdir(parents=True, exist_ok=True)
+    attendance_path = provider_path.joinpath(ATTENDANCE_FILE)
+    payment_path = provider_path.joinpath(PAYMENT_FILE)
+    attendance.to_csv(attendance_path, index=False)
+    with open(payment_path, 'w') as f:
+        f.write(BILLING_TITLE + '\n')
+        payment.to_csv(f, index=False)
+    return attendance_path, payment_path
+
+def write_synthetic_data(data_path, num_providers, num_children, num_attendance_rows,
+                         seed=0, **kwargs):
+    '''
+    Writes the files of num_providers providers in data_path/provider<i>, each
+    with num_children children and num_attendance_rows attendance rows.
+    kwargs are passed to generate_provider_data.
+
+    Returns a dict of provider name to attendance and payment file paths.
+    '''
+    paths = {}
+    for i in range(1, num_providers + 1):
+        attendance, payment = generate_provider_data(
+            num_children, num_attendance_rows,
+            biz_name='Provider ' + str(i), seed=seed + i, **kwargs
+        )
+        paths['provider' + str(i)] = write_provider_data(
+            Path(data_path).joinpath('provider' + str(i)), attendance, payment
+        )
+    return paths
+
+if __name__ == '__main__':
+    data_path, *sizes = sys.argv[1:]
+    num_providers, num_children, num_attendance_rows = (
+        [int(size) for size in sizes] + [1, 100, 2000][len(sizes):]
+    )
+    write_synthetic_data(data_path, num_providers, num_children, num_attendance_rows)
@@ -0,0 +1,83 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# constants
+PANDAS = 'pandas'
+PYARROW = 'pyarrow'
+BACKENDS = [PANDAS, PYARROW]
+# fastest available backend, pyarrow if installed
+DEFAULT_BACKEND = PANDAS if pa is None else PYARROW
+
+def read_csv_pandas(filepath, usecols, dtype, skiprows=0):
+    '''Reads a csv file with pd.read_csv'''
+    return pd.read_csv(filepath, usecols=usecols, dtype=dtype, skiprows=skiprows)
+
+def to_arrow_type(dtype):
+    '''Returns the arrow type read for a pandas dtype'''
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype is str or dtype is object:
+        return pa.string()
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+def read_csv_pyarrow(filepath, usecols, dtype, skiprows=0):
+    '''
+    Reads a csv file with the multithreaded pyarrow csv reader.
+
+    Returns a dataframe with the dtypes pd.read_csv returns, i.e. missing
+    strings are NaN and categories are sorted.
+    '''
+    if isinstance(filepath, io.TextIOBase):
+        # arrow reads bytes only
+        filepath = io.BytesIO(filepath.read().encode())
+    elif isinstance(filepath, os.PathLike):
+        filepath = os.fspath(filepath)
+    table = pa_csv.read_csv(
+        filepath,
+        read_options=pa_csv.ReadOptions(skip_rows=skiprows),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types={col: to_arrow_type(dtype_) for col, dtype_ in dtype.items()},
+            strings_can_be_null=True,
+        )
+    )
+    df = table.to_pandas()
+    for col, dtype_ in dtype.items():
+        if dtype_ == 'category':
+            df[col] = df[col].cat.set_categories(sorted(df[col].cat.categories))
+        elif (dtype_ is str or dtype_ is object) and table.column(col).null_count:
+            # arrow converts missing strings to None
+            df[col] = df[col].fillna(np.nan)
+    return df
+
+READERS = {
+    PANDAS: read_csv_pandas,
+    PYARROW: read_csv_pyarrow,
+}
+
+def read_csv(filepath, usecols, dtype, skiprows=0, backend=None):
+    '''
+    Reads the usecols (list of str) columns of a csv file with the dtype (dict)
+    of each column, skipping the first skiprows lines.
+
+    backend is 'pandas' or 'pyarrow', defaulting to pyarrow if it is installed.
+    Both backends return the same dataframe, with columns in usecols order.
+    '''
+    backend = backend or DEFAULT_BACKEND
+    if backend not in READERS:
+        raise ValueError('Unknown csv backend', backend)
+    if backend == PYARROW and pa is None:
+        backend = PANDAS
+    df = READERS[backend](filepath, usecols, dtype, skiprows)
+    if list(df.columns) != usecols:
+        df = df[usecols]
+    return df
@@ -0,0 +1,219 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+
+import pandas as pd
+
+import data_input
+from data_input import CACHE_PATH, get_dashboard_data, get_input_paths
+from utilities import get_file_signature
+
+# constants
+# bump when the dashboard calculations change to invalidate stored results
+CACHE_VERSION = 2
+
+# content hashes of the most recently hashed files, with the file signature
+# they were computed for, so unchanged files are not re-read
+MAX_FILE_HASHES = 256
+_file_hashes = OrderedDict()
+
+def hash_file(filepath):
+    '''Returns the sha256 hex digest of a file's contents'''
+    signature = get_file_signature(filepath)
+    cached = _file_hashes.get(str(filepath))
+    if cached is not None and cached[0] == signature:
+        _file_hashes.move_to_end(str(filepath))
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    _file_hashes[str(filepath)] = (signature, digest.hexdigest())
+    _file_hashes.move_to_end(str(filepath))
+    while len(_file_hashes) > MAX_FILE_HASHES:
+        _file_hashes.popitem(last=False)
+    return digest.hexdigest()
+
+def make_cache_key(attendance_path, payment_path):
+    '''
+    Returns a cache key for the dashboard data of the input files, based on
+    their contents and the attendance threshold.
+    '''
+    key_parts = [
+        str(CACHE_VERSION),
+        hash_file(attendance_path),
+        hash_file(payment_path),
+        repr(data_input.ATTENDANCE_THRESHOLD),
+    ]
+    return hashlib.sha256('|'.join(key_parts).encode()).hexdigest()
+
+class DashboardCache:
+    '''
+    Two tier cache of get_dashboard_data results.
+
+    Results are kept in an in-process LRU of up to max_memory_entries and on
+    disk under cache_path as a parquet file of df_dashboard plus a json sidecar
+    of the other values, including the summary aggregates, shared by all
+    processes using the same cache_path. Least recently used disk entries are
+    evicted above max_disk_bytes.
+    '''
+    def __init__(self, cache_path=CACHE_PATH.joinpath('dashboard'), max_memory_entries=8,
+                 max_disk_bytes=256 * 1024 * 1024):
+        self.cache_path = Path(cache_path)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry_paths(self, key):
+        return (
+            self.cache_path.joinpath(key + '.parquet'),
+            self.cache_path.joinpath(key + '.json')
+        )
+
+    def get(self, key):
+        '''Returns the cached result for key or None'''
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        result = self._read_disk(key)
+        if result is not None:
+            self._put_memory(key, result)
+        return result
+
+    def put(self, key, result):
+        '''
+        Stores result for key in both tiers, or only in memory if the disk tier
+        can't be written, e.g. on a read only or full disk or without pyarrow
+        '''
+        self._put_memory(key, result)
+        try:
+            self._write_disk(key, result)
+        except (OSError, ImportError):
+            pass
+
+    def invalidate(self, key=None):
+        '''Removes key, or every entry if key is None, from both tiers'''
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(key, None)
+        if key is None:
+            keys = [path.stem for path in self.cache_path.glob('*.json')]
+        else:
+            keys = [key]
+        for key_ in keys:
+            self._remove_disk_entry(key_)
+
+    def _remove_disk_entry(self, key):
+        for path in self._entry_paths(key):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _put_memory(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        parquet_path, json_path = self._entry_paths(key)
+        try:
+            with open(json_path) as f:
+                sidecar = json.load(f)
+            df_dashboard = pd.read_parquet(parquet_path)
+        except (ValueError, OSError, ImportError):
+            return None
+        # mark entry as recently used for eviction, unless the file was
+        # removed by another process or the cache is read only
+        try:
+            os.utime(json_path)
+        except OSError:
+            pass
+        return (
+            df_dashboard,
+            sidecar['latest_date'],
+            sidecar['is_data_insufficient'],
+            sidecar['days_req_for_warnings'],
+            sidecar['summary'],
+        )
+
+    def _write_disk(self, key, result):
+        (
+            df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings,
+            summary
+        ) = result
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        parquet_path, json_path = self._entry_paths(key)
+        # write to temporary files and rename so other processes never read
+        # partial entries, json last as it marks the entry as complete
+        tmp_suffix = '.' + str(os.getpid()) + '.tmp'
+        tmp_parquet_path = parquet_path.with_name(parquet_path.name + tmp_suffix)
+        tmp_json_path = json_path.with_name(json_path.name + tmp_suffix)
+        try:
+            df_dashboard.to_parquet(tmp_parquet_path)
+            with open(tmp_json_path, 'w') as f:
+                json.dump(
+                    {
+                        'latest_date': latest_date,
+                        'is_data_insufficient': bool(is_data_insufficient),
+                        'days_req_for_warnings': int(days_req_for_warnings),
+                        'summary': summary,
+                    },
+                    f
+                )
+            os.replace(tmp_parquet_path, parquet_path)
+            os.replace(tmp_json_path, json_path)
+        except (OSError, ImportError):
+            # don't leave partial files behind
+            for tmp_path in [tmp_parquet_path, tmp_json_path]:
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+            raise
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for json_path in self.cache_path.glob('*.json'):
+            parquet_path = json_path.with_suffix('.parquet')
+            try:
+                size = json_path.stat().st_size + parquet_path.stat().st_size
+                entries.append((json_path.stat().st_mtime, size, json_path.stem))
+            except OSError:
+                continue
+        total_size = sum(size for _, size, _ in entries)
+        # evict least recently used first, always keeping the newest entry
+        for _, size, key in sorted(entries)[:-1]:
+            if total_size <= self.max_disk_bytes:
+                break
+            self._remove_disk_entry(key)
+            total_size -= size
+
+dashboard_cache = DashboardCache()
+
+def get_cached_dashboard_data(attendance_path=None, payment_path=None, cache=None):
+    '''
+    Returns data for dashboard as get_dashboard_data, reusing a cached result
+    if the input files and attendance threshold have not changed.
+    '''
+    if attendance_path is None or payment_path is None:
+        attendance_path, payment_path = get_input_paths()
+    if cache is None:
+        cache = dashboard_cache
+    key = make_cache_key(attendance_path, payment_path)
+    result = cache.get(key)
+    if result is None:
+        result = get_dashboard_data(attendance_path, payment_path)
+        cache.put(key, result)
+    return result
@@ -1,3 +1,4 @@
+import logging
 import math
 import os
 from pathlib import Path
@@ -6,15 +7,81 @@ from dotenv import load_dotenv
 import numpy as np
 import pandas as pd
 
+from csv_backends import read_csv
+from input_cache import load_with_cache
+from instrumentation import get_env_profiler, run_stage
 from utilities import (
-    pad_hour,
-    remove_non_alpha
+    combine_date_and_time,
+    factorize_rows,
+    get_hours_and_minutes,
+    parse_date,
+    parse_time_of_day,
+    parse_unique,
+    remove_non_alpha_unique
 )
 
+logger = logging.getLogger(__name__)
+
 # constants
 BASE_PATH = Path(__file__).parent.resolve()
 DATA_PATH = Path(__file__).parent.joinpath('data').resolve()
 ATTENDANCE_THRESHOLD = 0.495
+# attendance categories of eligible children, first matching category wins,
+# and of ineligible children
+ATTENDANCE_CATEGORIES = [
+    'Not enough info',
+    'Sure bet',
+    'Not met',
+    'At risk',
+    'On track',
+    'Case expired',
+]
+ATTENDANCE_CATEGORY_DTYPE = pd.CategoricalDtype(ATTENDANCE_CATEGORIES)
+# day columns the attendance risk is classified from
+RISK_COLS = [
+    'adj_full_days_approved',
+    'adj_part_days_approved',
+    'full_days_attended',
+    'part_days_attended',
+    'family_total_days_approved',
+    'family_total_days_attended',
+]
+# revenue columns totalled in the dashboard summary
+REVENUE_TOTAL_COLS = [
+    'min_revenue',
+    'potential_revenue',
+    'max_revenue',
+    'e_learning_revenue_potential',
+]
+TENANT_COL = 'tenant'
+# integer code of each family, added once so family sums share the grouping
+FAMILY_CODE_COL = 'family_code'
+# full and part days attended for time in care buckets
+# (0,5) hrs, [5,12] hrs, (12,17) hrs, [17,24] hrs
+FULL_DAYS_BY_BUCKET = np.array([0, 1, 1, 2])
+PART_DAYS_BY_BUCKET = np.array([1, 0, 1, 0])
+# low cardinality text columns stored as category
+CATEGORY_COLS = ['biz_name', 'school_age', 'eligibility', 'attendance_category']
+# day count columns stored as small ints when they hold whole numbers
+DAY_COUNT_COLS = [
+    'full_days_approved',
+    'part_days_approved',
+    'full_days_attended',
+    'part_days_attended',
+]
+DAY_COUNT_DTYPE = np.int16
+# attendance csv columns used and their dtypes
+ATTENDANCE_DTYPES = {
+    'First name': str,
+    'Last name': str,
+    'Check in time': 'category',
+    'Check in date': 'category',
+    'Check out time': 'category',
+    'Check out date': 'category',
+    'Hours in care': np.float_,
+    'Minutes in care': np.float_,
+}
+ATTENDANCE_COLUMNS = list(ATTENDANCE_DTYPES)
 
 # load env var from .env file if in local environment
 if BASE_PATH.joinpath('.env').exists():
@@ -22,33 +89,82 @@ if BASE_PATH.joinpath('.env').exists():
 user_dir = os.environ.get('USER_DIR')
 attendance_file = os.environ.get('ATTENDANCE_FILE')
 payment_file = os.environ.get('PAYMENT_FILE')
+# 'pandas' or 'pyarrow', defaults to pyarrow if installed
+csv_backend = os.environ.get('CSV_BACKEND')
+CACHE_PATH = Path(
+    os.environ.get('DASHBOARD_CACHE_DIR', BASE_PATH.joinpath('.cache'))
+).resolve()
 
-def get_attendance_data(filepath):
-    '''Reads in attendance data and returns a dataframe'''
-    attendance = pd.read_csv(
-        filepath,
-        usecols=[
-            'First name',
-            'Last name',
-            'Check in time',
-            'Check in date',
-            'Check out time',
-            'Check out date',
-            'Hours in care',
-            'Minutes in care',
-        ],
-        dtype={
-            'First name': str,
-            'Last name': str,
-            'Check in time': str,
-            'Check in date': str,
-            'Check out time': str,
-            'Check out date': str,
-            'Hours in care': np.float_,
-            'Minutes in care': np.float_,
-        }
+def get_group_keys(df, key):
+    '''
+    Returns the groupby keys for key (str).
+
+    Multi-tenant data carries a tenant column, in which case keys are scoped
+    to the tenant so that case numbers and child ids of different providers
+    are never combined.
+    '''
+    if TENANT_COL in df.columns:
+        return [TENANT_COL, key]
+    return key
+
+def get_family_codes(merged_df):
+    '''
+    Returns an integer code per row identifying the family (case number,
+    scoped to the tenant), -1 for rows without a case number. Uses the codes
+    added by add_family_codes if present.
+    '''
+    if FAMILY_CODE_COL in merged_df.columns:
+        return merged_df[FAMILY_CODE_COL].to_numpy()
+    return (
+        merged_df.groupby(get_group_keys(merged_df, 'case_number'), sort=False)
+                 .ngroup()
+                 .fillna(-1)
+                 .to_numpy(dtype=np.int64)
     )
-    # rename columns to standardize column names
+
+def add_family_codes(merged_df):
+    '''
+    Groups rows by family once, so that the family level sums of the later
+    stages reuse the codes instead of grouping by case number again.
+
+    Returns a dataframe with an additional family code column
+    '''
+    merged_df[FAMILY_CODE_COL] = get_family_codes(merged_df)
+    return merged_df
+
+def sum_by_family(family_codes, values):
+    '''
+    Sums values (array) over each family and broadcasts the sums back to the
+    rows, like groupby(...).transform(np.sum): missing values count as zero
+    and rows without a family get NaN.
+
+    values can also be 2d with a row per scenario and a column per child, in
+    which case each scenario is summed separately.
+
+    Returns an array with the family sum per row
+    '''
+    values = np.asarray(values)
+    if values.ndim == 2:
+        # give each scenario its own range of family codes
+        num_families = family_codes.max(initial=-1) + 1
+        offsets = num_families * np.arange(values.shape[0])[:, np.newaxis]
+        scenario_codes = np.where(family_codes >= 0, family_codes + offsets, -1)
+        return sum_by_family(scenario_codes.ravel(), values.ravel()).reshape(
+            values.shape
+        )
+    weights = np.nan_to_num(values) if values.dtype.kind == 'f' else values
+    has_family = family_codes >= 0
+    if has_family.all():
+        sums = np.bincount(family_codes, weights=weights)[family_codes]
+        # bincount sums in float, integer sums are exact below 2 ** 53
+        return sums.astype(np.int64) if values.dtype.kind in 'biu' else sums
+    codes = family_codes[has_family]
+    sums = np.full(len(values), np.nan)
+    sums[has_family] = np.bincount(codes, weights=weights[has_family])[codes]
+    return sums
+
+def rename_attendance_columns(attendance):
+    '''Renames attendance columns to standardize column names'''
     attendance.rename(
         columns={
             'First name': 'first_name',
@@ -64,9 +180,39 @@ def get_attendance_data(filepath):
     )
     return attendance
 
-def get_payment_data(filepath):
-    ''' Reads in payment data and returns a dataframe'''
-    payment = pd.read_csv(
+def get_attendance_data(filepath, backend=None):
+    '''
+    Reads in attendance data with the backend csv reader (see
+    csv_backends.read_csv) and returns a dataframe
+    '''
+    attendance = read_csv(
+        filepath,
+        usecols=ATTENDANCE_COLUMNS,
+        dtype=ATTENDANCE_DTYPES,
+        backend=backend or csv_backend
+    )
+    return rename_attendance_columns(attendance)
+
+def get_attendance_data_chunks(filepath, chunksize):
+    '''
+    Reads in attendance data chunksize (int) rows at a time.
+
+    Yields a dataframe per chunk, as returned by get_attendance_data
+    '''
+    for chunk in pd.read_csv(
+        filepath,
+        usecols=ATTENDANCE_COLUMNS,
+        dtype=ATTENDANCE_DTYPES,
+        chunksize=chunksize
+    ):
+        yield rename_attendance_columns(chunk)
+
+def get_payment_data(filepath, backend=None):
+    '''
+    Reads in payment data with the backend csv reader (see
+    csv_backends.read_csv) and returns a dataframe
+    '''
+    payment = read_csv(
         filepath,
         skiprows=1,
         usecols=[
@@ -86,21 +232,22 @@ def get_payment_data(filepath):
             'Co-pay per child',
         ],
         dtype={
-            'Business Name': str,
+            'Business Name': 'category',
             'First name': str,
             'Last name': str,
-            'School age': str,
+            'School age': 'category',
             'Case number': str,
             'Full days approved': np.float_,
             'Part days (or school days) approved': np.float_,
             'Co-pay (monthly)': np.float_,
-            'Eligibility': str,
+            'Eligibility': 'category',
             'Full day rate': np.float_,
             'Full day rate quality add-on': np.float_,
             'Part day rate': np.float_,
             'Part day rate quality add-on': np.float_,
             'Co-pay per child': np.float_,
-        }
+        },
+        backend=backend or csv_backend
     )
     # rename columns to standardize column names
     payment.rename(
@@ -125,7 +272,46 @@ def get_payment_data(filepath):
     # fill in nans for approved days as zeros
     payment['full_days_approved'] =  payment['full_days_approved'].fillna(0)
     payment['part_days_approved'] =  payment['part_days_approved'].fillna(0)
-    return payment
+    return compact_dtypes(payment)
+
+def compact_dtypes(df):
+    '''
+    Stores low cardinality text columns as category and day counts as small
+    ints to reduce memory.
+
+    Day count columns with missing or fractional values are left as floats.
+    Rates stay float64 so that revenue sums are unchanged.
+
+    Returns the dataframe with compact column dtypes.
+    '''
+    for col in CATEGORY_COLS:
+        if col in df.columns and not pd.api.types.is_categorical_dtype(df[col]):
+            df[col] = df[col].astype('category')
+    for col in DAY_COUNT_COLS:
+        if col not in df.columns or df[col].dtype == DAY_COUNT_DTYPE:
+            continue
+        days = df[col].to_numpy()
+        if (
+            np.isfinite(days).all()
+            and (days == np.round(days)).all()
+            and (np.abs(days) <= np.iinfo(DAY_COUNT_DTYPE).max).all()
+        ):
+            df[col] = days.astype(DAY_COUNT_DTYPE)
+    return df
+
+def remove_unused_categories(df):
+    '''
+    Drops unused categories of category columns, e.g. after selecting the rows
+    of one tenant, so the dtypes match data computed for that tenant alone.
+    '''
+    for col in df.columns:
+        if pd.api.types.is_categorical_dtype(df[col]):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+def get_memory_usage(df):
+    '''Returns the memory used by a dataframe in bytes, including strings'''
+    return int(df.memory_usage(deep=True).sum())
 
 def clean_attendance_data(attendance_df):
     '''Cleans and prepares attendance data for subsequent calculations'''
@@ -138,45 +324,57 @@ def clean_attendance_data(attendance_df):
     )
 
     # generate check in and out timestamps
-    check_in_str = (
-        attendance_df['check_in_time'].map(pad_hour) + ' ' + attendance_df['check_in_date']
+    # parse unique values only, there are at most 1440 times of day
+    check_in_date = parse_unique(attendance_df['check_in_date'], parse_date)
+    check_in_ts = combine_date_and_time(
+        check_in_date,
+        parse_unique(attendance_df['check_in_time'], parse_time_of_day)
     )
-    check_in_ts = pd.to_datetime(check_in_str, format='%I:%M %p %m/%d/%Y')
 
-    check_out_str = (
-        attendance_df['check_out_time'].map(pad_hour) + ' ' + attendance_df['check_out_date']
+    check_out_date = parse_unique(attendance_df['check_out_date'], parse_date)
+    check_out_ts = combine_date_and_time(
+        check_out_date,
+        parse_unique(attendance_df['check_out_time'], parse_time_of_day)
     )
-    check_out_ts = pd.to_datetime(check_out_str, format='%I:%M %p %m/%d/%Y')
 
     # calculate time in care
-    time_delta = check_out_ts - check_in_ts
+    hours, mins = get_hours_and_minutes(check_out_ts - check_in_ts)
 
     # fill in checked in hours and mins for those not filled in
     attendance_df['hours_in_care'] = attendance_df['hours_in_care'].fillna(
-        time_delta.dt.components['hours']
+        pd.Series(hours, index=attendance_df.index)
     )
     attendance_df['mins_in_care'] = attendance_df['mins_in_care'].fillna(
-        time_delta.dt.components['minutes']
+        pd.Series(mins, index=attendance_df.index)
     )
 
     # convert dates to datetime
-    attendance_df['check_in_date'] = pd.to_datetime(attendance_df['check_in_date'])
-    attendance_df['check_out_date'] = pd.to_datetime(attendance_df['check_out_date'])
+    attendance_df['check_in_date'] = check_in_date
+    attendance_df['check_out_date'] = check_out_date
 
     return attendance_df
 
+def get_clean_attendance_data(filepath):
+    '''Reads in attendance data and returns it cleaned with child ids'''
+    return (
+        get_attendance_data(filepath).pipe(clean_attendance_data)
+                                     .pipe(generate_child_id)
+    )
+
 def validate_copay(payment_df):
     '''Raises an error if copay is not the same across a family'''
     family_copay_same = (
-        payment_df.groupby('case_number')['family_copay']
+        payment_df.groupby(get_group_keys(payment_df, 'case_number'))['family_copay']
                   .nunique()
-                  .reset_index()
     )
-    errors = family_copay_same.loc[family_copay_same['family_copay'] > 1, 'case_number']
+    errors = family_copay_same.index[family_copay_same > 1]
     if errors.size != 0:
         raise ValueError(
             'The following case numbers have different copay amounts',
-            ', '.join(case for case in errors)
+            ', '.join(
+                case if isinstance(case, str) else ' '.join(case)
+                for case in errors
+            )
         )
 
 def clean_payment_data(payment_df):
@@ -200,18 +398,62 @@ def clean_payment_data(payment_df):
 
 def generate_child_id(df):
     '''Generates a child id column based on first name and last name'''
-    first_name = df['first_name'].map(remove_non_alpha)
-    last_name = df['last_name'].map(remove_non_alpha)
-    df['child_id'] = first_name + last_name
+    first_name = remove_non_alpha_unique(df['first_name'])
+    last_name = remove_non_alpha_unique(df['last_name'])
+    df['child_id'] = pd.Series(first_name, index=df.index) + last_name
     return df
 
-def calculate_days_in_month(attendance_df):
-    ''' Calculate days in month and days left from max attendance date'''
-    max_attended_date = attendance_df['check_out_date'].max()
+def find_child_id_collisions(df):
+    '''
+    Finds children with different names but the same child id, e.g. Jo
+    Ann-Robinson and JoAnn Robinson, whose attendance can't be told apart when
+    payment and attendance data are joined on the child id.
+
+    Returns a dataframe with the child id and names of the colliding children
+    '''
+    cols = ['child_id', 'first_name', 'last_name']
+    if TENANT_COL in df.columns:
+        cols = [TENANT_COL] + cols
+    # the child id follows from the name, so each name is checked once
+    names = df.loc[~df.duplicated([col for col in cols if col != 'child_id']), cols]
+    collisions = names.duplicated(get_group_keys(names, 'child_id'), keep=False)
+    return names.loc[collisions].sort_values(cols).reset_index(drop=True)
+
+def report_child_id_collisions(df, source):
+    '''
+    Logs a warning listing the children with different names but the same
+    child id in the source (str) data, e.g. 'payment'.
+
+    Returns df unchanged
+    '''
+    collisions = find_child_id_collisions(df)
+    if not collisions.empty:
+        logger.warning(
+            'Children with different names in the %s data have the same child '
+            'id, their attendance can\'t be told apart:\n%s',
+            source,
+            collisions.to_string(index=False)
+        )
+    return df
+
+def calculate_days_in_month_from_date(max_attended_date):
+    ''' Calculate days in month and days left from a max attendance date'''
     days_in_month = max_attended_date.daysinmonth
     days_left = days_in_month - max_attended_date.day
     return days_in_month, days_left
 
+def calculate_days_in_month_by_tenant(attendance_df):
+    '''
+    Calculate days in month and days left from max attendance date of each
+    tenant.
+
+    Returns a tuple of series indexed by tenant.
+    '''
+    max_attended_date = attendance_df.groupby(TENANT_COL)['check_out_date'].max()
+    days_in_month = max_attended_date.dt.daysinmonth
+    days_left = days_in_month - max_attended_date.dt.day
+    return days_in_month, days_left
+
 def count_days_attended(attendance_df):
     '''
     Counts the number of part and full days attended.
@@ -225,126 +467,125 @@ def count_days_attended(attendance_df):
     '''
     time_in_care = (
         attendance_df['hours_in_care'] + (attendance_df['mins_in_care'] / 60)
+    ).to_numpy()
+
+    # raise error listing every row with invalid time in care
+    invalid = ~(time_in_care <= 24)
+    if invalid.any():
+        raise ValueError(
+            'The following attendance rows have missing or more than 24 hours in care',
+            ', '.join(str(row) for row in attendance_df.index[invalid])
+        )
+
+    # bucket index of each row, the number of bucket edges below time in care
+    bucket = (
+        (time_in_care >= 5).astype(np.int64)
+        + (time_in_care > 12)
+        + (time_in_care >= 17)
     )
-    # count number of part and full days attended
-    def count_part_days(time_in_care_):
-        if (
-            time_in_care_ < 5
-            or  12 < time_in_care_ < 17
-        ):
-            return 1
-        else:
-            return 0
-
-    def count_full_days(time_in_care_):
-        if time_in_care_ < 5:
-            return 0
-        if time_in_care_ < 17:
-            return 1
-        if time_in_care_ <= 24:
-            return 2
-        else:
-            # TODO add separate data validation functions
-            raise ValueError('Value should not be more than 24')
-
-    attendance_df['part_days_attended'] = time_in_care.map(count_part_days)
-    attendance_df['full_days_attended'] = time_in_care.map(count_full_days)
+    attendance_df['part_days_attended'] = PART_DAYS_BY_BUCKET[bucket]
+    attendance_df['full_days_attended'] = FULL_DAYS_BY_BUCKET[bucket]
 
     # aggregate to each child_id
     return (
-        attendance_df.groupby('child_id')[['full_days_attended', 'part_days_attended']]
+        attendance_df.groupby(get_group_keys(attendance_df, 'child_id'))
+                     [['full_days_attended', 'part_days_attended']]
                      .sum()
     )
 
 def combine_payment_and_attendance(payment_df, attendance_df):
-    ''' Combines payment and attendance data and returns a merged dataframe.'''
-    # left join between payment and attendance data
-    merged_df = pd.merge(
-        payment_df, attendance_df,
-        how='left',
-        on='child_id'
-    )
+    '''
+    Combines payment data with attendance aggregates per child, as returned by
+    count_days_attended, as a left join on the (tenant scoped) child id.
 
-    # kids without attendance data have no attendance so set attended days as 0
-    merged_df['full_days_attended'] = merged_df['full_days_attended'].fillna(0)
-    merged_df['part_days_attended'] = merged_df['part_days_attended'].fillna(0)
+    Child ids are hashed once into dense integer ids, attendance aggregates
+    are scattered into arrays by id and read back for each child of the
+    payment data.
 
-    return merged_df
+    Returns a merged dataframe.
+    '''
+    keys = get_group_keys(payment_df, 'child_id')
+    payment_ids, attendance_ids = factorize_rows(
+        [payment_df, attendance_df], keys if isinstance(keys, list) else [keys]
+    )
+    num_ids = max(payment_ids.max(initial=-1), attendance_ids.max(initial=-1)) + 1
+    has_attendance = attendance_ids >= 0
 
-def extract_ineligible_children(merged_df):
-    '''Keeps the ineligible children'''
-    return merged_df.loc[merged_df['eligibility'] == 'Ineligible', :].copy()
+    merged_df = payment_df.reset_index(drop=True)
+    for col in attendance_df.columns:
+        values = attendance_df[col].to_numpy()
+        # kids without attendance data have no attendance so attended days are
+        # 0, and rows without an id (-1) read the extra last slot, also 0
+        values_by_id = np.zeros(num_ids + 1, dtype=values.dtype)
+        values_by_id[attendance_ids[has_attendance]] = values[has_attendance]
+        merged_df[col] = values_by_id[payment_ids]
 
-def drop_ineligible_children(merged_df):
-    '''Drops ineligible children'''
-    return merged_df.loc[merged_df['eligibility'] == 'Eligible', :].copy()
+    return compact_dtypes(merged_df)
 
-def adjust_school_age_days(merged_df):
+def partition_eligibility(merged_df):
     '''
-    Adjust approved days for school-aged children based on attendance.
+    Splits children into eligible and ineligible with one pass over the
+    eligibility column, copying each row at most once. Rows with any other
+    eligibility are dropped.
 
-    Returns a dataframe with adjusted full and part day approved
+    Returns a tuple of the eligible and ineligible dataframes
     '''
-    # helper function for new extra_full_days field
-    def calculate_extra_full_days(row):
-        # If school age and attended_full > approved_full,
-        # count extra_full_days.
-        # Then add to approved_full and subtract approved_part accordingly
-        if (
-            row['school_age'] == 'Yes'
-            and row['full_days_attended'] > row['full_days_approved']
-        ):
-            extra_full_days = (
-                row['full_days_attended'] - row['full_days_approved']
-            )
-        else:
-            extra_full_days = 0
-        return extra_full_days
-
-    # calculate "extra" full days used
-    merged_df['extra_full_days'] = merged_df.apply(
-        calculate_extra_full_days, axis = 1
+    eligibility = merged_df['eligibility']
+    eligible = (eligibility == 'Eligible').to_numpy()
+    ineligible = (eligibility == 'Ineligible').to_numpy()
+    if eligible.all():
+        return merged_df, merged_df.iloc[:0].copy()
+    return (
+        merged_df.take(np.flatnonzero(eligible)),
+        merged_df.take(np.flatnonzero(ineligible))
     )
 
-    # add extra full days to full days approved
-    merged_df['adj_full_days_approved'] = merged_df.apply(
-        lambda row: row['full_days_approved'] + row['extra_full_days']
-        if row['extra_full_days'] > 0 else row['full_days_approved'],
-        axis=1
-    )
+def calculate_adjusted_days_approved(merged_df):
+    '''
+    Calculates approved days adjusted for school-aged children: if a school
+    age child attended more full days than approved, the extra full days are
+    added to full days approved and subtracted from part days approved.
 
-    # subtract extra full days from part days approved
-    merged_df['adj_part_days_approved'] = merged_df.apply(
-        lambda row: row['part_days_approved'] - row['extra_full_days']
-        if row['extra_full_days'] > 0 else row['part_days_approved'],
-        axis=1
+    Returns a tuple of arrays of adjusted full and part days approved.
+    '''
+    full_days_approved = merged_df['full_days_approved'].to_numpy()
+    full_days_attended = merged_df['full_days_attended'].to_numpy()
+    extra_full_days = np.where(
+        (merged_df['school_age'] == 'Yes').to_numpy()
+        & (full_days_attended > full_days_approved),
+        full_days_attended - full_days_approved,
+        0
+    )
+    return (
+        full_days_approved + extra_full_days,
+        merged_df['part_days_approved'].to_numpy() - extra_full_days
     )
 
-    merged_df = merged_df.drop('extra_full_days', axis=1)
-    return merged_df
+def cap_days(days_attended, days_approved):
+    '''Returns days attended (array) capped at days approved (array)'''
+    return np.where(days_attended > days_approved, days_approved, days_attended)
 
-def cap_attended_days(merged_df):
+def adjust_and_cap_days(merged_df):
     '''
-    Caps the days attended by a child to the days approved by rate type.
+    Adjusts approved days for school-aged children based on attendance and
+    caps the days attended by a child to the adjusted days approved by rate
+    type.
 
     We assume that the provider will not receive payment for days attended over
     the days approved for each rate type.
 
-    Returns a dataframe with days attended capped at days approved for each rate
-    type.
+    Returns a dataframe with adjusted days approved and capped days attended
     '''
-    merged_df['full_days_attended'] = merged_df.apply(
-        lambda row: row['adj_full_days_approved']
-        if row['full_days_attended'] > row['adj_full_days_approved']
-        else row['full_days_attended'],
-        axis=1
+    adj_full_days_approved, adj_part_days_approved = (
+        calculate_adjusted_days_approved(merged_df)
     )
-
-    merged_df['part_days_attended'] = merged_df.apply(
-        lambda row: row['adj_part_days_approved']
-        if row['part_days_attended'] > row['adj_part_days_approved']
-        else row['part_days_attended'],
-        axis=1
+    merged_df['adj_full_days_approved'] = adj_full_days_approved
+    merged_df['adj_part_days_approved'] = adj_part_days_approved
+    merged_df['full_days_attended'] = cap_days(
+        merged_df['full_days_attended'].to_numpy(), adj_full_days_approved
+    )
+    merged_df['part_days_attended'] = cap_days(
+        merged_df['part_days_attended'].to_numpy(), adj_part_days_approved
     )
     return merged_df
 
@@ -355,22 +596,20 @@ def calculate_family_days(merged_df):
     Returns a dataframe with part and full family days attended and approved.
     '''
 
+    family_codes = get_family_codes(merged_df)
+
     # calculate family level days approved and attended
-    merged_df['family_full_days_approved'] = (
-        merged_df.groupby('case_number')['adj_full_days_approved']
-                 .transform(np.sum)
+    merged_df['family_full_days_approved'] = sum_by_family(
+        family_codes, merged_df['adj_full_days_approved']
     )
-    merged_df['family_full_days_attended'] = (
-        merged_df.groupby('case_number')['full_days_attended']
-                 .transform(np.sum)
+    merged_df['family_full_days_attended'] = sum_by_family(
+        family_codes, merged_df['full_days_attended']
     )
-    merged_df['family_part_days_approved'] = (
-        merged_df.groupby('case_number')['adj_part_days_approved']
-                 .transform(np.sum)
+    merged_df['family_part_days_approved'] = sum_by_family(
+        family_codes, merged_df['adj_part_days_approved']
     )
-    merged_df['family_part_days_attended'] = (
-        merged_df.groupby('case_number')['part_days_attended']
-                 .transform(np.sum)
+    merged_df['family_part_days_attended'] = sum_by_family(
+        family_codes, merged_df['part_days_attended']
     )
 
     # calculate total family days
@@ -389,272 +628,291 @@ def categorize_family_attendance_risk(merged_df, days_in_month_, days_left_):
     '''
     Categorizes the attendance risk of a family
 
-    Returns a dataframe with an additional attendance risk column
+    days_in_month_ and days_left_ are either numbers or arrays with a value per
+    row of merged_df.
+
+    Returns a dataframe with an additional categorical attendance risk column
     '''
     days_elapsed = days_in_month_ - days_left_
+    share_of_month_elapsed = days_elapsed / days_in_month_
 
-    # calculate number of children in the family
-    merged_df['num_children_in_family'] = (
-        merged_df.groupby('case_number')['child_id']
-                 .transform('count')
+    # not enough information
+    not_enough_info = np.broadcast_to(
+        share_of_month_elapsed < 0.5, (len(merged_df),)
     )
+    # depends only on the month, so it decides every row early in the month
+    if not_enough_info.all():
+        merged_df['attendance_category'] = pd.Categorical.from_codes(
+            np.zeros(len(merged_df), dtype=np.int8),
+            dtype=ATTENDANCE_CATEGORY_DTYPE
+        )
+        return merged_df
 
-    def categorize_families(row):
-        # helper function to categorize families
-        # not enough information
-        if days_elapsed / days_in_month_ < 0.5:
-            return 'Not enough info'
-        # sure bet
-        if (
-            # condition 1: attendance rate >= threshold
-            row['family_total_days_attended'] / row['family_total_days_approved']
-            >= ATTENDANCE_THRESHOLD
-            # condition 2: child is one of 3 types below
-            and (
-                # child is approved for only full days and attended at least 1 full day
-                (
-                    row['adj_full_days_approved'] > 0
-                    and row['full_days_attended'] > 0
-                    and row['adj_part_days_approved'] == 0
-                )
-                # child is approved for only part days and attended at least 1 part day
-                or (
-                    row['adj_part_days_approved'] > 0
-                    and row['part_days_attended'] > 0
-                    and row['adj_full_days_approved'] == 0
-                )
-                # child is approved for both full and part days and
-                # attended at least 1 full day and 1 part day
-                or (
-                    row['adj_full_days_approved'] > 0
-                    and row['adj_part_days_approved'] > 0
-                    and row['full_days_attended'] > 0
-                    and row['part_days_attended'] > 0
-                )
-            )
-        ):
-            return 'Sure bet'
-        # not met
-        if (
-            ATTENDANCE_THRESHOLD * row['family_total_days_approved']
-            - row['family_total_days_attended']
-            > row['num_children_in_family'] * days_left_
-        ):
-            return 'Not met'
-        # at risk (using percentage rule based on adjusted attendance rate)
-        if (
-            row['family_total_days_attended']
-            / ((days_elapsed / days_in_month_) * row['family_total_days_approved'])
-            < ATTENDANCE_THRESHOLD
-        ):
-            return 'At risk'
-        # on track (all others not falling in above categories)
-        return 'On track'
-
-    # categorize families
-    merged_df['attendance_category'] = merged_df.apply(categorize_families, axis=1)
-    # drop col not used in future calculations
-    merged_df = merged_df.drop('num_children_in_family', axis=1)
+    # calculate number of children in the family
+    num_children_in_family = sum_by_family(
+        get_family_codes(merged_df), merged_df['child_id'].notna()
+    )
+    codes = classify_attendance_risk(
+        {col: merged_df[col].to_numpy() for col in RISK_COLS},
+        num_children_in_family,
+        share_of_month_elapsed,
+        days_left_
+    )
+    merged_df['attendance_category'] = pd.Categorical.from_codes(
+        codes, dtype=ATTENDANCE_CATEGORY_DTYPE
+    )
     return merged_df
 
-def calculate_max_revenue_per_child_before_copay(merged_df):
+def classify_attendance_risk(days, num_children_in_family, share_of_month_elapsed,
+                             days_left_, threshold=ATTENDANCE_THRESHOLD):
     '''
-    Calculates the maximum approved revenue per child before copay.
+    Classifies attendance risk from days, a dataframe or dict of arrays with
+    the RISK_COLS columns.
 
-    Returns a dataframe with an additional max revenue before copay column.
+    All arguments broadcast against each other, e.g. thresholds with a row
+    per scenario against days with a column per child.
+
+    Returns an array of ATTENDANCE_CATEGORIES codes
     '''
-    def calculate_max_revenue(row):
-        return (
-            row['adj_full_days_approved'] * row['full_day_rate']
-            + row['adj_part_days_approved'] * row['part_day_rate']
+    adj_full_days_approved = np.asarray(days['adj_full_days_approved'])
+    adj_part_days_approved = np.asarray(days['adj_part_days_approved'])
+    full_days_attended = np.asarray(days['full_days_attended'])
+    part_days_attended = np.asarray(days['part_days_attended'])
+    family_total_days_approved = np.asarray(days['family_total_days_approved'])
+    family_total_days_attended = np.asarray(days['family_total_days_attended'])
+
+    # not enough information
+    not_enough_info = share_of_month_elapsed < 0.5
+    # sure bet
+    sure_bet = (
+        # condition 1: attendance rate >= threshold
+        (family_total_days_attended / family_total_days_approved >= threshold)
+        # condition 2: child is one of 3 types below
+        & (
+            # child is approved for only full days and attended at least 1 full day
+            (
+                (adj_full_days_approved > 0)
+                & (full_days_attended > 0)
+                & (adj_part_days_approved == 0)
+            )
+            # child is approved for only part days and attended at least 1 part day
+            | (
+                (adj_part_days_approved > 0)
+                & (part_days_attended > 0)
+                & (adj_full_days_approved == 0)
+            )
+            # child is approved for both full and part days and
+            # attended at least 1 full day and 1 part day
+            | (
+                (adj_full_days_approved > 0)
+                & (adj_part_days_approved > 0)
+                & (full_days_attended > 0)
+                & (part_days_attended > 0)
+            )
         )
+    )
+    # not met
+    not_met = (
+        threshold * family_total_days_approved
+        - family_total_days_attended
+        > num_children_in_family * days_left_
+    )
+    # at risk (using percentage rule based on adjusted attendance rate)
+    at_risk = (
+        family_total_days_attended
+        / (share_of_month_elapsed * family_total_days_approved)
+        < threshold
+    )
 
-    merged_df['max_revenue_before_copay'] = merged_df.apply(calculate_max_revenue, axis=1)
-    return merged_df
+    # first matching condition wins
+    # on track (all others not falling in above categories)
+    conditions = np.broadcast_arrays(not_enough_info, sure_bet, not_met, at_risk)
+    return np.select(conditions, [0, 1, 2, 3], default=4).astype(np.int8)
 
-def calculate_max_quality_add_on_per_child(merged_df):
+def calculate_max_days(merged_df):
     '''
-    Calculates the quality add on fee corresponding to maximum approved revenue
-    per child.
+    Calculates the full and part days paid for maximum approved revenue.
 
-    Returns a dataframe with an additional max quality add on column.
+    Returns a tuple of arrays of full and part days.
     '''
-    def calculate_max_quality_add_on(row):
-        return(
-            row['adj_full_days_approved'] * row['full_day_quality_add_on']
-            + row['adj_part_days_approved'] * row['part_day_quality_add_on']
-        )
+    return (
+        merged_df['adj_full_days_approved'].to_numpy(),
+        merged_df['adj_part_days_approved'].to_numpy()
+    )
 
-    merged_df['max_quality_add_on'] = merged_df.apply(calculate_max_quality_add_on, axis=1)
-    return merged_df
+def is_threshold_met(merged_df, threshold=ATTENDANCE_THRESHOLD):
+    '''
+    Returns a bool array of whether the family attendance threshold is met.
+    merged_df can also be a dict of arrays.
+    '''
+    return (
+        np.asarray(merged_df['family_total_days_attended'])
+        / np.asarray(merged_df['family_total_days_approved'])
+        >= threshold
+    )
 
-def calculate_min_revenue_per_child_before_copay(merged_df):
-    '''
-    Calculates the minimum (guaranteed revenue) per child before copay.
-
-    Returns a dataframe with an additional min revenue before copay column.
-    '''
-    def calculate_min_revenue(row):
-        # if threshold met and > 0 instances of attendance then approved days * rate type
-        if (row['family_total_days_attended'] / row['family_total_days_approved']
-            >= ATTENDANCE_THRESHOLD):
-            if row['full_days_attended'] > 0:
-                full_day_min_revenue = row['adj_full_days_approved'] * row['full_day_rate']
-            else:
-                full_day_min_revenue = 0
-            if row['part_days_attended'] > 0:
-                part_day_min_revenue = row['adj_part_days_approved'] * row['part_day_rate']
-            else:
-                part_day_min_revenue = 0
-        else:
-            full_day_min_revenue = row['full_days_attended'] * row['full_day_rate']
-            part_day_min_revenue = row['part_days_attended'] * row['part_day_rate']
-        return full_day_min_revenue + part_day_min_revenue
-
-    merged_df['min_revenue_before_copay'] = merged_df.apply(calculate_min_revenue, axis=1)
-    return merged_df
+def calculate_min_days(merged_df, threshold=ATTENDANCE_THRESHOLD):
+    '''
+    Calculates the full and part days paid for minimum (guaranteed) revenue.
 
-def calculate_min_quality_add_on_per_child(merged_df):
-    '''
-    Calculates the minimum (guaranteed) quality add on per child.
-
-    Returns a dataframe with an additional min revenue before copay column.
-    '''
-    def calculate_min_quality_add_on(row):
-        # if threshold met and > 0 instances of attendance then approved days * rate type
-        if (row['family_total_days_attended'] / row['family_total_days_approved']
-            >= ATTENDANCE_THRESHOLD):
-            if row['full_days_attended'] > 0:
-                full_day_min_quality_add_on = (
-                    row['adj_full_days_approved'] * row['full_day_quality_add_on']
-                )
-            else:
-                full_day_min_quality_add_on = 0
-            if row['part_days_attended'] > 0:
-                part_day_min_quality_add_on = (
-                    row['adj_part_days_approved'] * row['part_day_quality_add_on']
-                )
-            else:
-                part_day_min_quality_add_on = 0
-        else:
-            full_day_min_quality_add_on = (
-                row['full_days_attended'] * row['full_day_quality_add_on']
-            )
-            part_day_min_quality_add_on = (
-                row['part_days_attended'] * row['part_day_quality_add_on']
-            )
-        return full_day_min_quality_add_on + part_day_min_quality_add_on
+    If the family attendance threshold is met, approved days are paid for each
+    rate type with > 0 instances of attendance, otherwise only attended days
+    are paid. merged_df can also be a dict of arrays.
 
-    merged_df['min_quality_add_on'] = merged_df.apply(calculate_min_quality_add_on, axis=1)
-    return merged_df
+    Returns a tuple of arrays of full and part days.
+    '''
+    threshold_met = is_threshold_met(merged_df, threshold)
+    full_days_attended = np.asarray(merged_df['full_days_attended'])
+    part_days_attended = np.asarray(merged_df['part_days_attended'])
+    full_days = np.where(
+        threshold_met,
+        np.where(
+            full_days_attended > 0, np.asarray(merged_df['adj_full_days_approved']), 0
+        ),
+        full_days_attended
+    )
+    part_days = np.where(
+        threshold_met,
+        np.where(
+            part_days_attended > 0, np.asarray(merged_df['adj_part_days_approved']), 0
+        ),
+        part_days_attended
+    )
+    return full_days, part_days
 
-def calculate_potential_revenue_per_child_before_copay(merged_df, days_left_):
+def calculate_min_paid(merged_df, threshold=ATTENDANCE_THRESHOLD):
     '''
-    Calculates the potential revenue per child before copay.
+    Calculates which rate types count towards minimum (guaranteed) revenue: if
+    the family attendance threshold is met, rate types without attendance are
+    not paid at all, so a missing rate for them gives no revenue rather than
+    a missing one. merged_df can also be a dict of arrays.
 
-    Returns a dataframe with an additional potential revenue before copay column.
+    Returns a tuple of bool arrays for full and part days.
     '''
-    def calculate_potential_revenue(row, days_left):
-        # potential revenue is approved days * rate unless threshold is already not met
-        if row['attendance_category'] == 'Not met':
-            full_days_difference = (
-                row['adj_full_days_approved'] - row['full_days_attended']
-            )
-            part_days_difference = (
-                row['adj_part_days_approved'] - row['part_days_attended']
-            )
-            potential_revenue_full_days = np.minimum(
-                days_left, full_days_difference
-            )
-            if full_days_difference < days_left:
-                potential_revenue_part_days = np.minimum(
-                    days_left - full_days_difference,
-                    part_days_difference
-                )
-            else:
-                potential_revenue_part_days = 0
-            full_day_potential_revenue = (
-                (row['full_days_attended'] + potential_revenue_full_days)
-                * row['full_day_rate']
-            )
-            part_day_potential_revenue = (
-                (row['part_days_attended'] + potential_revenue_part_days)
-                * row['part_day_rate']
-            )
-        else:
-            full_day_potential_revenue = (
-                row['adj_full_days_approved'] * row['full_day_rate']
-            )
-            part_day_potential_revenue = (
-                row['adj_part_days_approved'] * row['part_day_rate']
-            )
-        return full_day_potential_revenue + part_day_potential_revenue
+    threshold_met = is_threshold_met(merged_df, threshold)
+    return (
+        ~threshold_met | (np.asarray(merged_df['full_days_attended']) > 0),
+        ~threshold_met | (np.asarray(merged_df['part_days_attended']) > 0)
+    )
 
-    merged_df['potential_revenue_before_copay'] = merged_df.apply(
-        calculate_potential_revenue,
-        args=[days_left_],
-        axis=1
+def calculate_potential_days(merged_df, days_left_, not_met=None):
+    '''
+    Calculates the full and part days paid for potential revenue.
+
+    Potential days are approved days unless the threshold is already not met,
+    in which case attended days plus the days left in the month are used, for
+    full days first and then part days. merged_df can also be a dict of
+    arrays, with not_met (bool array) in place of the attendance category.
+
+    Returns a tuple of arrays of full and part days.
+    '''
+    if not_met is None:
+        not_met = (merged_df['attendance_category'] == 'Not met').to_numpy()
+    adj_full_days_approved = np.asarray(merged_df['adj_full_days_approved'])
+    adj_part_days_approved = np.asarray(merged_df['adj_part_days_approved'])
+    full_days_attended = np.asarray(merged_df['full_days_attended'])
+    part_days_attended = np.asarray(merged_df['part_days_attended'])
+
+    full_days_difference = adj_full_days_approved - full_days_attended
+    part_days_difference = adj_part_days_approved - part_days_attended
+    remaining_full_days = np.minimum(days_left_, full_days_difference)
+    remaining_part_days = np.where(
+        full_days_difference < days_left_,
+        np.minimum(days_left_ - full_days_difference, part_days_difference),
+        0
     )
-    return merged_df
+    full_days = np.where(
+        not_met, full_days_attended + remaining_full_days, adj_full_days_approved
+    )
+    part_days = np.where(
+        not_met, part_days_attended + remaining_part_days, adj_part_days_approved
+    )
+    return full_days, part_days
 
-def calculate_potential_quality_add_on_per_child(merged_df, days_left_):
+def apply_rate_matrix(merged_df, full_days, part_days, rate_types,
+                      full_paid=None, part_paid=None):
     '''
-    Calculates the potential quality add on per child.
+    Multiplies full and part days by the full and part day rates of each rate
+    type in rate_types (list of str), e.g. ['rate', 'quality_add_on'].
 
-    Returns a dataframe with an additional potential quality add on column.
+    The rates form a (day type x rate type) matrix per child, so every rate
+    type is applied in a single pass over the day counts. Where full_paid or
+    part_paid (bool arrays) is False the day type adds 0, whatever its rate.
+
+    Returns an array with one column per rate type.
     '''
-    def calculate_potential_quality_add_on(row, days_left):
-        # potential quality add on is approved days * rate unless threshold is already not met
-        if row['attendance_category'] == 'Not met':
-            full_days_difference = (
-                row['adj_full_days_approved'] - row['full_days_attended']
-            )
-            part_days_difference = (
-                row['adj_part_days_approved'] - row['part_days_attended']
-            )
-            potential_revenue_full_days = np.minimum(
-                days_left, full_days_difference
-            )
-            if full_days_difference < days_left:
-                potential_revenue_part_days = np.minimum(
-                    days_left - full_days_difference,
-                    part_days_difference
-                )
-            else:
-                potential_revenue_part_days = 0
-            full_day_potential_quality_add_on = (
-                (row['full_days_attended'] + potential_revenue_full_days)
-                * row['full_day_quality_add_on']
-            )
-            part_day_potential_quality_add_on = (
-                (row['part_days_attended'] + potential_revenue_part_days)
-                * row['part_day_quality_add_on']
-            )
-        else:
-            full_day_potential_quality_add_on = (
-                row['adj_full_days_approved'] * row['full_day_quality_add_on']
-            )
-            part_day_potential_quality_add_on = (
-                row['adj_part_days_approved'] * row['part_day_quality_add_on']
-            )
-        return full_day_potential_quality_add_on + part_day_potential_quality_add_on
+    full_day_rates = merged_df[['full_day_' + rate_type for rate_type in rate_types]]
+    part_day_rates = merged_df[['part_day_' + rate_type for rate_type in rate_types]]
+    full_amounts = np.asarray(full_days)[:, np.newaxis] * full_day_rates.to_numpy()
+    part_amounts = np.asarray(part_days)[:, np.newaxis] * part_day_rates.to_numpy()
+    if full_paid is not None:
+        full_amounts = np.where(full_paid[:, np.newaxis], full_amounts, 0)
+    if part_paid is not None:
+        part_amounts = np.where(part_paid[:, np.newaxis], part_amounts, 0)
+    return full_amounts + part_amounts
+
+def assign_revenue_and_quality_add_on(merged_df, rev_type_str, full_days, part_days,
+                                      full_paid=None, part_paid=None):
+    '''
+    Applies the rate and quality add on matrix to the paid days of rev_type_str
+    (str), as in apply_rate_matrix.
 
-    merged_df['potential_quality_add_on'] = merged_df.apply(
-        calculate_potential_quality_add_on,
-        args=[days_left_],
-        axis=1
+    Returns a dataframe with additional rev_type_str revenue before copay and
+    quality add on columns.
+    '''
+    amounts = apply_rate_matrix(
+        merged_df, full_days, part_days, ['rate', 'quality_add_on'],
+        full_paid, part_paid
     )
+    merged_df[rev_type_str + '_revenue_before_copay'] = amounts[:, 0]
+    merged_df[rev_type_str + '_quality_add_on'] = amounts[:, 1]
     return merged_df
 
+def calculate_max_revenue_and_quality_add_on_per_child(merged_df):
+    '''
+    Calculates the maximum approved revenue before copay and the corresponding
+    quality add on per child.
+
+    Returns a dataframe with additional max revenue before copay and max quality
+    add on columns.
+    '''
+    full_days, part_days = calculate_max_days(merged_df)
+    return assign_revenue_and_quality_add_on(merged_df, 'max', full_days, part_days)
+
+def calculate_min_revenue_and_quality_add_on_per_child(merged_df):
+    '''
+    Calculates the minimum (guaranteed) revenue before copay and quality add on
+    per child.
+
+    Returns a dataframe with additional min revenue before copay and min quality
+    add on columns.
+    '''
+    full_days, part_days = calculate_min_days(merged_df)
+    full_paid, part_paid = calculate_min_paid(merged_df)
+    return assign_revenue_and_quality_add_on(
+        merged_df, 'min', full_days, part_days, full_paid, part_paid
+    )
+
+def calculate_potential_revenue_and_quality_add_on_per_child(merged_df, days_left_):
+    '''
+    Calculates the potential revenue before copay and quality add on per child.
+
+    Returns a dataframe with additional potential revenue before copay and
+    potential quality add on columns.
+    '''
+    full_days, part_days = calculate_potential_days(merged_df, days_left_)
+    return assign_revenue_and_quality_add_on(
+        merged_df, 'potential', full_days, part_days
+    )
+
 def calculate_family_revenue_before_copay(merged_df, rev_type_str):
     '''
     Sums up revenue of rev_type_str (str) over all children in the family.
 
     Returns a dataframe with an additional family rev_type_str revenue column.
     '''
-    merged_df['family_' + rev_type_str + '_revenue_before_copay'] = (
-        merged_df.groupby('case_number')[rev_type_str + '_revenue_before_copay']
-                 .transform(np.sum)
+    merged_df['family_' + rev_type_str + '_revenue_before_copay'] = sum_by_family(
+        get_family_codes(merged_df), merged_df[rev_type_str + '_revenue_before_copay']
     )
     return merged_df
 
@@ -664,44 +922,43 @@ def calculate_revenue_per_child(merged_df, rev_type_str):
 
     Returns a dataframe with an additional rev_type_str revenue column.
     '''
-    def calculate_revenue(row):
-        # if family copay > family revenue, per child revenue is just quality add on
-        if row['family_copay'] > row['family_' + rev_type_str + '_revenue_before_copay']:
-            return row[rev_type_str + '_quality_add_on']
-        # otherwise per child revenue is (revenue + quality add on - copay)
-        else:
-            return (
-                row[rev_type_str + '_revenue_before_copay']
-                + row[rev_type_str + '_quality_add_on']
-                - row['copay_per_child']
-            )
-
-    merged_df[rev_type_str + '_revenue'] = merged_df.apply(calculate_revenue, axis=1)
+    merged_df[rev_type_str + '_revenue'] = apply_copay(
+        merged_df[rev_type_str + '_revenue_before_copay'].to_numpy(),
+        merged_df[rev_type_str + '_quality_add_on'].to_numpy(),
+        merged_df['family_' + rev_type_str + '_revenue_before_copay'].to_numpy(),
+        merged_df['family_copay'].to_numpy(),
+        merged_df['copay_per_child'].to_numpy()
+    )
     return merged_df
 
+def apply_copay(revenue_before_copay, quality_add_on, family_revenue_before_copay,
+                family_copay, copay_per_child):
+    '''
+    Returns the revenue per child after copay, from arrays that broadcast
+    against each other.
+    '''
+    # if family copay > family revenue, per child revenue is just quality add on
+    # otherwise per child revenue is (revenue + quality add on - copay)
+    return np.where(
+        family_copay > family_revenue_before_copay,
+        quality_add_on,
+        revenue_before_copay + quality_add_on - copay_per_child
+    )
+
 def calculate_e_learning_revenue(merged_df):
     '''
     Calculate the additional rev potential if all part days become full
 
     Returns a dataframe with an additional e learning potential revenue column
     '''
-    # Helper function
-    def e_learning_helper(row):
-        if (row['school_age'] == 'Yes'
-            and row['adj_part_days_approved'] > row['part_days_attended']):
-            e_learning_revenue = (
-                (row['adj_part_days_approved'] - row['part_days_attended'])
-                * (row['full_day_rate'] + row['full_day_quality_add_on']
-                  - row['part_day_rate'] - row['part_day_quality_add_on'])
-            )
-        else:
-            e_learning_revenue = 0
-        return e_learning_revenue
-
-    merged_df['e_learning_revenue_potential'] = (
-        merged_df.apply(e_learning_helper, axis=1)
+    merged_df['e_learning_revenue_potential'] = np.where(
+        (merged_df['school_age'] == 'Yes')
+        & (merged_df['adj_part_days_approved'] > merged_df['part_days_attended']),
+        (merged_df['adj_part_days_approved'] - merged_df['part_days_attended'])
+        * (merged_df['full_day_rate'] + merged_df['full_day_quality_add_on']
+           - merged_df['part_day_rate'] - merged_df['part_day_quality_add_on']),
+        0
     )
-
     return merged_df
 
 def calculate_attendance_rate(df):
@@ -724,8 +981,10 @@ def filter_dashboard_cols(df):
         'max_revenue',
         'e_learning_revenue_potential'
     ]
-    df_sub = df.loc[:, cols_to_keep].copy()
-    return df_sub
+    if TENANT_COL in df.columns:
+        cols_to_keep = [TENANT_COL] + cols_to_keep
+    # selecting a list of columns already returns a new dataframe
+    return df[cols_to_keep]
 
 def produce_ineligible_df(ineligible_df):
     '''Processes ineligible children observations for dashboard'''
@@ -734,34 +993,196 @@ def produce_ineligible_df(ineligible_df):
         'case_number',
         'biz_name',
     ]
-    ineligible_df = ineligible_df.loc[:, cols_to_keep].copy()
+    if TENANT_COL in ineligible_df.columns:
+        cols_to_keep = [TENANT_COL] + cols_to_keep
 
     # add columns where no value was calculated
-    ineligible_df['attendance_category'] = 'Case expired'
-    ineligible_df['attendance_rate'] = np.nan
-    ineligible_df['min_revenue'] = 0
-    ineligible_df['potential_revenue'] = 0
-    ineligible_df['max_revenue'] = 0
-    ineligible_df['e_learning_revenue_potential'] = 0
+    return ineligible_df[cols_to_keep].assign(
+        attendance_category=pd.Series(
+            'Case expired', index=ineligible_df.index, dtype=ATTENDANCE_CATEGORY_DTYPE
+        ),
+        attendance_rate=np.nan,
+        min_revenue=0,
+        potential_revenue=0,
+        max_revenue=0,
+        e_learning_revenue_potential=0,
+    )
+
+def append_ineligible_children(df, ineligible_df):
+    '''
+    Appends the ineligible children to the dashboard dataframe.
+
+    Returns the combined dataframe sorted by family and child name.
+    '''
+    sort_cols = ['case_number', 'name']
+    if TENANT_COL in df.columns:
+        sort_cols = [TENANT_COL] + sort_cols
+    return (
+        pd.concat([df, ineligible_df], ignore_index=True, copy=False)
+          .sort_values(by=sort_cols)
+    )
 
-    return ineligible_df
+def broadcast_tenant_values(df, values):
+    '''
+    Maps values per tenant (series indexed by tenant) onto the rows of df.
 
-def get_dashboard_data():
-    ''' Returns data for dashboard'''
-    attendance = get_attendance_data(DATA_PATH.joinpath(user_dir, attendance_file))
-    payment = get_payment_data(DATA_PATH.joinpath(user_dir, payment_file))
+    Returns an array with a value per row, or values unchanged if it is a
+    single number.
+    '''
+    if isinstance(values, pd.Series):
+        return df[TENANT_COL].map(values).to_numpy()
+    return values
 
-    # clean attendance data
-    attendance_clean = (
-        attendance.pipe(clean_attendance_data)
-                  .pipe(generate_child_id)
+def split_eligible_children(attendance_processed, payment, profiler=None):
+    '''
+    Validates and cleans payment data and combines it with days attended per
+    child, as returned by count_days_attended.
+
+    Returns a tuple of the eligible and ineligible children dataframes
+    '''
+    stage = run_stage if profiler is None else profiler.run
+
+    # raise error if family copay amounts are different within a family
+    stage(payment, validate_copay)
+
+    payment_processed = (
+        payment.pipe(stage, clean_payment_data)
+               .pipe(stage, generate_child_id)
+               .pipe(stage, report_child_id_collisions, 'payment')
     )
 
+    # combine payment and attendance data
+    payment_attendance = stage(
+        payment_processed, combine_payment_and_attendance, attendance_processed
+    )
+    return stage(payment_attendance, partition_eligibility)
+
+def process_dashboard_data(attendance_processed, payment, days_in_month, days_left,
+                           profiler=None):
+    '''
+    Runs the dashboard calculations on days attended per child, as returned by
+    count_days_attended, and payment data.
+
+    days_in_month and days_left are numbers, or series indexed by tenant for
+    multi-tenant data. If profiler (instrumentation.StageProfiler) is set,
+    each stage is run through it.
+
+    Returns the dashboard dataframe
+    '''
+    stage = run_stage if profiler is None else profiler.run
+
+    eligible, ineligible = split_eligible_children(
+        attendance_processed, payment, profiler
+    )
+    ineligible = stage(ineligible, produce_ineligible_df)
+
+    # stages below keep the rows of eligible in order so per row values line up
+    days_in_month = broadcast_tenant_values(eligible, days_in_month)
+    days_left = broadcast_tenant_values(eligible, days_left)
+
+    df_dashboard = (
+        eligible.pipe(stage, adjust_and_cap_days)
+                .pipe(stage, add_family_codes)
+                .pipe(stage, calculate_family_days)
+                .pipe(stage, categorize_family_attendance_risk, days_in_month,
+                      days_left)
+                .pipe(stage, calculate_max_revenue_and_quality_add_on_per_child)
+                .pipe(stage, calculate_family_revenue_before_copay, 'max')
+                .pipe(stage, calculate_revenue_per_child, 'max')
+                .pipe(stage, calculate_min_revenue_and_quality_add_on_per_child)
+                .pipe(stage, calculate_family_revenue_before_copay, 'min')
+                .pipe(stage, calculate_revenue_per_child, 'min')
+                .pipe(stage, calculate_potential_revenue_and_quality_add_on_per_child,
+                      days_left)
+                .pipe(stage, calculate_family_revenue_before_copay, 'potential')
+                .pipe(stage, calculate_revenue_per_child, 'potential')
+                .pipe(stage, calculate_e_learning_revenue)
+                .pipe(stage, calculate_attendance_rate)
+                .pipe(stage, filter_dashboard_cols)
+                .pipe(stage, append_ineligible_children, ineligible)
+                .pipe(stage, compact_dtypes)
+                .pipe(stage, remove_unused_categories)
+    )
+    return df_dashboard
+
+def summarize_dashboard_data(df_dashboard):
+    '''
+    Returns the aggregates shown by the attendance table and revenue chart, as
+    a dict with the number of children in each attendance category, the
+    number of eligible children and the revenue totals.
+
+    Values are python numbers, so the summary can be stored as json.
+    '''
+    category_counts = (
+        df_dashboard['attendance_category'].astype(ATTENDANCE_CATEGORY_DTYPE)
+                                           .value_counts(sort=False)
+    )
+    return {
+        'category_counts': {
+            category: int(count) for category, count in category_counts.items()
+        },
+        'eligible_count': int(category_counts.drop('Case expired').sum()),
+        'revenue_totals': {
+            col: float(df_dashboard[col].sum()) for col in REVENUE_TOTAL_COLS
+        },
+    }
+
+def get_input_paths(user_dir_=None, attendance_file_=None, payment_file_=None):
+    '''
+    Returns the attendance and payment file paths, defaulting to the files set
+    by the USER_DIR, ATTENDANCE_FILE and PAYMENT_FILE environment variables.
+    '''
+    user_path = DATA_PATH.joinpath(user_dir_ or user_dir)
+    return (
+        user_path.joinpath(attendance_file_ or attendance_file),
+        user_path.joinpath(payment_file_ or payment_file)
+    )
+
+def get_dashboard_data(attendance_path=None, payment_path=None, profiler=None):
+    '''
+    Returns data for dashboard
+
+    Stages are timed with profiler (instrumentation.StageProfiler) if set, or
+    if enabled by the DASHBOARD_PROFILE env var.
+    '''
+    if attendance_path is None or payment_path is None:
+        attendance_path, payment_path = get_input_paths()
+    if profiler is None:
+        profiler = get_env_profiler()
+    stage = run_stage if profiler is None else profiler.run
+
+    # cleaned attendance and typed payment data, stored as parquet files next
+    # to the csv files until they change
+    attendance_clean = stage(attendance_path, load_with_cache, get_clean_attendance_data)
+    payment = stage(payment_path, load_with_cache, get_payment_data)
+    stage(attendance_clean, report_child_id_collisions, 'attendance')
+
+    # process data for dashboard
+    result = build_dashboard_data(
+        stage(attendance_clean, count_days_attended),
+        attendance_clean['check_out_date'].max(),
+        payment,
+        profiler
+    )
+    if profiler is not None:
+        profiler.finish()
+    return result
+
+def build_dashboard_data(attendance_processed, max_attended_date, payment,
+                         profiler=None):
+    '''
+    Returns data for dashboard from days attended per child, the latest
+    attendance date and payment data.
+
+    Stages are timed with profiler (instrumentation.StageProfiler) if set.
+    '''
+    stage = run_stage if profiler is None else profiler.run
+
     # get latest date in attendance data
-    latest_date = attendance_clean['check_out_date'].max().strftime('%b %d %Y')
+    latest_date = max_attended_date.strftime('%b %d %Y')
 
     # calculate days in month and days left in month
-    days_in_month, days_left = calculate_days_in_month(attendance_clean)
+    days_in_month, days_left = calculate_days_in_month_from_date(max_attended_date)
 
     # check if data is insufficient
     is_data_insufficient = (days_in_month - days_left) / days_in_month < 0.5
@@ -769,51 +1190,98 @@ def get_dashboard_data():
     # calculate number of days required for at-risk warnings to be shown
     days_req_for_warnings = math.ceil(days_in_month/2)
 
-    # process data for dashboard
-    attendance_processed = count_days_attended(attendance_clean)
+    df_dashboard = process_dashboard_data(
+        attendance_processed, payment, days_in_month, days_left, profiler
+    )
+    summary = stage(df_dashboard, summarize_dashboard_data)
+    return (
+        df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings,
+        summary
+    )
 
-    # raise error if family copay amounts are different within a family
-    validate_copay(payment)
+def find_tenant_files(data_path=DATA_PATH, attendance_file_=None, payment_file_=None):
+    '''
+    Scans the tenant directories under data_path for attendance and payment
+    files, named as in the ATTENDANCE_FILE and PAYMENT_FILE environment
+    variables by default. Directories missing either file are skipped.
 
-    payment_processed = (
-        payment.pipe(clean_payment_data)
-               .pipe(generate_child_id)
+    Returns a dict of tenant name to (attendance path, payment path)
+    '''
+    attendance_file_ = attendance_file_ or attendance_file
+    payment_file_ = payment_file_ or payment_file
+    tenant_files = {}
+    for tenant_path in sorted(Path(data_path).iterdir()):
+        attendance_path = tenant_path.joinpath(attendance_file_)
+        payment_path = tenant_path.joinpath(payment_file_)
+        if attendance_path.is_file() and payment_path.is_file():
+            tenant_files[tenant_path.name] = (attendance_path, payment_path)
+    return tenant_files
+
+def get_batch_dashboard_data(data_path=DATA_PATH, attendance_file_=None,
+                             payment_file_=None, profiler=None):
+    '''
+    Returns data for dashboard for every tenant under data_path.
+
+    The attendance and payment files of all tenants are combined with a
+    tenant column so the calculations run once over all tenants. Stages are
+    timed as in get_dashboard_data.
+
+    Returns a dict of tenant name to a (df_dashboard, latest_date,
+    is_data_insufficient, days_req_for_warnings, summary) tuple as returned by
+    get_dashboard_data
+    '''
+    tenant_files = find_tenant_files(data_path, attendance_file_, payment_file_)
+    if not tenant_files:
+        return {}
+    if profiler is None:
+        profiler = get_env_profiler()
+    stage = run_stage if profiler is None else profiler.run
+
+    attendance_clean = pd.concat(
+        [
+            load_with_cache(attendance_path, get_clean_attendance_data)
+                .assign(**{TENANT_COL: tenant})
+            for tenant, (attendance_path, _) in tenant_files.items()
+        ],
+        ignore_index=True
+    )
+    payment = pd.concat(
+        [
+            load_with_cache(payment_path, get_payment_data)
+                .assign(**{TENANT_COL: tenant})
+            for tenant, (_, payment_path) in tenant_files.items()
+        ],
+        ignore_index=True
     )
 
-    # combine payment and attendance data
-    payment_attendance = combine_payment_and_attendance(
-        payment_processed, attendance_processed
+    stage(attendance_clean, report_child_id_collisions, 'attendance')
+
+    # calculate days in month and days left in month for each tenant
+    days_in_month, days_left = calculate_days_in_month_by_tenant(attendance_clean)
+    latest_date = (
+        attendance_clean.groupby(TENANT_COL)['check_out_date'].max()
+                        .dt.strftime('%b %d %Y')
     )
 
-    ineligible = (
-        payment_attendance.pipe(extract_ineligible_children)
-                          .pipe(produce_ineligible_df)
+    df_dashboard = process_dashboard_data(
+        stage(attendance_clean, count_days_attended),
+        payment, days_in_month, days_left, profiler
     )
-    df_dashboard = (
-        payment_attendance.pipe(drop_ineligible_children)
-                          .pipe(adjust_school_age_days)
-                          .pipe(cap_attended_days)
-                          .pipe(calculate_family_days)
-                          .pipe(categorize_family_attendance_risk, days_in_month, days_left)
-                          .pipe(calculate_max_revenue_per_child_before_copay)
-                          .pipe(calculate_max_quality_add_on_per_child)
-                          .pipe(calculate_family_revenue_before_copay, 'max')
-                          .pipe(calculate_revenue_per_child, 'max')
-                          .pipe(calculate_min_revenue_per_child_before_copay)
-                          .pipe(calculate_min_quality_add_on_per_child)
-                          .pipe(calculate_family_revenue_before_copay, 'min')
-                          .pipe(calculate_revenue_per_child, 'min')
-                          .pipe(calculate_potential_revenue_per_child_before_copay, days_left)
-                          .pipe(calculate_potential_quality_add_on_per_child, days_left)
-                          .pipe(calculate_family_revenue_before_copay, 'potential')
-                          .pipe(calculate_revenue_per_child, 'potential')
-                          .pipe(calculate_e_learning_revenue)
-                          .pipe(calculate_attendance_rate)
-                          .pipe(filter_dashboard_cols)
-                          .append(ineligible, ignore_index=True)
-                          .sort_values(by=['case_number', 'name'])
-    )
-    return df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings
+    if profiler is not None:
+        profiler.finish()
+
+    # partition results by tenant
+    results = {}
+    for tenant, df_tenant in df_dashboard.groupby(TENANT_COL, sort=False):
+        df_tenant = df_tenant.drop(TENANT_COL, axis=1).pipe(remove_unused_categories)
+        results[tenant] = (
+            df_tenant,
+            latest_date[tenant],
+            bool((days_in_month[tenant] - days_left[tenant]) / days_in_month[tenant] < 0.5),
+            math.ceil(days_in_month[tenant] / 2),
+            summarize_dashboard_data(df_tenant),
+        )
+    return results
 
 if __name__ == '__main__':
     get_dashboard_data()
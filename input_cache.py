@@ -0,0 +1,90 @@
+import json
+import os
+from pathlib import Path
+
+from utilities import get_file_signature
+
+# constants
+CACHE_DIR_NAME = '.cache'
+# bump when the loaders change to rebuild stored frames
+INPUT_CACHE_VERSION = 1
+METADATA_KEY = b'input_cache'
+
+def is_cache_available():
+    '''Returns whether pyarrow, which stores the cached frames, is installed'''
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        return False
+    return True
+
+def get_input_cache_path(filepath, load):
+    '''
+    Returns the path of the cached frame of a source file loaded with load,
+    in a .cache directory next to the source file.
+    '''
+    filepath = Path(filepath)
+    return filepath.parent.joinpath(
+        CACHE_DIR_NAME, filepath.stem + '.' + load.__name__ + '.parquet'
+    )
+
+def make_cache_metadata(filepath, load):
+    '''Returns the values a cached frame must match to be reused'''
+    return {
+        'version': INPUT_CACHE_VERSION,
+        'loader': load.__name__,
+        'signature': list(get_file_signature(filepath)),
+    }
+
+def read_cached_frame(cache_path, metadata):
+    '''
+    Reads a cached frame, memory mapping the file, returns None if there is
+    none or it was built from a different source file or loader.
+    '''
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        stored = pq.read_schema(cache_path, memory_map=True).metadata or {}
+        if json.loads(stored.get(METADATA_KEY, b'null')) != metadata:
+            return None
+        return pq.read_table(cache_path, memory_map=True).to_pandas()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+def write_cached_frame(cache_path, metadata, df):
+    '''Writes a frame and its metadata, replacing the previous file atomically'''
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata)}
+    )
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.' + str(os.getpid()) + '.tmp')
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+def load_with_cache(filepath, load):
+    '''
+    Returns load(filepath), reusing the frame stored by a previous call unless
+    the source file changed since.
+
+    The source file is detected as changed by its modification time and size.
+    If the cache cannot be written, e.g. on a read only data directory, the
+    frame is still returned. Without pyarrow nothing is cached and load is
+    always called.
+    '''
+    if not is_cache_available():
+        return load(filepath)
+    cache_path = get_input_cache_path(filepath, load)
+    metadata = make_cache_metadata(filepath, load)
+    df = read_cached_frame(cache_path, metadata)
+    if df is None:
+        df = load(filepath)
+        try:
+            write_cached_frame(cache_path, metadata, df)
+        except OSError:
+            pass
+    return df
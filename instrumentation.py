@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+# constants
+# set to 'json' to log a json record per stage, or 'table' to also log a
+# summary table when the pipeline finishes
+PROFILE_ENV_VAR = 'DASHBOARD_PROFILE'
+
+logger = logging.getLogger(__name__)
+
+def run_stage(df, func, *args):
+    '''Runs a pipeline stage without instrumentation'''
+    return func(df, *args)
+
+def get_rows(obj):
+    '''Returns the number of rows of a dataframe or series, otherwise None'''
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    return None
+
+def get_memory(obj):
+    '''
+    Returns the memory of a dataframe or series in bytes, otherwise None.
+
+    Strings are counted as pointers, as counting their contents would take
+    longer than most stages.
+    '''
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=False).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=False))
+    return None
+
+def get_stage_name(func, args):
+    '''
+    Returns the function name with any str or function arguments, e.g. the
+    revenue type
+    '''
+    labels = [
+        arg if isinstance(arg, str) else arg.__name__
+        for arg in args
+        if isinstance(arg, str) or callable(arg)
+    ]
+    if labels:
+        return func.__name__ + '(' + ', '.join(labels) + ')'
+    return func.__name__
+
+class StageProfiler:
+    '''
+    Records wall time, cpu time, rows in and out and memory delta of each
+    pipeline stage run through StageProfiler.run, e.g.
+    df.pipe(profiler.run, calculate_family_days).
+
+    Each record is logged as json if log_records is set and kept in records.
+    '''
+    def __init__(self, log_records=True, log_summary=False):
+        self.log_records = log_records
+        self.log_summary = log_summary
+        self.records = []
+
+    def run(self, df, func, *args):
+        '''Runs func(df, *args) and records its stats'''
+        rows_in = get_rows(df)
+        memory_in = get_memory(df)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = func(df, *args)
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        memory_out = get_memory(result)
+
+        record = {
+            'event': 'dashboard_stage',
+            'stage': get_stage_name(func, args),
+            'wall_s': round(wall_time, 6),
+            'cpu_s': round(cpu_time, 6),
+            'rows_in': rows_in,
+            'rows_out': get_rows(result),
+            'memory_delta_bytes': (
+                None if memory_in is None or memory_out is None
+                else memory_out - memory_in
+            ),
+        }
+        self.records.append(record)
+        if self.log_records:
+            logger.info(json.dumps(record))
+        return result
+
+    def format_summary(self):
+        '''Returns a table of the recorded stages with the total time'''
+        lines = [
+            f"{'stage':<60} {'wall ms':>9} {'cpu ms':>9} {'rows in':>10}"
+            f" {'rows out':>10} {'mem delta MB':>13}"
+        ]
+        for record in self.records:
+            memory_delta = record['memory_delta_bytes']
+            lines.append(
+                f"{record['stage']:<60} {record['wall_s'] * 1000:>9.1f}"
+                f" {record['cpu_s'] * 1000:>9.1f}"
+                f" {'' if record['rows_in'] is None else record['rows_in']:>10}"
+                f" {'' if record['rows_out'] is None else record['rows_out']:>10}"
+                # adding 0.0 turns a rounded -0.0 into 0.0
+                f" {'' if memory_delta is None else round(memory_delta / 1024 ** 2, 2) + 0.0:>13}"
+            )
+        lines.append(
+            f"{'total':<60} {sum(r['wall_s'] for r in self.records) * 1000:>9.1f}"
+            f" {sum(r['cpu_s'] for r in self.records) * 1000:>9.1f}"
+        )
+        return '\n'.join(lines)
+
+    def finish(self):
+        '''Logs the summary table if log_summary is set'''
+        if self.log_summary:
+            logger.info('\n' + self.format_summary())
+
+def get_env_profiler():
+    '''
+    Returns a profiler if enabled by the DASHBOARD_PROFILE env var, otherwise
+    None. Records are logged to stderr unless logging is already configured.
+    '''
+    mode = os.environ.get(PROFILE_ENV_VAR, '').lower()
+    if mode not in ['json', 'table', '1', 'true']:
+        return None
+    if not logger.handlers and not logging.getLogger().handlers:
+        logger.addHandler(logging.StreamHandler(sys.stderr))
+    if logger.getEffectiveLevel() > logging.INFO:
+        logger.setLevel(logging.INFO)
+    return StageProfiler(log_summary=(mode == 'table'))
@@ -1,3 +1,7 @@
+import math
+import operator
+import re
+
 import numpy as np
 import pandas as pd
 
@@ -7,20 +11,45 @@ from dash_table.Format import Format
 import dash_table.FormatTemplate as FormatTemplate
 import plotly.graph_objects as go
 
+# constants
+# rows of the child level table sent to the browser per request
+PAGE_SIZE = 50
+# a part of a table filter query, e.g. {attendance_rate} >= 0.5
+FILTER_PART_PATTERN = re.compile(
+    r'\{(?P<col>[^}]+)\}\s*'
+    r'(?P<operator>>=|<=|!=|<|>|=|(?:eq|ne|lt|le|gt|ge|contains|datestartswith)\b)'
+    r'\s*(?P<value>.*)'
+)
+FILTER_OPERATORS = {
+    'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=',
+}
+COMPARISONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
 # attendance summary
-def make_attendance_table(df):
+def make_attendance_table(summary):
+    '''
+    Returns the attendance summary table from the summary aggregates of the
+    dashboard data, as returned by data_input.summarize_dashboard_data
+    '''
+    category_counts = summary['category_counts']
     # check if not enough info
-    if df.loc[0, 'attendance_category'] == 'Not enough info':
+    if category_counts['Not enough info'] > 0 or summary['eligible_count'] == 0:
         sure_bet_count, at_risk_count, not_met_count, on_track_count = [None] * 4
         sure_bet_pct, at_risk_pct, not_met_pct, on_track_pct = [None] * 4
     else:
         # count children in attendance category
-        # using shape[0] to count rows and return an int
-        sure_bet_count = df[df['attendance_category'] == 'Sure bet'].shape[0]
-        at_risk_count = df[df['attendance_category'] == 'At risk'].shape[0]
-        not_met_count = df[df['attendance_category'] == 'Not met'].shape[0]
-        on_track_count = df[df['attendance_category'] == 'On track'].shape[0]
-        total_count = df.loc[df['attendance_category'] != 'Case expired'].shape[0]
+        sure_bet_count = category_counts['Sure bet']
+        at_risk_count = category_counts['At risk']
+        not_met_count = category_counts['Not met']
+        on_track_count = category_counts['On track']
+        total_count = summary['eligible_count']
 
         # calculate percentage of children in each category
         sure_bet_pct = sure_bet_count / total_count
@@ -119,12 +148,16 @@ def make_attendance_table(df):
     return table
 
 # revenue barchart
-def make_revenue_chart(df):
-    # sum up revenues
-    min_revenue_sum = df['min_revenue'].sum()
-    potential_revenue_sum = df['potential_revenue'].sum()
-    max_approved_revenue_sum = df['max_revenue'].sum()
-    potential_e_learning_revenue_sum = df['e_learning_revenue_potential'].sum()
+def make_revenue_chart(summary):
+    '''
+    Returns the revenue chart from the summary aggregates of the dashboard
+    data, as returned by data_input.summarize_dashboard_data
+    '''
+    revenue_totals = summary['revenue_totals']
+    min_revenue_sum = revenue_totals['min_revenue']
+    potential_revenue_sum = revenue_totals['potential_revenue']
+    max_approved_revenue_sum = revenue_totals['max_revenue']
+    potential_e_learning_revenue_sum = revenue_totals['e_learning_revenue_potential']
 
     min_potential_delta = potential_revenue_sum - min_revenue_sum
     potential_max_delta = max_approved_revenue_sum - potential_revenue_sum
@@ -208,10 +241,110 @@ def make_revenue_chart(df):
 
 
 # child level table
-def make_table(df):
+def split_filter_part(filter_part):
+    '''
+    Splits a part of a table filter query, e.g. {name} contains "Jan", into
+    its column, operator and value. Quoted values are strings, others are
+    numbers if they can be parsed as one.
+
+    Returns a tuple of column, operator and value, or None if the part can't
+    be parsed
+    '''
+    match = FILTER_PART_PATTERN.fullmatch(filter_part.strip())
+    if match is None:
+        return None
+    comparison = FILTER_OPERATORS.get(match['operator'], match['operator'])
+    value = match['value'].strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in '"\'`':
+        value = value[1:-1].replace('\\' + value[0], value[0])
+    else:
+        try:
+            value = float(value)
+        except ValueError:
+            pass
+    return match['col'], comparison, value
+
+def filter_table(df, filter_query):
+    '''
+    Returns the rows of df matching a table filter query, the parts of which
+    are joined by &&. Parts on unknown columns or that can't be parsed are
+    ignored, and comparisons between numbers and text match no rows.
+    '''
+    if not filter_query:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for filter_part in filter_query.split(' && '):
+        parsed = split_filter_part(filter_part)
+        if parsed is None or parsed[0] not in df.columns:
+            continue
+        col, comparison, value = parsed
+        if comparison in ['contains', 'datestartswith']:
+            text = df[col].astype(str).where(df[col].notna())
+            if comparison == 'contains':
+                matches = text.str.contains(str(value), regex=False)
+            else:
+                matches = text.str.startswith(str(value))
+            mask &= matches.fillna(False).to_numpy(dtype=bool)
+            continue
+        values = df[col]
+        if pd.api.types.is_categorical_dtype(values):
+            values = values.astype(object)
+        try:
+            matches = COMPARISONS[comparison](values, value)
+        except TypeError:
+            matches = np.zeros(len(df), dtype=bool)
+        mask &= np.asarray(matches, dtype=bool)
+    return df.loc[mask]
+
+def sort_table(df, sort_by):
+    '''
+    Returns df sorted by the columns of a table sort_by list, e.g.
+    [{'column_id': 'name', 'direction': 'asc'}]. Categories are sorted as
+    text, as the table would, and missing values come last.
+    '''
+    sort_by = [
+        sort_col for sort_col in sort_by or [] if sort_col['column_id'] in df.columns
+    ]
+    if not sort_by:
+        return df
+    sort_cols = [sort_col['column_id'] for sort_col in sort_by]
+    sort_values = pd.DataFrame(
+        {
+            col: df[col].astype(object)
+            if pd.api.types.is_categorical_dtype(df[col]) else df[col]
+            for col in sort_cols
+        }
+    ).reset_index(drop=True)
+    order = sort_values.sort_values(
+        sort_cols,
+        ascending=[sort_col['direction'] == 'asc' for sort_col in sort_by],
+        kind='mergesort',
+        na_position='last'
+    ).index
+    return df.iloc[order]
+
+def get_table_page(df, page_current=0, page_size=PAGE_SIZE, sort_by=None,
+                   filter_query=''):
+    '''
+    Filters and sorts df as requested by the child level table and slices the
+    current page, so only one page of rows is sent to the browser.
+
+    Returns a tuple of the page as records and the number of pages
+    '''
+    df = sort_table(filter_table(df, filter_query), sort_by)
+    page_count = max(math.ceil(len(df) / page_size), 1)
+    start = (page_current or 0) * page_size
+    return df.iloc[start:start + page_size].to_dict('records'), page_count
+
+def make_table(df, page_size=PAGE_SIZE):
+    '''
+    Returns the child level table with the first page of df. Other pages,
+    sorting and filtering are served by a callback calling get_table_page.
+    '''
+    data, page_count = get_table_page(df, page_size=page_size)
     table = dash_table.DataTable(
         id='child_level',
-        data=df.to_dict('records'),
+        data=data,
         columns=[
             {
                 'id': 'name',
@@ -333,16 +466,26 @@ def make_table(df):
             'padding': '20px',
             'overflowX': 'auto',
         },
-        sort_action='native',
+        page_action='custom',
+        page_current=0,
+        page_size=page_size,
+        page_count=page_count,
+        sort_action='custom',
         sort_mode='single',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
     )
     return table
 
 if __name__ == '__main__':
     from data_input import get_dashboard_data
-    df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings = get_dashboard_data()
+    (
+        df_dashboard, latest_date, is_data_insufficient, days_req_for_warnings,
+        summary
+    ) = get_dashboard_data()
 
-    # fig = make_revenue_chart(df_dashboard)
+    # fig = make_revenue_chart(summary)
     # fig.show()
 
-    make_attendance_table(df_dashboard)
+    make_attendance_table(summary)
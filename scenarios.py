@@ -0,0 +1,229 @@
+'''
+What-if scenarios for the dashboard: other attendance thresholds and more
+days attended over the rest of the month.
+
+Every scenario is evaluated in one pass over (scenario x child) arrays, from
+the eligible children as processed once by the dashboard stages.
+'''
+import numpy as np
+import pandas as pd
+
+from data_input import (
+    ATTENDANCE_CATEGORIES,
+    ATTENDANCE_CATEGORY_DTYPE,
+    ATTENDANCE_THRESHOLD,
+    TENANT_COL,
+    add_family_codes,
+    adjust_and_cap_days,
+    apply_copay,
+    broadcast_tenant_values,
+    calculate_days_in_month_from_date,
+    calculate_min_days,
+    calculate_min_paid,
+    calculate_potential_days,
+    classify_attendance_risk,
+    count_days_attended,
+    get_clean_attendance_data,
+    get_family_codes,
+    get_input_paths,
+    get_payment_data,
+    split_eligible_children,
+    sum_by_family
+)
+from input_cache import load_with_cache
+
+# constants
+SCENARIO_COLS = ['threshold', 'extra_days']
+# child columns repeated for each scenario in the results
+CHILD_COLS = ['child_id', 'name', 'case_number', 'biz_name']
+
+def make_scenarios(thresholds=(ATTENDANCE_THRESHOLD,), extra_days=(0,)):
+    '''
+    Returns a dataframe with a row per combination of attendance threshold
+    and extra days attended by each child for the rest of the month.
+    '''
+    index = pd.MultiIndex.from_product(
+        [list(thresholds), list(extra_days)], names=SCENARIO_COLS
+    )
+    return index.to_frame(index=False)
+
+def get_scenario_roster(attendance_processed, payment):
+    '''
+    Runs the dashboard stages the scenarios have in common on days attended
+    per child, as returned by count_days_attended, and payment data.
+
+    Returns the eligible children with adjusted and capped days
+    '''
+    eligible, _ = split_eligible_children(attendance_processed, payment)
+    return (
+        eligible.pipe(adjust_and_cap_days)
+                .pipe(add_family_codes)
+    )
+
+def project_days_attended(roster, extra_days, days_left_):
+    '''
+    Adds extra_days (array with a row per scenario) to the days attended of
+    each child, at most the days left in the month. Extra days are attended
+    as full days while full days approved remain, then as part days, and
+    days over the days approved are not paid so they are not counted.
+
+    Returns a tuple of full days attended, part days attended and days left
+    in the month, as (scenario x child) arrays
+    '''
+    full_days_attended = roster['full_days_attended'].to_numpy()
+    part_days_attended = roster['part_days_attended'].to_numpy()
+    remaining_full_days = np.maximum(
+        roster['adj_full_days_approved'].to_numpy() - full_days_attended, 0
+    )
+    remaining_part_days = np.maximum(
+        roster['adj_part_days_approved'].to_numpy() - part_days_attended, 0
+    )
+
+    extra_days = np.minimum(extra_days, days_left_)
+    extra_full_days = np.minimum(extra_days, remaining_full_days)
+    extra_part_days = np.minimum(extra_days - extra_full_days, remaining_part_days)
+    return (
+        full_days_attended + extra_full_days,
+        part_days_attended + extra_part_days,
+        days_left_ - extra_days
+    )
+
+def calculate_revenue(roster, family_codes, full_days, part_days,
+                      full_paid=True, part_paid=True):
+    '''
+    Calculates revenue per child after copay from (scenario x child) arrays
+    of full and part days paid. Where full_paid or part_paid (bool arrays) is
+    False the day type adds 0, as in data_input.apply_rate_matrix.
+
+    Returns a (scenario x child) array of revenue
+    '''
+    def apply_rates(rate_type):
+        return (
+            np.where(full_paid, full_days * roster['full_day_' + rate_type].to_numpy(), 0)
+            + np.where(part_paid, part_days * roster['part_day_' + rate_type].to_numpy(), 0)
+        )
+
+    revenue_before_copay = apply_rates('rate')
+    quality_add_on = apply_rates('quality_add_on')
+    return apply_copay(
+        revenue_before_copay,
+        quality_add_on,
+        sum_by_family(family_codes, revenue_before_copay),
+        roster['family_copay'].to_numpy(),
+        roster['copay_per_child'].to_numpy()
+    )
+
+def evaluate_scenarios(roster, scenarios, days_in_month, days_left):
+    '''
+    Evaluates scenarios (as returned by make_scenarios) for the children of
+    roster (as returned by get_scenario_roster).
+
+    days_in_month and days_left are numbers, or series indexed by tenant for
+    multi-tenant data.
+
+    Returns a tidy dataframe with a row per scenario and child, with the
+    scenario, child, attendance category, family attendance rate, and min and
+    potential revenue columns
+    '''
+    num_scenarios = len(scenarios)
+    num_children = len(roster)
+    days_in_month = broadcast_tenant_values(roster, days_in_month)
+    days_left = broadcast_tenant_values(roster, days_left)
+    # scenario values as columns, so they broadcast against child values
+    thresholds = scenarios['threshold'].to_numpy(dtype=float)[:, np.newaxis]
+    extra_days = scenarios['extra_days'].to_numpy()[:, np.newaxis]
+
+    family_codes = get_family_codes(roster)
+    full_days_attended, part_days_attended, days_left = project_days_attended(
+        roster, extra_days, days_left
+    )
+    days = {
+        'adj_full_days_approved': roster['adj_full_days_approved'].to_numpy(),
+        'adj_part_days_approved': roster['adj_part_days_approved'].to_numpy(),
+        'full_days_attended': full_days_attended,
+        'part_days_attended': part_days_attended,
+        'family_total_days_approved': sum_by_family(
+            family_codes,
+            roster['adj_full_days_approved'].to_numpy()
+            + roster['adj_part_days_approved'].to_numpy()
+        ),
+        'family_total_days_attended': sum_by_family(
+            family_codes, full_days_attended + part_days_attended
+        ),
+    }
+    num_children_in_family = sum_by_family(
+        family_codes, roster['child_id'].notna()
+    )
+
+    codes = classify_attendance_risk(
+        days,
+        num_children_in_family,
+        (days_in_month - days_left) / days_in_month,
+        days_left,
+        thresholds
+    )
+    not_met = codes == ATTENDANCE_CATEGORIES.index('Not met')
+    min_revenue = calculate_revenue(
+        roster, family_codes,
+        *calculate_min_days(days, thresholds),
+        *calculate_min_paid(days, thresholds)
+    )
+    potential_revenue = calculate_revenue(
+        roster, family_codes, *calculate_potential_days(days, days_left, not_met)
+    )
+    attendance_rate = (
+        days['family_total_days_attended'] / days['family_total_days_approved']
+    )
+
+    child_cols = [
+        col for col in [TENANT_COL] + CHILD_COLS if col in roster.columns
+    ]
+    results = (
+        scenarios.take(np.repeat(np.arange(num_scenarios), num_children))
+                 .reset_index(drop=True)
+    )
+    children = roster[child_cols].take(np.tile(np.arange(num_children), num_scenarios))
+    for col in child_cols:
+        results[col] = children[col].to_numpy()
+    results['attendance_category'] = pd.Categorical.from_codes(
+        codes.ravel(), dtype=ATTENDANCE_CATEGORY_DTYPE
+    )
+    results['attendance_rate'] = np.broadcast_to(
+        attendance_rate, codes.shape
+    ).ravel()
+    results['min_revenue'] = min_revenue.ravel()
+    results['potential_revenue'] = potential_revenue.ravel()
+    return results
+
+def summarize_scenarios(results):
+    '''
+    Returns a dataframe with a row per scenario with the number of children
+    in each attendance category and the total min and potential revenue.
+    '''
+    scenarios = results.groupby(SCENARIO_COLS, sort=False)
+    summary = pd.crosstab(
+        [results[col] for col in SCENARIO_COLS], results['attendance_category']
+    ).reindex(columns=ATTENDANCE_CATEGORIES[:-1], fill_value=0)
+    summary.columns = summary.columns.astype(str)
+    summary.columns.name = None
+    summary['min_revenue'] = scenarios['min_revenue'].sum()
+    summary['potential_revenue'] = scenarios['potential_revenue'].sum()
+    return summary.reset_index()
+
+def get_scenario_data(thresholds=(ATTENDANCE_THRESHOLD,), extra_days=(0,),
+                      attendance_path=None, payment_path=None):
+    '''
+    Returns the scenario results of evaluate_scenarios for every combination
+    of thresholds and extra_days, from the dashboard input files.
+    '''
+    if attendance_path is None or payment_path is None:
+        attendance_path, payment_path = get_input_paths()
+    attendance_clean = load_with_cache(attendance_path, get_clean_attendance_data)
+    payment = load_with_cache(payment_path, get_payment_data)
+    days_in_month, days_left = calculate_days_in_month_from_date(
+        attendance_clean['check_out_date'].max()
+    )
+    roster = get_scenario_roster(count_days_attended(attendance_clean), payment)
+    return evaluate_scenarios(
+        roster, make_scenarios(thresholds, extra_days), days_in_month, days_left
+    )
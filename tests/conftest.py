@@ -0,0 +1,50 @@
+import importlib
+import sys
+
+import pytest
+
+import csv_backends
+from data_input import DATA_PATH
+
+ATTENDANCE_FILE = 'Attendance-Calculation-Sep-2020.csv'
+PAYMENT_FILE = 'Sample-Billing-Reconciliation-Sep-2020.csv'
+
+@pytest.fixture
+def tenant_data_path(tmp_path):
+    '''Builds a data directory with two tenants based on the user1 sample data'''
+    source_path = DATA_PATH.joinpath('user1')
+    attendance_lines = source_path.joinpath(ATTENDANCE_FILE).read_text().splitlines()
+    for tenant, lines in [
+        ('user1', attendance_lines),
+        # same children and case numbers, fewer days of attendance
+        ('user2', [line for line in attendance_lines if '09/1' not in line]),
+    ]:
+        tenant_path = tmp_path.joinpath(tenant)
+        tenant_path.mkdir()
+        tenant_path.joinpath(ATTENDANCE_FILE).write_text('\n'.join(lines))
+        tenant_path.joinpath(PAYMENT_FILE).write_text(
+            source_path.joinpath(PAYMENT_FILE).read_text()
+        )
+    # tenants without both files are skipped
+    tmp_path.joinpath('user3').mkdir()
+    return tmp_path
+
+@pytest.fixture
+def input_paths(tenant_data_path):
+    '''Returns the attendance and payment file paths of the user1 tenant'''
+    return (
+        tenant_data_path.joinpath('user1', ATTENDANCE_FILE),
+        tenant_data_path.joinpath('user1', PAYMENT_FILE),
+    )
+
+@pytest.fixture
+def without_pyarrow(monkeypatch):
+    '''Makes pyarrow unimportable, as if it was not installed'''
+    for name in [name for name in sys.modules if name.split('.')[0] == 'pyarrow']:
+        monkeypatch.setitem(sys.modules, name, None)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    # csv_backends picks its default backend on import
+    importlib.reload(csv_backends)
+    yield
+    monkeypatch.undo()
+    importlib.reload(csv_backends)
@@ -0,0 +1,178 @@
+from pandas.testing import assert_frame_equal
+import pytest
+
+import attendance_aggregates
+from attendance_aggregates import (
+    get_incremental_dashboard_data,
+    get_streamed_dashboard_data,
+    stream_attendance_aggregates,
+    update_attendance_aggregates,
+)
+from data_input import (
+    clean_attendance_data,
+    count_days_attended,
+    generate_child_id,
+    get_attendance_data,
+    get_dashboard_data,
+)
+from tests.conftest import ATTENDANCE_FILE, PAYMENT_FILE
+
+def count_all_days_attended(attendance_path):
+    attendance_clean = (
+        get_attendance_data(attendance_path)
+            .pipe(clean_attendance_data)
+            .pipe(generate_child_id)
+    )
+    return (
+        count_days_attended(attendance_clean),
+        attendance_clean['check_out_date'].max()
+    )
+
+class TestUpdateAttendanceAggregates:
+    @pytest.fixture
+    def attendance_lines(self, tenant_data_path):
+        return (
+            tenant_data_path.joinpath('user1', ATTENDANCE_FILE)
+                            .read_text()
+                            .splitlines(keepends=True)
+        )
+
+    @pytest.fixture
+    def parsed_rows(self, monkeypatch):
+        # record number of rows parsed on each update
+        parsed_rows = []
+        get_attendance_data_ = attendance_aggregates.get_attendance_data
+
+        def recording_get_attendance_data(filepath):
+            attendance = get_attendance_data_(filepath)
+            parsed_rows.append(len(attendance))
+            return attendance
+
+        monkeypatch.setattr(
+            attendance_aggregates, 'get_attendance_data', recording_get_attendance_data
+        )
+        return parsed_rows
+
+    def test_appended_rows(self, tmp_path, attendance_lines, parsed_rows):
+        attendance_path = tmp_path.joinpath(ATTENDANCE_FILE)
+        state_path = tmp_path.joinpath('state.json')
+        attendance_path.write_text(''.join(attendance_lines[:10]))
+        update_attendance_aggregates(attendance_path, state_path)
+
+        with open(attendance_path, 'a') as f:
+            f.write(''.join(attendance_lines[10:]))
+        days_attended, max_check_out_date = update_attendance_aggregates(
+            attendance_path, state_path
+        )
+
+        expected_days_attended, expected_max_date = count_all_days_attended(
+            attendance_path
+        )
+        assert_frame_equal(days_attended, expected_days_attended)
+        assert max_check_out_date == expected_max_date
+        # the last row has no line break, so it is parsed on its own
+        assert parsed_rows == [9, len(attendance_lines) - 11, 1]
+
+    def test_row_appended_in_two_writes(self, tmp_path, attendance_lines, parsed_rows):
+        attendance_path = tmp_path.joinpath(ATTENDANCE_FILE)
+        state_path = tmp_path.joinpath('state.json')
+        attendance_path.write_text(''.join(attendance_lines[:10]))
+        update_attendance_aggregates(attendance_path, state_path)
+        expected = count_all_days_attended(attendance_path)
+
+        with open(attendance_path, 'a') as f:
+            f.write(attendance_lines[10][:20])
+        days_attended, max_check_out_date = update_attendance_aggregates(
+            attendance_path, state_path
+        )
+        assert_frame_equal(days_attended, expected[0])
+        assert max_check_out_date == expected[1]
+
+        with open(attendance_path, 'a') as f:
+            f.write(attendance_lines[10][20:])
+        days_attended, max_check_out_date = update_attendance_aggregates(
+            attendance_path, state_path
+        )
+        expected_days_attended, expected_max_date = count_all_days_attended(
+            attendance_path
+        )
+        assert_frame_equal(days_attended, expected_days_attended)
+        assert max_check_out_date == expected_max_date
+        assert parsed_rows == [9, 1]
+
+    def test_unchanged_file_parses_nothing(self, tmp_path, attendance_lines, parsed_rows):
+        attendance_path = tmp_path.joinpath(ATTENDANCE_FILE)
+        state_path = tmp_path.joinpath('state.json')
+        attendance_path.write_text(''.join(attendance_lines) + '\n')
+        first = update_attendance_aggregates(attendance_path, state_path)
+        second = update_attendance_aggregates(attendance_path, state_path)
+        assert_frame_equal(first[0], second[0])
+        assert first[1] == second[1]
+        assert len(parsed_rows) == 1
+
+    def test_rewritten_file_rebuilds(self, tmp_path, attendance_lines):
+        attendance_path = tmp_path.joinpath(ATTENDANCE_FILE)
+        state_path = tmp_path.joinpath('state.json')
+        attendance_path.write_text(''.join(attendance_lines))
+        update_attendance_aggregates(attendance_path, state_path)
+
+        attendance_path.write_text(
+            ''.join(attendance_lines[:1] + attendance_lines[5:])
+        )
+        days_attended, _ = update_attendance_aggregates(attendance_path, state_path)
+        expected_days_attended, _ = count_all_days_attended(attendance_path)
+        assert_frame_equal(days_attended, expected_days_attended)
+
+def test_get_incremental_dashboard_data(tenant_data_path, tmp_path):
+    attendance_path = tenant_data_path.joinpath('user1', ATTENDANCE_FILE)
+    payment_path = tenant_data_path.joinpath('user1', PAYMENT_FILE)
+    df_dashboard, *summary = get_incremental_dashboard_data(
+        attendance_path, payment_path, tmp_path.joinpath('state.json')
+    )
+    expected_df, *expected_summary = get_dashboard_data(attendance_path, payment_path)
+    assert summary == expected_summary
+    assert_frame_equal(df_dashboard, expected_df)
+
+class TestStreamAttendanceAggregates:
+    @pytest.fixture
+    def attendance_path(self, tenant_data_path):
+        return tenant_data_path.joinpath('user1', ATTENDANCE_FILE)
+
+    @pytest.mark.parametrize('chunksize', [1, 7, 1000])
+    def test_matches_whole_file(self, attendance_path, chunksize):
+        days_attended, max_check_out_date = stream_attendance_aggregates(
+            attendance_path, chunksize
+        )
+        expected_days_attended, expected_max_date = count_all_days_attended(
+            attendance_path
+        )
+        assert_frame_equal(days_attended, expected_days_attended)
+        assert max_check_out_date == expected_max_date
+
+    def test_month_filter(self, tmp_path, attendance_path):
+        expected = count_all_days_attended(attendance_path)
+        # same attendance repeated in october
+        lines = attendance_path.read_text().splitlines()
+        year_path = tmp_path.joinpath(ATTENDANCE_FILE)
+        year_path.write_text(
+            '\n'.join(lines + [line.replace('09/', '10/') for line in lines[1:]])
+        )
+
+        days_attended, max_check_out_date = stream_attendance_aggregates(
+            year_path, 10, month='2020-09'
+        )
+        assert_frame_equal(days_attended, expected[0])
+        assert max_check_out_date == expected[1]
+
+        days_attended, _ = stream_attendance_aggregates(year_path, 10)
+        assert_frame_equal(days_attended, 2 * expected[0])
+
+def test_get_streamed_dashboard_data(tenant_data_path):
+    attendance_path = tenant_data_path.joinpath('user1', ATTENDANCE_FILE)
+    payment_path = tenant_data_path.joinpath('user1', PAYMENT_FILE)
+    df_dashboard, *summary = get_streamed_dashboard_data(
+        attendance_path, payment_path, chunksize=5
+    )
+    expected_df, *expected_summary = get_dashboard_data(attendance_path, payment_path)
+    assert summary == expected_summary
+    assert_frame_equal(df_dashboard, expected_df)
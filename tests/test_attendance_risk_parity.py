@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_input import (
+    ATTENDANCE_THRESHOLD,
+    categorize_family_attendance_risk,
+)
+
+# row-wise reference implementation the vectorized classifier must reproduce
+def rowwise_category(row, days_in_month, days_left):
+    days_elapsed = days_in_month - days_left
+    if days_elapsed / days_in_month < 0.5:
+        return 'Not enough info'
+    if (
+        row['family_total_days_attended'] / row['family_total_days_approved']
+        >= ATTENDANCE_THRESHOLD
+        and (
+            (
+                row['adj_full_days_approved'] > 0
+                and row['full_days_attended'] > 0
+                and row['adj_part_days_approved'] == 0
+            )
+            or (
+                row['adj_part_days_approved'] > 0
+                and row['part_days_attended'] > 0
+                and row['adj_full_days_approved'] == 0
+            )
+            or (
+                row['adj_full_days_approved'] > 0
+                and row['adj_part_days_approved'] > 0
+                and row['full_days_attended'] > 0
+                and row['part_days_attended'] > 0
+            )
+        )
+    ):
+        return 'Sure bet'
+    if (
+        ATTENDANCE_THRESHOLD * row['family_total_days_approved']
+        - row['family_total_days_attended']
+        > row['num_children_in_family'] * days_left
+    ):
+        return 'Not met'
+    if (
+        row['family_total_days_attended']
+        / ((days_elapsed / days_in_month) * row['family_total_days_approved'])
+        < ATTENDANCE_THRESHOLD
+    ):
+        return 'At risk'
+    return 'On track'
+
+def make_random_children(rng, cases=6):
+    '''Generates 1-12 (case, days...) tuples of up to 23 days each'''
+    num_children = rng.integers(1, 13)
+    return [
+        (rng.integers(0, cases), *rng.integers(0, 24, 4))
+        for _ in range(num_children)
+    ]
+
+def make_random_month(rng):
+    '''Generates days in month and days left, at least one day elapsed'''
+    days_in_month = rng.integers(28, 32)
+    return days_in_month, rng.integers(0, days_in_month)
+
+def make_roster(children):
+    '''Builds a roster with family totals from (case, days...) tuples'''
+    df = pd.DataFrame(
+        children,
+        columns=[
+            'case_number',
+            'adj_full_days_approved',
+            'adj_part_days_approved',
+            'full_days_attended',
+            'part_days_attended',
+        ]
+    )
+    df.insert(0, 'child_id', ['child' + str(i) for i in range(len(df))])
+    family = df.groupby('case_number')
+    df['family_total_days_approved'] = (
+        family['adj_full_days_approved'].transform(np.sum)
+        + family['adj_part_days_approved'].transform(np.sum)
+    )
+    df['family_total_days_attended'] = (
+        family['full_days_attended'].transform(np.sum)
+        + family['part_days_attended'].transform(np.sum)
+    )
+    return df
+
+def expected_categories(df, days_in_month, days_left):
+    # numeric rows, so zero days approved divide like numpy floats
+    reference = df.drop(columns=['child_id', 'case_number']).astype(float).assign(
+        num_children_in_family=df.groupby('case_number')['child_id'].transform('count')
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return reference.apply(
+            rowwise_category, args=[days_in_month, days_left], axis=1
+        ).tolist()
+
+@pytest.mark.parametrize('seed', range(100))
+def test_matches_rowwise(seed):
+    rng = np.random.default_rng(seed)
+    days_in_month, days_left = make_random_month(rng)
+    df = make_roster(make_random_children(rng))
+    expected = expected_categories(df, days_in_month, days_left)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = categorize_family_attendance_risk(df, days_in_month, days_left)
+    assert result['attendance_category'].dtype == 'category'
+    assert result['attendance_category'].tolist() == expected
+
+@pytest.mark.parametrize('seed', range(50))
+def test_matches_rowwise_per_tenant(seed):
+    rng = np.random.default_rng(seed)
+    months = {'x': make_random_month(rng), 'y': make_random_month(rng)}
+    children = make_random_children(rng)
+    tenants = rng.choice(['x', 'y'], len(children)).tolist()
+    # case numbers are scoped to the tenant
+    df = make_roster(
+        [(tenant + str(case), *days) for tenant, (case, *days) in zip(tenants, children)]
+    )
+    expected_by_tenant = {
+        tenant: expected_categories(df, *tenant_month)
+        for tenant, tenant_month in months.items()
+    }
+    expected = [
+        expected_by_tenant[tenant][i] for i, tenant in enumerate(tenants)
+    ]
+    days_in_month = np.array([months[tenant][0] for tenant in tenants])
+    days_left = np.array([months[tenant][1] for tenant in tenants])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = categorize_family_attendance_risk(df, days_in_month, days_left)
+    assert result['attendance_category'].tolist() == expected
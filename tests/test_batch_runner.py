@@ -0,0 +1,42 @@
+from pandas.testing import assert_frame_equal
+
+from tests.conftest import ATTENDANCE_FILE, PAYMENT_FILE
+from batch_runner import run_tenant_dashboards
+from data_input import get_dashboard_data
+
+def test_run_tenant_dashboards(tenant_data_path):
+    # tenant with different copay amounts within a family
+    invalid_path = tenant_data_path.joinpath('user4')
+    invalid_path.mkdir()
+    invalid_path.joinpath(ATTENDANCE_FILE).write_text(
+        tenant_data_path.joinpath('user1', ATTENDANCE_FILE).read_text()
+    )
+    payment_lines = (
+        tenant_data_path.joinpath('user1', PAYMENT_FILE).read_text().splitlines()
+    )
+    payment_lines.append(
+        payment_lines[2].replace('Shirley', 'Anita').replace('29.00', '30.00')
+    )
+    invalid_path.joinpath(PAYMENT_FILE).write_text('\n'.join(payment_lines))
+
+    results = {
+        tenant: (result, error)
+        for tenant, result, error in run_tenant_dashboards(
+            tenant_data_path, ATTENDANCE_FILE, PAYMENT_FILE,
+            max_workers=2, max_in_flight=1
+        )
+    }
+
+    assert sorted(results) == ['user1', 'user2', 'user4']
+    result, error = results['user4']
+    assert result is None
+    assert isinstance(error, ValueError)
+    for tenant in ['user1', 'user2']:
+        (df_dashboard, *summary), error = results[tenant]
+        expected_df, *expected_summary = get_dashboard_data(
+            tenant_data_path.joinpath(tenant, ATTENDANCE_FILE),
+            tenant_data_path.joinpath(tenant, PAYMENT_FILE),
+        )
+        assert error is None
+        assert summary == expected_summary
+        assert_frame_equal(df_dashboard, expected_df)
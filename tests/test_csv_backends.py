@@ -0,0 +1,69 @@
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+import pytest
+
+import csv_backends
+from csv_backends import BACKENDS, PANDAS, read_csv
+from data_input import DATA_PATH, get_attendance_data, get_payment_data
+from tests.conftest import ATTENDANCE_FILE, PAYMENT_FILE
+
+@pytest.mark.parametrize('backend', BACKENDS)
+class TestReadCsv:
+    def test_matches_pandas(self, backend):
+        example_csv = (
+            'b,a,c,d\n'
+            'x,1,unused,\n'
+            'z,,unused,text\n'
+            'x,2.5,unused,more text\n'
+            ',3,unused,\n'
+        )
+        result = read_csv(
+            StringIO(example_csv),
+            usecols=['a', 'b', 'd'],
+            dtype={'a': np.float_, 'b': 'category', 'd': str},
+            backend=backend
+        )
+        expected = pd.DataFrame(
+            {
+                'a': [1., np.nan, 2.5, 3.],
+                'b': pd.Categorical(['x', 'z', 'x', np.nan]),
+                'd': [np.nan, 'text', 'more text', np.nan],
+            }
+        )
+        assert_frame_equal(result, expected)
+
+    def test_skiprows(self, backend):
+        result = read_csv(
+            StringIO('title,,\na,b\n1,2\n'),
+            usecols=['b'],
+            dtype={'b': np.float_},
+            skiprows=1,
+            backend=backend
+        )
+        assert_frame_equal(result, pd.DataFrame({'b': [2.]}))
+
+    def test_loaders_match_pandas(self, backend):
+        user_path = DATA_PATH.joinpath('user1')
+        assert_frame_equal(
+            get_attendance_data(user_path.joinpath(ATTENDANCE_FILE), backend),
+            get_attendance_data(user_path.joinpath(ATTENDANCE_FILE), 'pandas')
+        )
+        assert_frame_equal(
+            get_payment_data(user_path.joinpath(PAYMENT_FILE), backend),
+            get_payment_data(user_path.joinpath(PAYMENT_FILE), 'pandas')
+        )
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        read_csv(StringIO('a\n1\n'), ['a'], {'a': np.float_}, backend='polars')
+
+def test_falls_back_to_pandas_without_pyarrow(without_pyarrow):
+    assert csv_backends.DEFAULT_BACKEND == PANDAS
+    attendance_path = DATA_PATH.joinpath('user1', ATTENDANCE_FILE)
+    assert_frame_equal(
+        get_attendance_data(attendance_path, 'pyarrow'),
+        get_attendance_data(attendance_path, 'pandas')
+    )
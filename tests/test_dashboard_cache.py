@@ -0,0 +1,143 @@
+from pandas.testing import assert_frame_equal
+import pytest
+
+import dashboard_cache
+from dashboard_cache import DashboardCache, get_cached_dashboard_data
+
+@pytest.fixture
+def dashboard_calls(monkeypatch):
+    # count calls to the uncached pipeline
+    calls = []
+    get_dashboard_data = dashboard_cache.get_dashboard_data
+
+    def counting_get_dashboard_data(*args):
+        calls.append(args)
+        return get_dashboard_data(*args)
+
+    monkeypatch.setattr(
+        dashboard_cache, 'get_dashboard_data', counting_get_dashboard_data
+    )
+    return calls
+
+class TestGetCachedDashboardData:
+    def test_memory_and_disk_hits(self, tmp_path, input_paths, dashboard_calls):
+        cache = DashboardCache(tmp_path.joinpath('cache'))
+        expected = get_cached_dashboard_data(*input_paths, cache=cache)
+        assert get_cached_dashboard_data(*input_paths, cache=cache) is expected
+        assert len(dashboard_calls) == 1
+
+        # a new process reads the disk tier
+        other_cache = DashboardCache(tmp_path.joinpath('cache'))
+        df_dashboard, *summary = get_cached_dashboard_data(
+            *input_paths, cache=other_cache
+        )
+        assert len(dashboard_calls) == 1
+        assert summary == list(expected[1:])
+        assert_frame_equal(df_dashboard, expected[0])
+
+    def test_changed_input_recomputes(self, tmp_path, input_paths, dashboard_calls):
+        cache = DashboardCache(tmp_path.joinpath('cache'))
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        attendance_path = input_paths[0]
+        attendance_path.write_text(
+            '\n'.join(attendance_path.read_text().splitlines()[:-5])
+        )
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        assert len(dashboard_calls) == 2
+
+    def test_changed_threshold_recomputes(
+        self, tmp_path, input_paths, dashboard_calls, monkeypatch
+    ):
+        cache = DashboardCache(tmp_path.joinpath('cache'))
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        monkeypatch.setattr(dashboard_cache.data_input, 'ATTENDANCE_THRESHOLD', 0.6)
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        assert len(dashboard_calls) == 2
+
+    def test_invalidate(self, tmp_path, input_paths, dashboard_calls):
+        cache = DashboardCache(tmp_path.joinpath('cache'))
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        cache.invalidate()
+        assert list(tmp_path.joinpath('cache').iterdir()) == []
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        assert len(dashboard_calls) == 2
+
+class TestDashboardCacheEviction:
+    def test_memory_entries_bounded(self, tmp_path, input_paths):
+        cache = DashboardCache(tmp_path.joinpath('cache'), max_memory_entries=2)
+        result = get_cached_dashboard_data(*input_paths, cache=cache)
+        for key in ['a', 'b', 'c']:
+            cache.put(key, result)
+        assert list(cache._memory) == ['b', 'c']
+
+    def test_disk_size_bounded(self, tmp_path, input_paths):
+        cache_path = tmp_path.joinpath('cache')
+        cache = DashboardCache(cache_path, max_disk_bytes=1)
+        result = get_cached_dashboard_data(*input_paths, cache=cache)
+        for key in ['a', 'b']:
+            cache.put(key, result)
+        # only the newest entry is kept
+        assert sorted(path.name for path in cache_path.iterdir()) == [
+            'b.json', 'b.parquet'
+        ]
+
+class TestDashboardCacheDiskErrors:
+    def test_unwritable_disk_tier_uses_memory(self, tmp_path, input_paths, dashboard_calls):
+        # a file in place of the cache directory, so every disk write fails
+        cache_path = tmp_path.joinpath('cache')
+        cache_path.write_text('')
+        cache = DashboardCache(cache_path)
+        expected = get_cached_dashboard_data(*input_paths, cache=cache)
+        assert get_cached_dashboard_data(*input_paths, cache=cache) is expected
+        assert len(dashboard_calls) == 1
+
+    def test_failed_write_leaves_no_partial_files(
+        self, tmp_path, input_paths, monkeypatch
+    ):
+        cache_path = tmp_path.joinpath('cache')
+        cache = DashboardCache(cache_path)
+
+        def failing_replace(src, dst):
+            raise OSError('disk full')
+
+        monkeypatch.setattr(dashboard_cache.os, 'replace', failing_replace)
+        get_cached_dashboard_data(*input_paths, cache=cache)
+        assert list(cache_path.iterdir()) == []
+
+    def test_failed_utime_still_reads_disk(
+        self, tmp_path, input_paths, dashboard_calls, monkeypatch
+    ):
+        get_cached_dashboard_data(
+            *input_paths, cache=DashboardCache(tmp_path.joinpath('cache'))
+        )
+
+        def failing_utime(path):
+            raise FileNotFoundError(path)
+
+        monkeypatch.setattr(dashboard_cache.os, 'utime', failing_utime)
+        get_cached_dashboard_data(
+            *input_paths, cache=DashboardCache(tmp_path.joinpath('cache'))
+        )
+        assert len(dashboard_calls) == 1
+
+    def test_memory_only_without_pyarrow(
+        self, tmp_path, input_paths, dashboard_calls, without_pyarrow
+    ):
+        cache = DashboardCache(tmp_path.joinpath('cache'))
+        expected = get_cached_dashboard_data(*input_paths, cache=cache)
+        assert get_cached_dashboard_data(*input_paths, cache=cache) is expected
+        assert not list(tmp_path.joinpath('cache').glob('*.parquet*'))
+
+        get_cached_dashboard_data(
+            *input_paths, cache=DashboardCache(tmp_path.joinpath('cache'))
+        )
+        assert len(dashboard_calls) == 2
+
+def test_file_hashes_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard_cache, 'MAX_FILE_HASHES', 2)
+    monkeypatch.setattr(dashboard_cache, '_file_hashes', dashboard_cache.OrderedDict())
+    paths = [tmp_path.joinpath(name) for name in ['a', 'b', 'c']]
+    for path in paths:
+        path.write_text(path.name)
+        dashboard_cache.hash_file(path)
+    assert list(dashboard_cache._file_hashes) == [str(path) for path in paths[1:]]
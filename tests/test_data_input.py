@@ -1,30 +1,40 @@
+import logging
+import warnings
+
 import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
 import pytest
 from io import StringIO
 
+from tests.conftest import ATTENDANCE_FILE, PAYMENT_FILE
 from data_input import(
+    generate_child_id,
+    find_child_id_collisions,
+    report_child_id_collisions,
+    ATTENDANCE_CATEGORY_DTYPE,
     get_payment_data,
+    compact_dtypes,
     validate_copay,
-    calculate_days_in_month,
+    calculate_days_in_month_from_date,
     count_days_attended,
-    extract_ineligible_children,
-    drop_ineligible_children,
-    adjust_school_age_days,
-    cap_attended_days,
+    combine_payment_and_attendance,
+    partition_eligibility,
+    adjust_and_cap_days,
+    add_family_codes,
+    sum_by_family,
     calculate_family_days,
     categorize_family_attendance_risk,
-    calculate_min_revenue_per_child_before_copay,
-    calculate_min_quality_add_on_per_child,
-    calculate_max_revenue_per_child_before_copay,
-    calculate_max_quality_add_on_per_child,
-    calculate_potential_revenue_per_child_before_copay,
-    calculate_potential_quality_add_on_per_child,
+    calculate_max_revenue_and_quality_add_on_per_child,
+    calculate_min_revenue_and_quality_add_on_per_child,
+    calculate_potential_revenue_and_quality_add_on_per_child,
     calculate_family_revenue_before_copay,
     calculate_revenue_per_child,
     calculate_e_learning_revenue,
     calculate_attendance_rate,
+    summarize_dashboard_data,
+    get_dashboard_data,
+    get_batch_dashboard_data,
     )
 
 @pytest.fixture
@@ -82,8 +92,44 @@ def test_get_payment_data(example_payment_data):
             'copay_per_child',
         ]
     )
+    expected_df = expected_df.astype(
+        {
+            'biz_name': 'category',
+            'school_age': 'category',
+            'eligibility': 'category',
+            'full_days_approved': np.int16,
+            'part_days_approved': np.int16,
+        }
+    )
     assert_frame_equal(get_payment_data(example_payment_data), expected_df)
 
+class TestCompactDtypes:
+    def test_compacts_categories_and_whole_day_counts(self):
+        example_df = pd.DataFrame(
+            {
+                'biz_name': ['Lil Baby Ducklings', 'Lil Baby Ducklings'],
+                'full_days_approved': [10., 0.],
+                'part_days_attended': [2., 1.],
+                'full_day_rate': [20., 10.5],
+            }
+        )
+        result = compact_dtypes(example_df)
+        assert result['biz_name'].dtype == 'category'
+        assert result['full_days_approved'].dtype == np.int16
+        assert result['part_days_attended'].dtype == np.int16
+        assert result['full_day_rate'].dtype == np.float64
+
+    def test_keeps_missing_and_fractional_day_counts(self):
+        example_df = pd.DataFrame(
+            {
+                'full_days_approved': [10., np.nan],
+                'part_days_approved': [2.5, 1.],
+            }
+        )
+        result = compact_dtypes(example_df)
+        assert result['full_days_approved'].dtype == np.float64
+        assert result['part_days_approved'].dtype == np.float64
+
 class TestValidateCopay:
     def setup_class(self):
         self.columns=[
@@ -119,18 +165,24 @@ class TestValidateCopay:
         assert e_info.value.args[0] == 'The following case numbers have different copay amounts'
         assert e_info.value.args[1] == '01, 03'
 
-class TestCalculateMonthDays:
-    def test_calculate_days_in_month(self):
+    def test_valid_copay_scoped_to_tenant(self):
         example_df = pd.DataFrame(
             [
-                ['2020-09-02'],
-                ['2020-09-01'],
+                ['user1', 'a', '01', 4.],
+                ['user2', 'b', '01', 5.],
+                ['user2', 'c', '02', 5.],
+                ['user2', 'd', '02', 6.],
             ],
-            columns=['check_out_date']
+            columns=['tenant'] + self.columns
         )
-        example_df['check_out_date'] = pd.to_datetime(example_df['check_out_date'])
+        with pytest.raises(Exception) as e_info:
+            validate_copay(example_df)
+        assert e_info.value.args[1] == 'user2 02'
+
+class TestCalculateMonthDays:
+    def test_calculate_days_in_month_from_date(self):
         expected = (30, 28) # function returns month days, days left
-        assert calculate_days_in_month(example_df) == expected
+        assert calculate_days_in_month_from_date(pd.Timestamp('2020-09-02')) == expected
 
 def test_count_days_attended(example_attendance_data):
     expected_data = StringIO(
@@ -152,47 +204,190 @@ def test_count_days_attended(example_attendance_data):
         check_like=True
     )
 
-def test_extract_ineligible_children():
+def test_count_days_attended_bucket_edges():
+    example_df = pd.DataFrame(
+        {
+            'child_id': ['a', 'b', 'c', 'd', 'e', 'f'],
+            'hours_in_care': [4, 5, 12, 12, 17, 24],
+            'mins_in_care': [59, 0, 0, 1, 0, 0],
+        }
+    )
+    expected = pd.DataFrame(
+        {
+            'full_days_attended': [0, 1, 1, 1, 2, 2],
+            'part_days_attended': [1, 0, 0, 1, 0, 0],
+        },
+        index=pd.Index(['a', 'b', 'c', 'd', 'e', 'f'], name='child_id')
+    )
+    assert_frame_equal(count_days_attended(example_df), expected)
+
+def test_count_days_attended_lists_invalid_rows():
+    example_df = pd.DataFrame(
+        {
+            'child_id': ['a', 'b', 'c', 'd'],
+            'hours_in_care': [24, 24, 3, np.nan],
+            'mins_in_care': [0, 1, 0, np.nan],
+        }
+    )
+    with pytest.raises(ValueError) as excinfo:
+        count_days_attended(example_df)
+    assert excinfo.value.args[1] == '1, 3'
+
+class TestChildIdCollisions:
+    def setup_class(self):
+        self.example_df = pd.DataFrame(
+            {
+                'first_name': ['Mary Ann', 'Maryann', 'Jo', 'Mary Ann', 'J-o'],
+                'last_name': ['Shadd', 'Shadd', 'Ann Robinson', 'Shadd', 'Ann-Robinson'],
+            }
+        )
+
+    def test_generate_child_id(self):
+        result = generate_child_id(self.example_df.copy())
+        assert result['child_id'].tolist() == [
+            'MaryAnnShadd', 'MaryannShadd', 'JoAnnRobinson', 'MaryAnnShadd',
+            'JoAnnRobinson',
+        ]
+
+    def test_find_child_id_collisions(self):
+        # repeated rows of the same child and ids differing in case only are
+        # not collisions
+        expected_df = pd.DataFrame(
+            {
+                'child_id': ['JoAnnRobinson', 'JoAnnRobinson'],
+                'first_name': ['J-o', 'Jo'],
+                'last_name': ['Ann-Robinson', 'Ann Robinson'],
+            }
+        )
+        assert_frame_equal(
+            find_child_id_collisions(generate_child_id(self.example_df.copy())),
+            expected_df
+        )
+
+    def test_collisions_scoped_to_tenant(self):
+        example_df = generate_child_id(
+            self.example_df.assign(tenant=['x', 'x', 'x', 'x', 'y'])
+        )
+        assert find_child_id_collisions(example_df).empty
+
+    def test_report_logs_collisions(self, caplog):
+        example_df = generate_child_id(self.example_df.copy())
+        with caplog.at_level(logging.WARNING, logger='data_input'):
+            assert report_child_id_collisions(example_df, 'payment') is example_df
+        assert 'payment data' in caplog.text
+        assert 'JoAnnRobinson' in caplog.text
+
+    def test_attendance_collisions_reported(self, input_paths, caplog):
+        # two spellings in the attendance data of the name of one billed child
+        attendance_path, payment_path = input_paths
+        lines = attendance_path.read_text().splitlines()
+        lines[1] = lines[1].replace('Shirley,Chisholm', 'Shir-ley,Chisholm')
+        attendance_path.write_text('\n'.join(lines))
+        with caplog.at_level(logging.WARNING, logger='data_input'):
+            get_dashboard_data(attendance_path, payment_path)
+        assert 'attendance data' in caplog.text
+        assert 'Shir-ley' in caplog.text
+        assert 'payment data' not in caplog.text
+
+def test_combine_payment_and_attendance():
+    payment_df = pd.DataFrame(
+        {
+            'tenant': ['x', 'x', 'y', 'y'],
+            'child_id': ['a', 'b', 'a', 'c'],
+            'case_number': ['1', '2', '1', '3'],
+        },
+        index=[5, 6, 7, 8]
+    )
+    attendance_df = pd.DataFrame(
+        {
+            'tenant': ['y', 'x', 'x'],
+            'child_id': ['a', 'a', 'd'],
+            'full_days_attended': [3, 1, 9],
+            'part_days_attended': [0, 2, 9],
+        }
+    ).set_index(['tenant', 'child_id'])
+
+    expected_df = pd.merge(
+        payment_df.reset_index(drop=True),
+        attendance_df,
+        how='left',
+        on=['tenant', 'child_id']
+    ).fillna(0)
+    result = combine_payment_and_attendance(payment_df, attendance_df)
+    # children without attendance data attended no days, and child ids are
+    # matched within the tenant
+    assert result['full_days_attended'].tolist() == [1, 0, 3, 0]
+    assert result['part_days_attended'].tolist() == [2, 0, 0, 0]
+    assert_frame_equal(result, compact_dtypes(expected_df), check_dtype=False)
+
+    # no attendance at all and no child ids to look up
+    payment_df = pd.DataFrame(
+        {'child_id': [None, None], 'case_number': ['1', '2']}
+    )
+    attendance_df = pd.DataFrame(
+        {
+            'child_id': pd.Series([], dtype=object),
+            'full_days_attended': pd.Series([], dtype=np.int64),
+            'part_days_attended': pd.Series([], dtype=np.int64),
+        }
+    ).set_index('child_id')
+
+    result = combine_payment_and_attendance(payment_df, attendance_df)
+    assert result['full_days_attended'].tolist() == [0, 0]
+    assert result['part_days_attended'].tolist() == [0, 0]
+
+def test_partition_eligibility():
     example_df = pd.DataFrame(
         [
             ['a', 'Eligible'],
             ['b', 'Ineligible'],
+            ['c', 'Unknown'],
+            ['d', 'Eligible'],
         ],
         columns = ['child_id', 'eligibility'],
     )
     example_df.set_index('child_id', inplace=True)
 
-    expected_df = pd.DataFrame(
+    expected_eligible = pd.DataFrame(
+        [
+            ['a', 'Eligible'],
+            ['d', 'Eligible'],
+        ],
+        columns = ['child_id', 'eligibility']
+    )
+    expected_eligible.set_index('child_id', inplace=True)
+    expected_ineligible = pd.DataFrame(
         [
             ['b', 'Ineligible']
         ],
         columns = ['child_id', 'eligibility']
     )
-    expected_df.set_index('child_id', inplace=True)
+    expected_ineligible.set_index('child_id', inplace=True)
 
-    assert_frame_equal(extract_ineligible_children(example_df), expected_df)
+    # children with any other eligibility are dropped
+    eligible, ineligible = partition_eligibility(example_df)
+    assert_frame_equal(eligible, expected_eligible)
+    assert_frame_equal(ineligible, expected_ineligible)
 
-def test_drop_ineligible_children():
+def test_partition_eligibility_all_eligible():
     example_df = pd.DataFrame(
         [
             ['a', 'Eligible'],
-            ['b', 'Ineligible'],
+            ['b', 'Eligible'],
         ],
         columns = ['child_id', 'eligibility'],
     )
-    example_df.set_index('child_id', inplace=True)
 
-    expected_df = pd.DataFrame(
-        [
-            ['a', 'Eligible']
-        ],
-        columns = ['child_id', 'eligibility']
-    )
-    expected_df.set_index('child_id', inplace=True)
+    eligible, ineligible = partition_eligibility(example_df)
+    assert eligible is example_df
+    assert ineligible.empty
+    assert list(ineligible.columns) == ['child_id', 'eligibility']
+    # a frame of its own, so stages can add columns without warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        ineligible['attendance_rate'] = np.nan
 
-    assert_frame_equal(drop_ineligible_children(example_df), expected_df)
-
-def test_adjust_school_age_days():
+def test_adjust_and_cap_days():
     example_df = pd.DataFrame(
         {
             'child_id': ['a', 'b', 'c', 'd', 'e', 'f'],
@@ -208,60 +403,63 @@ def test_adjust_school_age_days():
             'child_id': ['a', 'b', 'c', 'd', 'e', 'f'],
             'school_age': ['Yes', 'Yes', 'Yes', 'No', 'No', 'No'],
             'full_days_approved': [5, 5, 5, 5, 5, 5],
-            'full_days_attended': [3, 6, 5, 3, 6, 5],
+            'full_days_attended': [3, 6, 5, 3, 5, 5],
             'part_days_approved': [3, 3, 3, 3, 3, 3],
-            'part_days_attended': [5, 2, 3, 5, 2, 3],
+            'part_days_attended': [3, 2, 3, 3, 2, 3],
             'adj_full_days_approved': [5, 6, 5, 5, 5, 5],
             'adj_part_days_approved': [3, 2, 3, 3, 3, 3],
         }
     )
-    assert_frame_equal(
-        adjust_school_age_days(example_df), expected_df
-    )
+    assert_frame_equal(adjust_and_cap_days(example_df), expected_df)
 
-class TestCapAttendedDays:
+class TestAdjustAndCapDays:
     def setup_class(self):
         self.columns=[
             'child_id',
-            'adj_full_days_approved',
+            'school_age',
+            'full_days_approved',
             'full_days_attended',
-            'adj_part_days_approved',
+            'part_days_approved',
             'part_days_attended',
         ]
+        self.expected_columns = self.columns + [
+            'adj_full_days_approved',
+            'adj_part_days_approved',
+        ]
 
-    def test_cap_attended_days_full_attended_over_approved(self):
+    def test_full_attended_over_approved(self):
         example_df = pd.DataFrame(
             [
-                ['a', 5, 6, 4, 2]
+                ['a', 'No', 5, 6, 4, 2]
             ],
             columns=self.columns
         )
 
         expected_df = pd.DataFrame(
             [
-                ['a', 5, 5, 4, 2]
+                ['a', 'No', 5, 5, 4, 2, 5, 4]
             ],
-            columns=self.columns
+            columns=self.expected_columns
         )
 
-        assert_frame_equal(cap_attended_days(example_df), expected_df)
+        assert_frame_equal(adjust_and_cap_days(example_df), expected_df)
 
-    def test_cap_attended_days_part_attended_over_approved(self):
+    def test_part_attended_over_approved(self):
         example_df = pd.DataFrame(
             [
-                ['a', 5, 3, 4, 6]
+                ['a', 'No', 5, 3, 4, 6]
             ],
             columns=self.columns
         )
 
         expected_df = pd.DataFrame(
             [
-                ['a', 5, 3, 4, 4]
+                ['a', 'No', 5, 3, 4, 4, 5, 4]
             ],
-            columns=self.columns
+            columns=self.expected_columns
         )
 
-        assert_frame_equal(cap_attended_days(example_df), expected_df)
+        assert_frame_equal(adjust_and_cap_days(example_df), expected_df)
 
 def test_calculate_family_days():
     example_df = pd.DataFrame(
@@ -293,6 +491,53 @@ def test_calculate_family_days():
     )
     assert_frame_equal(calculate_family_days(example_df), expected_df)
 
+class TestSumByFamily:
+    def test_matches_groupby_sum(self):
+        example_df = pd.DataFrame(
+            {
+                'case_number': ['01', '02', '01', '03', '02'],
+                'days': [1, 2, 3, 4, 5],
+                'revenue': [10.5, np.nan, 2.25, 1.0, 3.0],
+            }
+        )
+        family_codes = add_family_codes(example_df)['family_code'].to_numpy()
+        family = example_df.groupby('case_number')
+
+        days = sum_by_family(family_codes, example_df['days'])
+        assert days.dtype == np.int64
+        np.testing.assert_array_equal(
+            days, family['days'].transform(np.sum).to_numpy()
+        )
+        np.testing.assert_array_equal(
+            sum_by_family(family_codes, example_df['revenue']),
+            family['revenue'].transform(np.sum).to_numpy()
+        )
+
+    def test_missing_case_number(self):
+        example_df = pd.DataFrame(
+            {
+                'case_number': ['01', None, '01'],
+                'days': [1, 2, 3],
+            }
+        )
+        family_codes = add_family_codes(example_df)['family_code'].to_numpy()
+        np.testing.assert_array_equal(
+            sum_by_family(family_codes, example_df['days']), [4, np.nan, 4]
+        )
+
+    def test_scoped_to_tenant(self):
+        example_df = pd.DataFrame(
+            {
+                'tenant': ['x', 'y', 'x'],
+                'case_number': ['01', '01', '01'],
+                'days': [1, 2, 3],
+            }
+        )
+        family_codes = add_family_codes(example_df)['family_code'].to_numpy()
+        np.testing.assert_array_equal(
+            sum_by_family(family_codes, example_df['days']), [4, 2, 4]
+        )
+
 class TestCategorizeFamilyAttendanceRisk:
     def setup_class(self):
         self.columns = [
@@ -321,7 +566,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['a', '01', 1, 1, 1, 1, 2, 2, 'Not enough info']
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -342,7 +587,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['a', '01', 1, 0, 1, 0, 1, 1, 'Sure bet']
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -363,7 +608,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['a', '01', 0, 1, 0, 1, 1, 1, 'Sure bet']
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -384,7 +629,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['a', '01', 1, 1, 1, 1, 2, 2, 'Sure bet']
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -408,7 +653,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['b', '01', 15, 0, 1, 0, 30, 2, 'Not met'],
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -432,7 +677,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['b', '01', 15, 0, 1, 0, 30, 8, 'At risk'],
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -453,7 +698,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['a', '01', 2, 8, 0, 8, 10, 8, 'On track'],
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -474,7 +719,7 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['a', '01', 8, 2, 8, 0, 10, 8, 'On track'],
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
@@ -497,14 +742,14 @@ class TestCategorizeFamilyAttendanceRisk:
                 ['b', '01', 10, 10, 0, 10, 10, 20, 'On track'],
             ],
             columns=self.columns + ['attendance_category']
-        )
+        ).astype({'attendance_category': ATTENDANCE_CATEGORY_DTYPE})
 
         assert_frame_equal(
             categorize_family_attendance_risk(example_df, month_days, days_left),
             expected_df
         )
 
-class TestCalculateMinRevenuePerChildBeforeCopay:
+class TestCalculateMinRevenueAndQualityAddOnPerChild:
     def setup_class(self):
         self.columns=[
             'child_id',
@@ -516,214 +761,127 @@ class TestCalculateMinRevenuePerChildBeforeCopay:
             'part_days_attended',
             'full_day_rate',
             'part_day_rate',
+            'full_day_quality_add_on',
+            'part_day_quality_add_on',
         ]
 
     def test_sure_bet(self):
         example_df = pd.DataFrame(
             [
-                ['a', 13, 15, 10, 5, 9, 4, 20, 10]
+                ['a', 13, 15, 10, 5, 9, 4, 20, 10, 2, 1]
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', 13, 15, 10, 5, 9, 4, 20, 10, 250]
+                ['a', 13, 15, 10, 5, 9, 4, 20, 10, 2, 1, 250, 25]
             ],
-            columns=self.columns + ['min_revenue_before_copay']
+            columns=self.columns + ['min_revenue_before_copay', 'min_quality_add_on']
         )
         assert_frame_equal(
-            calculate_min_revenue_per_child_before_copay(example_df), expected_df
+            calculate_min_revenue_and_quality_add_on_per_child(example_df), expected_df
         )
 
     def test_threshold_met_full_approved_no_full_attendance(self):
         example_df = pd.DataFrame(
             [
-                ['a', 13, 15, 14, 1, 13, 0, 20, 10]
+                ['a', 13, 15, 14, 1, 13, 0, 20, 10, 2, 1]
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', 13, 15, 14, 1, 13, 0, 20, 10, 280]
+                ['a', 13, 15, 14, 1, 13, 0, 20, 10, 2, 1, 280, 28]
             ],
-            columns=self.columns + ['min_revenue_before_copay']
+            columns=self.columns + ['min_revenue_before_copay', 'min_quality_add_on']
         )
         assert_frame_equal(
-            calculate_min_revenue_per_child_before_copay(example_df), expected_df
+            calculate_min_revenue_and_quality_add_on_per_child(example_df), expected_df
         )
 
     def test_threshold_met_part_approved_no_part_attendance(self):
         example_df = pd.DataFrame(
             [
-                ['a', 13, 15, 1, 14, 0, 13, 20, 10]
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', 13, 15, 1, 14, 0, 13, 20, 10, 140]
-            ],
-            columns=self.columns + ['min_revenue_before_copay']
-        )
-        assert_frame_equal(
-            calculate_min_revenue_per_child_before_copay(example_df), expected_df
-        )
-
-    def test_threshold_not_met(self):
-        example_df = pd.DataFrame(
-            [
-                ['a', 3, 10, 5, 5, 2, 1, 20, 10]
+                ['a', 13, 15, 1, 14, 0, 13, 20, 10, 2, 1]
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', 3, 10, 5, 5, 2, 1, 20, 10, 50]
+                ['a', 13, 15, 1, 14, 0, 13, 20, 10, 2, 1, 140, 14]
             ],
-            columns=self.columns + ['min_revenue_before_copay']
+            columns=self.columns + ['min_revenue_before_copay', 'min_quality_add_on']
         )
         assert_frame_equal(
-            calculate_min_revenue_per_child_before_copay(example_df), expected_df
+            calculate_min_revenue_and_quality_add_on_per_child(example_df), expected_df
         )
 
-class TestCalculateMinQualityAddOnPerChild:
-    def setup_class(self):
-        self.columns=[
-            'child_id',
-            'family_total_days_attended',
-            'family_total_days_approved',
-            'adj_full_days_approved',
-            'adj_part_days_approved',
-            'full_days_attended',
-            'part_days_attended',
-            'full_day_quality_add_on',
-            'part_day_quality_add_on',
-        ]
-
-    def test_sure_bet(self):
+    def test_threshold_met_no_attendance_missing_rate(self):
+        # days not attended are not paid, even at a missing rate
         example_df = pd.DataFrame(
             [
-                ['a', 13, 15, 10, 5, 9, 4, 2, 1]
+                ['a', 13, 15, 14, 1, 13, 0, 20.0, np.nan, 2.0, np.nan]
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', 13, 15, 10, 5, 9, 4, 2, 1, 25]
+                ['a', 13, 15, 14, 1, 13, 0, 20.0, np.nan, 2.0, np.nan, 280.0, 28.0]
             ],
-            columns=self.columns + ['min_quality_add_on']
+            columns=self.columns + ['min_revenue_before_copay', 'min_quality_add_on']
         )
         assert_frame_equal(
-            calculate_min_quality_add_on_per_child(example_df), expected_df
-        )
-
-    def test_threshold_met_full_approved_no_full_attendance(self):
-        example_df = pd.DataFrame(
-            [
-                ['a', 13, 15, 14, 1, 13, 0, 2, 1]
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', 13, 15, 14, 1, 13, 0, 2, 1, 28]
-            ],
-            columns=self.columns + ['min_quality_add_on']
-        )
-        assert_frame_equal(
-            calculate_min_quality_add_on_per_child(example_df), expected_df
-        )
-
-    def test_threshold_met_part_approved_no_part_attendance(self):
-        example_df = pd.DataFrame(
-            [
-                ['a', 13, 15, 1, 14, 0, 13, 2, 1]
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', 13, 15, 1, 14, 0, 13, 2, 1, 14]
-            ],
-            columns=self.columns + ['min_quality_add_on']
-        )
-        assert_frame_equal(
-            calculate_min_quality_add_on_per_child(example_df), expected_df
+            calculate_min_revenue_and_quality_add_on_per_child(example_df), expected_df
         )
 
     def test_threshold_not_met(self):
         example_df = pd.DataFrame(
             [
-                ['a', 3, 10, 5, 5, 2, 1, 2, 1]
+                ['a', 3, 10, 5, 5, 2, 1, 20, 10, 2, 1]
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', 3, 10, 5, 5, 2, 1, 2, 1, 5]
+                ['a', 3, 10, 5, 5, 2, 1, 20, 10, 2, 1, 50, 5]
             ],
-            columns=self.columns + ['min_quality_add_on']
+            columns=self.columns + ['min_revenue_before_copay', 'min_quality_add_on']
         )
         assert_frame_equal(
-            calculate_min_quality_add_on_per_child(example_df), expected_df
+            calculate_min_revenue_and_quality_add_on_per_child(example_df), expected_df
         )
 
-class TestCalculateMaxRevenuePerChildBeforeCopay:
+class TestCalculateMaxRevenueAndQualityAddOnPerChild:
     def setup_class(self):
         self.columns=[
             'adj_full_days_approved',
             'full_day_rate',
             'adj_part_days_approved',
             'part_day_rate',
-        ]
-
-    def test_calculate_max_revenue_per_child(self):
-        example_df = pd.DataFrame(
-            [
-                [10, 20, 5, 10]
-            ],
-            columns=self.columns
-        )
-
-        expected_df = pd.DataFrame(
-            [
-                [10, 20, 5, 10, 250]
-            ],
-            columns=self.columns + ['max_revenue_before_copay']
-        )
-        assert_frame_equal(
-            calculate_max_revenue_per_child_before_copay(example_df),
-            expected_df
-        )
-
-class TestCalculateMaxQualityAddOnPerChild:
-    def setup_class(self):
-        self.columns=[
-            'adj_full_days_approved',
             'full_day_quality_add_on',
-            'adj_part_days_approved',
             'part_day_quality_add_on',
         ]
 
-    def test_calculate_max_quality_add_on_per_child(self):
+    def test_calculate_max_revenue_and_quality_add_on_per_child(self):
         example_df = pd.DataFrame(
             [
-                [10, 2, 5, 1]
+                [10, 20, 5, 10, 2, 1]
             ],
             columns=self.columns
         )
 
         expected_df = pd.DataFrame(
             [
-                [10, 2, 5, 1, 25]
+                [10, 20, 5, 10, 2, 1, 250, 25]
             ],
-            columns=self.columns + ['max_quality_add_on']
+            columns=self.columns + ['max_revenue_before_copay', 'max_quality_add_on']
         )
         assert_frame_equal(
-            calculate_max_quality_add_on_per_child(example_df),
+            calculate_max_revenue_and_quality_add_on_per_child(example_df),
             expected_df
         )
-class TestCalculatePotentialRevenuePerChildBeforeCopay:
+
+class TestCalculatePotentialRevenueAndQualityAddOnPerChild:
     def setup_class(self):
         self.columns = [
             'child_id',
@@ -735,142 +893,31 @@ class TestCalculatePotentialRevenuePerChildBeforeCopay:
             'attendance_category',
             'full_day_rate',
             'part_day_rate',
-        ]
-
-    def test_other_category(self):
-        days_left = 5
-        example_df = pd.DataFrame(
-            [
-                ['a', '01', 10, 5, 8, 4, 'Sure bet', 20.0, 10.0]
-            ],
-            columns=self.columns
-        )
-
-        expected_df = pd.DataFrame(
-            [
-                ['a', '01', 10, 5, 8, 4, 'Sure bet', 20.0, 10.0, 250.0]
-            ],
-            columns=self.columns + ['potential_revenue_before_copay']
-        )
-
-        assert_frame_equal(
-            calculate_potential_revenue_per_child_before_copay(example_df, days_left),
-            expected_df
-        )
-
-    def test_not_met_all_potential_full_days(self):
-        # test case from initial_rules_visualization doc
-        days_left = 5
-        example_df = pd.DataFrame(
-            [
-                ['a', '01', 10, 5, 1, 1, 'Not met', 20.0, 10.0],
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', '01', 10, 5, 1, 1, 'Not met', 20.0, 10.0, 130.0],
-            ],
-            columns=self.columns + ['potential_revenue_before_copay']
-        )
-
-        assert_frame_equal(
-            calculate_potential_revenue_per_child_before_copay(example_df, days_left),
-            expected_df
-        )
-
-    def test_not_met_potential_full_and_part_days(self):
-        days_left = 5
-        example_df = pd.DataFrame(
-            [
-                ['a', '01', 2, 20, 1, 1, 'Not met', 20.0, 10.0],
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', '01', 2, 20, 1, 1, 'Not met', 20.0, 10.0, 90.0],
-            ],
-            columns=self.columns + ['potential_revenue_before_copay']
-        )
-
-        assert_frame_equal(
-            calculate_potential_revenue_per_child_before_copay(example_df, days_left),
-            expected_df
-        )
-
-    def test_not_met_only_full_days_approved(self):
-        days_left = 5
-        example_df = pd.DataFrame(
-            [
-                ['a', '01', 20, 0, 1, 0, 'Not met', 20.0, 10.0],
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', '01', 20, 0, 1, 0, 'Not met', 20.0, 10.0, 120.0],
-            ],
-            columns=self.columns + ['potential_revenue_before_copay']
-        )
-
-        assert_frame_equal(
-            calculate_potential_revenue_per_child_before_copay(example_df, days_left),
-            expected_df
-        )
-
-    def test_not_met_only_part_days_approved(self):
-        days_left = 5
-        example_df = pd.DataFrame(
-            [
-                ['a', '01', 0, 20, 0, 1, 'Not met', 20.0, 10.0],
-            ],
-            columns=self.columns
-        )
-        expected_df = pd.DataFrame(
-            [
-                ['a', '01', 0, 20, 0, 1, 'Not met', 20.0, 10.0, 60.0],
-            ],
-            columns=self.columns + ['potential_revenue_before_copay']
-        )
-
-        assert_frame_equal(
-            calculate_potential_revenue_per_child_before_copay(example_df, days_left),
-            expected_df
-        )
-
-class TestCalculatePotentialQualityAddOnPerChild:
-    def setup_class(self):
-        self.columns = [
-            'child_id',
-            'case_number',
-            'adj_full_days_approved',
-            'adj_part_days_approved',
-            'full_days_attended',
-            'part_days_attended',
-            'attendance_category',
             'full_day_quality_add_on',
             'part_day_quality_add_on',
         ]
+        self.added_columns = ['potential_revenue_before_copay', 'potential_quality_add_on']
 
     def test_other_category(self):
         days_left = 5
         example_df = pd.DataFrame(
             [
-                ['a', '01', 10, 5, 8, 4, 'Sure bet', 2.0, 1.0]
+                ['a', '01', 10, 5, 8, 4, 'Sure bet', 20.0, 10.0, 2.0, 1.0]
             ],
             columns=self.columns
         )
 
         expected_df = pd.DataFrame(
             [
-                ['a', '01', 10, 5, 8, 4, 'Sure bet', 2.0, 1.0, 25.0]
+                ['a', '01', 10, 5, 8, 4, 'Sure bet', 20.0, 10.0, 2.0, 1.0, 250.0, 25.0]
             ],
-            columns=self.columns + ['potential_quality_add_on']
+            columns=self.columns + self.added_columns
         )
 
         assert_frame_equal(
-            calculate_potential_quality_add_on_per_child(example_df, days_left),
+            calculate_potential_revenue_and_quality_add_on_per_child(
+                example_df, days_left
+            ),
             expected_df
         )
 
@@ -879,19 +926,21 @@ class TestCalculatePotentialQualityAddOnPerChild:
         days_left = 5
         example_df = pd.DataFrame(
             [
-                ['a', '01', 10, 5, 1, 1, 'Not met', 2.0, 1.0],
+                ['a', '01', 10, 5, 1, 1, 'Not met', 20.0, 10.0, 2.0, 1.0],
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', '01', 10, 5, 1, 1, 'Not met', 2.0, 1.0, 13.0],
+                ['a', '01', 10, 5, 1, 1, 'Not met', 20.0, 10.0, 2.0, 1.0, 130.0, 13.0],
             ],
-            columns=self.columns + ['potential_quality_add_on']
+            columns=self.columns + self.added_columns
         )
 
         assert_frame_equal(
-            calculate_potential_quality_add_on_per_child(example_df, days_left),
+            calculate_potential_revenue_and_quality_add_on_per_child(
+                example_df, days_left
+            ),
             expected_df
         )
 
@@ -899,19 +948,21 @@ class TestCalculatePotentialQualityAddOnPerChild:
         days_left = 5
         example_df = pd.DataFrame(
             [
-                ['a', '01', 2, 20, 1, 1, 'Not met', 2.0, 1.0],
+                ['a', '01', 2, 20, 1, 1, 'Not met', 20.0, 10.0, 2.0, 1.0],
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', '01', 2, 20, 1, 1, 'Not met', 2.0, 1.0, 9.0],
+                ['a', '01', 2, 20, 1, 1, 'Not met', 20.0, 10.0, 2.0, 1.0, 90.0, 9.0],
             ],
-            columns=self.columns + ['potential_quality_add_on']
+            columns=self.columns + self.added_columns
         )
 
         assert_frame_equal(
-            calculate_potential_quality_add_on_per_child(example_df, days_left),
+            calculate_potential_revenue_and_quality_add_on_per_child(
+                example_df, days_left
+            ),
             expected_df
         )
 
@@ -919,19 +970,21 @@ class TestCalculatePotentialQualityAddOnPerChild:
         days_left = 5
         example_df = pd.DataFrame(
             [
-                ['a', '01', 20, 0, 1, 0, 'Not met', 2.0, 1.0],
+                ['a', '01', 20, 0, 1, 0, 'Not met', 20.0, 10.0, 2.0, 1.0],
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', '01', 20, 0, 1, 0, 'Not met', 2.0, 1.0, 12.0],
+                ['a', '01', 20, 0, 1, 0, 'Not met', 20.0, 10.0, 2.0, 1.0, 120.0, 12.0],
             ],
-            columns=self.columns + ['potential_quality_add_on']
+            columns=self.columns + self.added_columns
         )
 
         assert_frame_equal(
-            calculate_potential_quality_add_on_per_child(example_df, days_left),
+            calculate_potential_revenue_and_quality_add_on_per_child(
+                example_df, days_left
+            ),
             expected_df
         )
 
@@ -939,19 +992,21 @@ class TestCalculatePotentialQualityAddOnPerChild:
         days_left = 5
         example_df = pd.DataFrame(
             [
-                ['a', '01', 0, 20, 0, 1, 'Not met', 2.0, 1.0],
+                ['a', '01', 0, 20, 0, 1, 'Not met', 20.0, 10.0, 2.0, 1.0],
             ],
             columns=self.columns
         )
         expected_df = pd.DataFrame(
             [
-                ['a', '01', 0, 20, 0, 1, 'Not met', 2.0, 1.0, 6.0],
+                ['a', '01', 0, 20, 0, 1, 'Not met', 20.0, 10.0, 2.0, 1.0, 60.0, 6.0],
             ],
-            columns=self.columns + ['potential_quality_add_on']
+            columns=self.columns + self.added_columns
         )
 
         assert_frame_equal(
-            calculate_potential_quality_add_on_per_child(example_df, days_left),
+            calculate_potential_revenue_and_quality_add_on_per_child(
+                example_df, days_left
+            ),
             expected_df
         )
 
@@ -1093,3 +1148,52 @@ def test_calculate_attendance_rate():
     )
 
     assert_frame_equal(calculate_attendance_rate(example_df), expected_df)
+
+def test_summarize_dashboard_data():
+    example_df = pd.DataFrame(
+        {
+            'attendance_category': pd.Categorical(
+                ['Sure bet', 'At risk', 'Sure bet', 'Case expired']
+            ),
+            'min_revenue': [10.0, 5.5, 20.0, 0.0],
+            'potential_revenue': [15.0, 8.5, 20.0, 0.0],
+            'max_revenue': [15.0, 10.0, 20.0, 0.0],
+            'e_learning_revenue_potential': [1.0, 2.0, np.nan, 0.0],
+        }
+    )
+
+    assert summarize_dashboard_data(example_df) == {
+        'category_counts': {
+            'Not enough info': 0,
+            'Sure bet': 2,
+            'Not met': 0,
+            'At risk': 1,
+            'On track': 0,
+            'Case expired': 1,
+        },
+        'eligible_count': 3,
+        'revenue_totals': {
+            'min_revenue': 35.5,
+            'potential_revenue': 43.5,
+            'max_revenue': 45.0,
+            'e_learning_revenue_potential': 3.0,
+        },
+    }
+
+class TestGetBatchDashboardData:
+    def test_matches_single_tenant_results(self, tenant_data_path):
+        results = get_batch_dashboard_data(
+            tenant_data_path, ATTENDANCE_FILE, PAYMENT_FILE
+        )
+        assert list(results) == ['user1', 'user2']
+        for tenant, (df_dashboard, *summary) in results.items():
+            expected_df, *expected_summary = get_dashboard_data(
+                tenant_data_path.joinpath(tenant, ATTENDANCE_FILE),
+                tenant_data_path.joinpath(tenant, PAYMENT_FILE),
+            )
+            assert summary == expected_summary
+            assert_frame_equal(
+                df_dashboard.reset_index(drop=True),
+                expected_df.reset_index(drop=True)
+            )
+        assert results['user1'][1] != results['user2'][1]
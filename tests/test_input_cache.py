@@ -0,0 +1,72 @@
+from pandas.testing import assert_frame_equal
+
+from data_input import get_clean_attendance_data, get_payment_data
+from input_cache import get_input_cache_path, load_with_cache
+
+def counting(load, calls):
+    # counts calls to load while keeping its name for the cache path
+    def counting_load(filepath):
+        calls.append(filepath)
+        return load(filepath)
+    counting_load.__name__ = load.__name__
+    return counting_load
+
+class TestLoadWithCache:
+    def test_reuses_stored_frame(self, input_paths):
+        attendance_path = input_paths[0]
+        calls = []
+        load = counting(get_clean_attendance_data, calls)
+        expected = get_clean_attendance_data(attendance_path)
+
+        assert_frame_equal(load_with_cache(attendance_path, load), expected)
+        assert get_input_cache_path(attendance_path, load).exists()
+        assert_frame_equal(load_with_cache(attendance_path, load), expected)
+        assert len(calls) == 1
+
+    def test_changed_source_rebuilds(self, input_paths):
+        attendance_path = input_paths[0]
+        calls = []
+        load = counting(get_clean_attendance_data, calls)
+        load_with_cache(attendance_path, load)
+        attendance_path.write_text(
+            '\n'.join(attendance_path.read_text().splitlines()[:-5])
+        )
+        assert_frame_equal(
+            load_with_cache(attendance_path, load),
+            get_clean_attendance_data(attendance_path)
+        )
+        assert len(calls) == 2
+
+    def test_loaders_cached_separately(self, input_paths):
+        payment_path = input_paths[1]
+        assert_frame_equal(
+            load_with_cache(payment_path, get_payment_data),
+            get_payment_data(payment_path)
+        )
+        assert (
+            get_input_cache_path(payment_path, get_payment_data)
+            != get_input_cache_path(payment_path, get_clean_attendance_data)
+        )
+
+    def test_corrupt_cache_rebuilds(self, input_paths):
+        attendance_path = input_paths[0]
+        calls = []
+        load = counting(get_clean_attendance_data, calls)
+        load_with_cache(attendance_path, load)
+        get_input_cache_path(attendance_path, load).write_bytes(b'not parquet')
+        assert_frame_equal(
+            load_with_cache(attendance_path, load),
+            get_clean_attendance_data(attendance_path)
+        )
+        assert len(calls) == 2
+
+    def test_without_pyarrow_loads_uncached(self, input_paths, without_pyarrow):
+        attendance_path = input_paths[0]
+        calls = []
+        load = counting(get_clean_attendance_data, calls)
+        expected = get_clean_attendance_data(attendance_path)
+
+        assert_frame_equal(load_with_cache(attendance_path, load), expected)
+        assert_frame_equal(load_with_cache(attendance_path, load), expected)
+        assert len(calls) == 2
+        assert not get_input_cache_path(attendance_path, load).exists()
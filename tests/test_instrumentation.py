@@ -0,0 +1,40 @@
+import json
+import logging
+
+from pandas.testing import assert_frame_equal
+
+from data_input import get_dashboard_data
+from instrumentation import PROFILE_ENV_VAR, StageProfiler
+
+class TestStageProfiler:
+    def test_records_every_stage(self, input_paths):
+        profiler = StageProfiler(log_records=False)
+        df_dashboard, *summary = get_dashboard_data(*input_paths, profiler=profiler)
+
+        expected_df, *expected_summary = get_dashboard_data(*input_paths)
+        assert_frame_equal(df_dashboard, expected_df)
+        assert summary == expected_summary
+
+        stages = [record['stage'] for record in profiler.records]
+        assert stages[0] == 'load_with_cache(get_clean_attendance_data)'
+        assert 'calculate_family_revenue_before_copay(potential)' in stages
+        assert stages[-1] == 'summarize_dashboard_data'
+        count_days = profiler.records[stages.index('count_days_attended')]
+        assert count_days['rows_in'] == 26
+        assert count_days['rows_out'] == 4
+        assert all(record['wall_s'] >= 0 for record in profiler.records)
+
+    def test_summary_table(self):
+        profiler = StageProfiler(log_records=False)
+        profiler.run(3, lambda x, label: x + 1, 'label')
+        summary = profiler.format_summary()
+        assert '<lambda>(label)' in summary
+        assert summary.splitlines()[-1].startswith('total')
+
+def test_env_var_logs_json(input_paths, monkeypatch, caplog):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'json')
+    with caplog.at_level(logging.INFO, logger='instrumentation'):
+        get_dashboard_data(*input_paths)
+    records = [json.loads(record.getMessage()) for record in caplog.records]
+    assert records
+    assert all(record['event'] == 'dashboard_stage' for record in records)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from make_figures import (
+    filter_table,
+    get_table_page,
+    make_attendance_table,
+    make_revenue_chart,
+    make_table,
+    sort_table,
+    split_filter_part,
+)
+
+class TestTableQueries:
+    def setup_class(self):
+        self.df = pd.DataFrame(
+            {
+                'name': ['Jan Schakowsky', 'Keith Ellison', 'Lauren Underwood', 'Cory Booker'],
+                'attendance_category': pd.Categorical(
+                    ['Sure bet', 'At risk', 'Case expired', 'On track'],
+                    categories=['Sure bet', 'At risk', 'On track', 'Case expired']
+                ),
+                'attendance_rate': [0.8, 0.3, np.nan, 0.5],
+            },
+            index=[3, 2, 1, 0]
+        )
+
+    def test_split_filter_part(self):
+        assert split_filter_part('{name} contains "Jan"') == ('name', 'contains', 'Jan')
+        assert split_filter_part('{attendance_rate} >= 0.5') == ('attendance_rate', '>=', 0.5)
+        assert split_filter_part('{attendance_rate} ge 0.5') == ('attendance_rate', '>=', 0.5)
+        assert split_filter_part('{case_number} = "100"') == ('case_number', '=', '100')
+        assert split_filter_part('{name} is blank') is None
+
+    def test_filter_table(self):
+        assert_frame_equal(
+            filter_table(self.df, '{attendance_rate} >= 0.5'), self.df.iloc[[0, 3]]
+        )
+        assert_frame_equal(
+            filter_table(self.df, '{attendance_category} = "At risk"'), self.df.iloc[[1]]
+        )
+        assert_frame_equal(
+            filter_table(self.df, '{name} contains "o" && {attendance_rate} < 0.6'),
+            self.df.iloc[[1, 3]]
+        )
+        # numbers compared with text match nothing, unknown columns are ignored
+        assert filter_table(self.df, '{attendance_rate} > "a"').empty
+        assert_frame_equal(filter_table(self.df, '{age} > 3'), self.df)
+
+    def test_sort_table(self):
+        assert_frame_equal(
+            sort_table(self.df, [{'column_id': 'attendance_rate', 'direction': 'desc'}]),
+            self.df.iloc[[0, 3, 1, 2]]
+        )
+        # categories are sorted as text
+        assert_frame_equal(
+            sort_table(self.df, [{'column_id': 'attendance_category', 'direction': 'asc'}]),
+            self.df.iloc[[1, 2, 3, 0]]
+        )
+        assert_frame_equal(sort_table(self.df, []), self.df)
+
+    def test_get_table_page(self):
+        data, page_count = get_table_page(
+            self.df, 1, 2, [{'column_id': 'name', 'direction': 'asc'}]
+        )
+        assert page_count == 2
+        assert [row['name'] for row in data] == ['Keith Ellison', 'Lauren Underwood']
+
+        data, page_count = get_table_page(self.df, 0, 2, None, '{name} contains "zz"')
+        assert data == []
+        assert page_count == 1
+
+    def test_make_table_sends_first_page(self):
+        table = make_table(self.df, page_size=3)
+        assert len(table.data) == 3
+        assert table.page_count == 2
+        assert table.page_action == 'custom'
+
+class TestSummaryFigures:
+    def setup_class(self):
+        self.summary = {
+            'category_counts': {
+                'Not enough info': 0,
+                'Sure bet': 2,
+                'Not met': 1,
+                'At risk': 0,
+                'On track': 1,
+                'Case expired': 3,
+            },
+            'eligible_count': 4,
+            'revenue_totals': {
+                'min_revenue': 100.0,
+                'potential_revenue': 150.0,
+                'max_revenue': 200.0,
+                'e_learning_revenue_potential': 20.0,
+            },
+        }
+
+    def test_make_attendance_table(self):
+        table = make_attendance_table(self.summary)
+        assert table.data == [
+            {'attendance_category': 'Sure bet', 'percentage': 0.5, 'count': 2},
+            {'attendance_category': 'On track', 'percentage': 0.25, 'count': 1},
+            {'attendance_category': 'At risk', 'percentage': 0.0, 'count': 0},
+            {'attendance_category': 'Not met', 'percentage': 0.25, 'count': 1},
+        ]
+
+    def test_make_attendance_table_not_enough_info(self):
+        summary = dict(
+            self.summary,
+            category_counts=dict(self.summary['category_counts'], **{'Not enough info': 4})
+        )
+        table = make_attendance_table(summary)
+        assert all(row['count'] is None for row in table.data)
+
+    def test_make_revenue_chart(self):
+        bars = make_revenue_chart(self.summary).figure.data
+        assert [bar.x[0] for bar in bars] == [100.0, 50.0, 50.0, 20.0]
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_series_equal
+import pytest
+
+from data_input import (
+    ATTENDANCE_THRESHOLD,
+    calculate_max_revenue_and_quality_add_on_per_child,
+    calculate_min_revenue_and_quality_add_on_per_child,
+    calculate_potential_revenue_and_quality_add_on_per_child,
+    calculate_family_revenue_before_copay,
+    calculate_revenue_per_child,
+    calculate_e_learning_revenue,
+)
+
+RATE_COLS = [
+    'full_day_rate',
+    'part_day_rate',
+    'full_day_quality_add_on',
+    'part_day_quality_add_on',
+]
+
+# row-wise reference implementations the vectorized stages must reproduce
+def rowwise_max(row, rate_type):
+    return (
+        row['adj_full_days_approved'] * row['full_day_' + rate_type]
+        + row['adj_part_days_approved'] * row['part_day_' + rate_type]
+    )
+
+def rowwise_min(row, rate_type):
+    # numpy floats, so families without days approved divide to nan or inf
+    attendance_rate = (
+        np.float64(row['family_total_days_attended']) / row['family_total_days_approved']
+    )
+    if attendance_rate >= ATTENDANCE_THRESHOLD:
+        if row['full_days_attended'] > 0:
+            full_day_min = row['adj_full_days_approved'] * row['full_day_' + rate_type]
+        else:
+            full_day_min = 0
+        if row['part_days_attended'] > 0:
+            part_day_min = row['adj_part_days_approved'] * row['part_day_' + rate_type]
+        else:
+            part_day_min = 0
+    else:
+        full_day_min = row['full_days_attended'] * row['full_day_' + rate_type]
+        part_day_min = row['part_days_attended'] * row['part_day_' + rate_type]
+    return full_day_min + part_day_min
+
+def rowwise_potential(row, rate_type, days_left):
+    if row['attendance_category'] == 'Not met':
+        full_days_difference = (
+            row['adj_full_days_approved'] - row['full_days_attended']
+        )
+        part_days_difference = (
+            row['adj_part_days_approved'] - row['part_days_attended']
+        )
+        potential_full_days = np.minimum(days_left, full_days_difference)
+        if full_days_difference < days_left:
+            potential_part_days = np.minimum(
+                days_left - full_days_difference,
+                part_days_difference
+            )
+        else:
+            potential_part_days = 0
+        full_day_potential = (
+            (row['full_days_attended'] + potential_full_days)
+            * row['full_day_' + rate_type]
+        )
+        part_day_potential = (
+            (row['part_days_attended'] + potential_part_days)
+            * row['part_day_' + rate_type]
+        )
+    else:
+        full_day_potential = row['adj_full_days_approved'] * row['full_day_' + rate_type]
+        part_day_potential = row['adj_part_days_approved'] * row['part_day_' + rate_type]
+    return full_day_potential + part_day_potential
+
+def rowwise_revenue(row, rev_type_str):
+    if row['family_copay'] > row['family_' + rev_type_str + '_revenue_before_copay']:
+        return row[rev_type_str + '_quality_add_on']
+    return (
+        row[rev_type_str + '_revenue_before_copay']
+        + row[rev_type_str + '_quality_add_on']
+        - row['copay_per_child']
+    )
+
+def rowwise_e_learning(row):
+    if (row['school_age'] == 'Yes'
+        and row['adj_part_days_approved'] > row['part_days_attended']):
+        return (
+            (row['adj_part_days_approved'] - row['part_days_attended'])
+            * (row['full_day_rate'] + row['full_day_quality_add_on']
+               - row['part_day_rate'] - row['part_day_quality_add_on'])
+        )
+    return 0
+
+def make_random_roster(seed, num_children=500, blank_rate_share=0):
+    '''
+    Generates a merged roster with the columns used by the revenue stages,
+    with a blank_rate_share of the rates missing as for blank billing cells
+    and two families without days approved
+    '''
+    rng = np.random.default_rng(seed)
+    case_number = rng.integers(0, num_children // 2, num_children).astype(str)
+    df = pd.DataFrame(
+        {
+            'child_id': ['child' + str(i) for i in range(num_children)],
+            'case_number': case_number,
+            'school_age': rng.choice(['Yes', 'No'], num_children),
+            'attendance_category': rng.choice(
+                ['Sure bet', 'On track', 'At risk', 'Not met'], num_children
+            ),
+            'adj_full_days_approved': rng.integers(0, 23, num_children).astype(float),
+            'adj_part_days_approved': rng.integers(0, 23, num_children).astype(float),
+            'full_day_rate': rng.uniform(10, 60, num_children).round(4),
+            'part_day_rate': rng.uniform(5, 30, num_children).round(4),
+            'full_day_quality_add_on': rng.uniform(0, 10, num_children).round(4),
+            'part_day_quality_add_on': rng.uniform(0, 5, num_children).round(4),
+            'family_copay': rng.choice([0., 15., 29., 250.], num_children),
+            'copay_per_child': rng.choice([0., 7.5, 29.], num_children),
+        }
+    )
+    df['full_days_attended'] = np.floor(
+        df['adj_full_days_approved'] * rng.uniform(0, 1.2, num_children)
+    )
+    df['part_days_attended'] = np.floor(
+        df['adj_part_days_approved'] * rng.uniform(0, 1.2, num_children)
+    )
+    for col in RATE_COLS:
+        df.loc[rng.random(num_children) < blank_rate_share, col] = np.nan
+    # families without approved days, with and without days attended, whose
+    # attendance rates are 0/0 and x/0
+    df.loc[:1, 'case_number'] = 'no days approved'
+    df.loc[2, 'case_number'] = 'no days approved, attended'
+    df.loc[:2, ['adj_full_days_approved', 'adj_part_days_approved']] = 0.
+    df.loc[:1, ['full_days_attended', 'part_days_attended']] = 0.
+    df.loc[2, ['full_days_attended', 'part_days_attended']] = [3., 1.]
+    family = df.groupby('case_number')
+    df['family_total_days_approved'] = (
+        family['adj_full_days_approved'].transform(np.sum)
+        + family['adj_part_days_approved'].transform(np.sum)
+    )
+    df['family_total_days_attended'] = (
+        family['full_days_attended'].transform(np.sum)
+        + family['part_days_attended'].transform(np.sum)
+    )
+    return df
+
+@pytest.fixture(params=[0, 1, 2, 3, 4])
+def random_roster(request):
+    return make_random_roster(request.param)
+
+@pytest.fixture(params=[0, 1])
+def blank_rate_roster(request):
+    return make_random_roster(request.param, blank_rate_share=0.2)
+
+def assert_column_matches(actual, expected):
+    assert_series_equal(
+        actual, expected.astype(actual.dtype),
+        check_names=False,
+        check_exact=True
+    )
+
+REVENUE_STAGES = [
+    ('max', calculate_max_revenue_and_quality_add_on_per_child, []),
+    ('min', calculate_min_revenue_and_quality_add_on_per_child, []),
+    ('potential', calculate_potential_revenue_and_quality_add_on_per_child, [0]),
+    ('potential', calculate_potential_revenue_and_quality_add_on_per_child, [3]),
+    ('potential', calculate_potential_revenue_and_quality_add_on_per_child, [12]),
+]
+
+def assert_rate_kernel_matches(roster, rev_type_str, combined_stage, args):
+    rate_type_fn = {'max': rowwise_max, 'min': rowwise_min, 'potential': rowwise_potential}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = combined_stage(roster, *args)
+        for rate_type, col in [
+            ('rate', rev_type_str + '_revenue_before_copay'),
+            ('quality_add_on', rev_type_str + '_quality_add_on'),
+        ]:
+            expected = df.apply(
+                rate_type_fn[rev_type_str], args=[rate_type] + args, axis=1
+            )
+            assert_column_matches(df[col], expected)
+
+@pytest.mark.parametrize('rev_type_str, combined_stage, args', REVENUE_STAGES)
+def test_combined_rate_kernel_parity(random_roster, rev_type_str, combined_stage, args):
+    assert_rate_kernel_matches(random_roster, rev_type_str, combined_stage, args)
+
+@pytest.mark.parametrize('rev_type_str, combined_stage, args', REVENUE_STAGES)
+def test_blank_rate_parity(blank_rate_roster, rev_type_str, combined_stage, args):
+    # days of a type not attended add no min revenue, even at a blank rate
+    assert_rate_kernel_matches(blank_rate_roster, rev_type_str, combined_stage, args)
+
+def assert_revenue_per_child_matches(roster, rev_type_str):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = (
+            roster.pipe(calculate_max_revenue_and_quality_add_on_per_child)
+                  .pipe(calculate_min_revenue_and_quality_add_on_per_child)
+                  .pipe(calculate_potential_revenue_and_quality_add_on_per_child, 5)
+                  .pipe(calculate_family_revenue_before_copay, rev_type_str)
+        )
+    expected = df.apply(rowwise_revenue, args=[rev_type_str], axis=1)
+    assert_column_matches(
+        calculate_revenue_per_child(df, rev_type_str)[rev_type_str + '_revenue'],
+        expected
+    )
+
+@pytest.mark.parametrize('rev_type_str', ['max', 'min', 'potential'])
+def test_revenue_per_child_parity(random_roster, rev_type_str):
+    assert_revenue_per_child_matches(random_roster, rev_type_str)
+
+@pytest.mark.parametrize('rev_type_str', ['max', 'min', 'potential'])
+def test_blank_rate_revenue_per_child_parity(blank_rate_roster, rev_type_str):
+    assert_revenue_per_child_matches(blank_rate_roster, rev_type_str)
+
+def test_e_learning_revenue_parity(random_roster):
+    expected = random_roster.apply(rowwise_e_learning, axis=1)
+    assert_column_matches(
+        calculate_e_learning_revenue(random_roster)['e_learning_revenue_potential'],
+        expected
+    )
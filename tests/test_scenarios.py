@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+import pytest
+
+from benchmarks.synthetic_data import write_synthetic_data
+from data_input import (
+    ATTENDANCE_THRESHOLD,
+    calculate_days_in_month_from_date,
+    count_days_attended,
+    get_clean_attendance_data,
+    get_dashboard_data,
+    get_payment_data,
+)
+from scenarios import (
+    evaluate_scenarios,
+    get_scenario_data,
+    get_scenario_roster,
+    make_scenarios,
+    project_days_attended,
+    summarize_scenarios,
+)
+
+@pytest.fixture(scope='module')
+def synthetic_paths(tmp_path_factory):
+    return write_synthetic_data(
+        tmp_path_factory.mktemp('scenarios'), 1, 300, 3000
+    )['provider1']
+
+def test_make_scenarios():
+    expected_df = pd.DataFrame(
+        {
+            'threshold': [0.5, 0.5, 0.6, 0.6],
+            'extra_days': [0, 2, 0, 2],
+        }
+    )
+    assert_frame_equal(make_scenarios([0.5, 0.6], [0, 2]), expected_df)
+
+def test_project_days_attended():
+    roster = pd.DataFrame(
+        {
+            'adj_full_days_approved': [5, 5, 0, 2],
+            'adj_part_days_approved': [5, 5, 5, 1],
+            'full_days_attended': [1, 4, 0, 2],
+            'part_days_attended': [0, 0, 3, 1],
+        }
+    )
+    full_days, part_days, days_left = project_days_attended(
+        roster, np.array([[0], [3], [10]]), 5
+    )
+    # full days first, then part days, capped at days left and days approved
+    np.testing.assert_array_equal(
+        full_days, [[1, 4, 0, 2], [4, 5, 0, 2], [5, 5, 0, 2]]
+    )
+    np.testing.assert_array_equal(
+        part_days, [[0, 0, 3, 1], [0, 2, 5, 1], [1, 4, 5, 1]]
+    )
+    np.testing.assert_array_equal(days_left, [[5], [2], [0]])
+
+def test_current_scenario_matches_dashboard(synthetic_paths):
+    results = get_scenario_data(attendance_path=synthetic_paths[0],
+                                payment_path=synthetic_paths[1])
+    df_dashboard = get_dashboard_data(*synthetic_paths)[0]
+    expected_df = (
+        df_dashboard.loc[df_dashboard['attendance_category'] != 'Case expired']
+                    .set_index('name')
+                    .loc[results['name'], ['attendance_category', 'attendance_rate',
+                                          'min_revenue', 'potential_revenue']]
+                    .reset_index(drop=True)
+    )
+
+    assert (results['threshold'] == ATTENDANCE_THRESHOLD).all()
+    assert (results['extra_days'] == 0).all()
+    assert_frame_equal(
+        results[['attendance_category', 'attendance_rate', 'min_revenue',
+                 'potential_revenue']],
+        expected_df,
+        check_categorical=False
+    )
+
+def test_batched_scenarios_match_single_scenarios(synthetic_paths):
+    results = get_scenario_data([0.4, 0.6], [0, 5], *synthetic_paths)
+    for (threshold, extra_days), scenario_results in results.groupby(
+        ['threshold', 'extra_days']
+    ):
+        assert_frame_equal(
+            scenario_results.reset_index(drop=True),
+            get_scenario_data([threshold], [extra_days], *synthetic_paths)
+        )
+
+def test_more_attendance_never_lowers_family_min_revenue(synthetic_paths):
+    results = get_scenario_data([ATTENDANCE_THRESHOLD], [0, 2, 5], *synthetic_paths)
+    # per family, as copay is shared between the children of a family
+    family_min_revenue = results.pivot_table(
+        index='case_number', columns='extra_days', values='min_revenue',
+        aggfunc='sum'
+    )
+    assert (family_min_revenue.diff(axis=1).iloc[:, 1:] >= -1e-9).all().all()
+
+def test_summarize_scenarios(synthetic_paths):
+    results = get_scenario_data([0.4, 0.6], [0], *synthetic_paths)
+    summary = summarize_scenarios(results)
+
+    assert list(summary.columns) == [
+        'threshold', 'extra_days', 'Not enough info', 'Sure bet', 'Not met',
+        'At risk', 'On track', 'min_revenue', 'potential_revenue',
+    ]
+    assert summary['threshold'].tolist() == [0.4, 0.6]
+    category_counts = summary[['Not enough info', 'Sure bet', 'Not met',
+                               'At risk', 'On track']].sum(axis=1)
+    assert (category_counts == results['name'].nunique()).all()
+    # a higher threshold can only move children out of sure bet
+    assert summary.loc[1, 'Sure bet'] <= summary.loc[0, 'Sure bet']
+    assert summary.loc[1, 'min_revenue'] <= summary.loc[0, 'min_revenue']
+    assert summary.loc[0, 'min_revenue'] == pytest.approx(
+        results.loc[results['threshold'] == 0.4, 'min_revenue'].sum()
+    )
+
+def test_days_per_tenant(synthetic_paths):
+    attendance_path, payment_path = synthetic_paths
+    attendance = get_clean_attendance_data(attendance_path)
+    days_in_month, days_left = calculate_days_in_month_from_date(
+        attendance['check_out_date'].max()
+    )
+    roster = get_scenario_roster(
+        count_days_attended(attendance), get_payment_data(payment_path)
+    )
+
+    results = evaluate_scenarios(
+        roster, make_scenarios(), days_in_month, days_left
+    )
+    tenant_results = evaluate_scenarios(
+        roster.assign(tenant='provider1'),
+        make_scenarios(),
+        pd.Series({'provider1': days_in_month}),
+        pd.Series({'provider1': days_left})
+    )
+    assert (tenant_results['tenant'] == 'provider1').all()
+    assert_frame_equal(tenant_results.drop(columns='tenant'), results)
+
+def test_no_eligible_children(synthetic_paths):
+    attendance_path, payment_path = synthetic_paths
+    roster = get_scenario_roster(
+        count_days_attended(get_clean_attendance_data(attendance_path)),
+        get_payment_data(payment_path)
+    ).iloc[:0]
+
+    results = evaluate_scenarios(roster, make_scenarios([0.4, 0.6], [0, 2]), 30, 10)
+    assert results.empty
+    assert 'attendance_category' in results.columns
+    assert summarize_scenarios(results).empty
@@ -0,0 +1,26 @@
+from benchmarks.synthetic_data import write_synthetic_data
+from data_input import get_attendance_data, get_dashboard_data, get_payment_data
+
+def test_generated_files_run_through_pipeline(tmp_path):
+    paths = write_synthetic_data(
+        tmp_path, 2, 40, 500,
+        children_per_case=3, ineligible_share=0.2, missing_hours_share=0.5
+    )
+    assert list(paths) == ['provider1', 'provider2']
+
+    attendance_path, payment_path = paths['provider1']
+    payment = get_payment_data(payment_path)
+    assert len(payment) == 40
+    assert payment.groupby('case_number')['family_copay'].nunique().max() == 1
+    assert payment.groupby('case_number').size().max() == 3
+    assert not (payment['first_name'] + payment['last_name']).duplicated().any()
+
+    attendance = get_attendance_data(attendance_path)
+    assert len(attendance) == 500
+    assert attendance['hours_in_care'].isna().any()
+    assert attendance['hours_in_care'].notna().any()
+
+    df_dashboard, latest_date, *_ = get_dashboard_data(attendance_path, payment_path)
+    assert len(df_dashboard) == 40
+    assert (df_dashboard['attendance_category'] == 'Case expired').any()
+    assert latest_date == 'Sep 20 2020'
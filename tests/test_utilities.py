@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utilities import (
+    combine_date_and_time,
+    factorize_rows,
+    get_hours_and_minutes,
+    pad_hour,
+    parse_date,
+    parse_time_of_day,
+    parse_unique,
+    remove_non_alpha,
+    remove_non_alpha_unique,
+)
+
+class TestParseTimeOfDay:
+    def test_parse_time_of_day(self):
+        times = pd.Series(
+            ['8:30 AM', '12:05 AM', '12:00 PM', '11:59 pm', ' 08:30AM ', np.nan]
+        )
+        np.testing.assert_array_equal(
+            parse_time_of_day(times), [510., 5., 720., 1439., 510., np.nan]
+        )
+
+    @pytest.mark.parametrize('time', ['13:00 PM', '0:30 AM', '8:60 AM', '8.30 AM'])
+    def test_invalid_time_raises(self, time):
+        with pytest.raises(ValueError) as e_info:
+            parse_time_of_day(pd.Series(['8:30 AM', time]))
+        assert e_info.value.args[1] == time
+
+class TestParseDate:
+    def test_parse_date(self):
+        dates = pd.Series(['09/01/2020', '2/29/2020', '12/31/1999', np.nan])
+        np.testing.assert_array_equal(
+            parse_date(dates),
+            np.array(['2020-09-01', '2020-02-29', '1999-12-31', 'NaT'], dtype='datetime64[ns]')
+        )
+
+    @pytest.mark.parametrize('date', ['02/30/2021', '13/01/2020', '2020-09-01'])
+    def test_invalid_date_raises(self, date):
+        with pytest.raises(ValueError) as e_info:
+            parse_date(pd.Series(['09/01/2020', date]))
+        assert e_info.value.args[1] == date
+
+def test_combine_date_and_time_matches_strptime():
+    rng = np.random.default_rng(0)
+    size = 2000
+    times = pd.Series(
+        [
+            str(hour) + ':' + str(minute).zfill(2) + ' ' + period
+            for hour, minute, period in zip(
+                rng.integers(1, 13, size),
+                rng.integers(0, 60, size),
+                rng.choice(['AM', 'PM'], size)
+            )
+        ]
+    )
+    dates = pd.Series(
+        pd.to_datetime('2019-01-01')
+        + pd.to_timedelta(rng.integers(0, 730, size), unit='D')
+    ).dt.strftime('%m/%d/%Y')
+    times = times.mask(rng.random(size) < 0.1)
+    dates = dates.mask(rng.random(size) < 0.1)
+
+    expected = pd.to_datetime(
+        times.map(pad_hour) + ' ' + dates, format='%I:%M %p %m/%d/%Y'
+    )
+    np.testing.assert_array_equal(
+        combine_date_and_time(parse_date(dates), parse_time_of_day(times)),
+        expected.to_numpy()
+    )
+
+def test_get_hours_and_minutes_matches_components():
+    time_deltas = pd.to_timedelta(
+        ['9h 5min', '0min', '23h 59min 59s', '1 day 2h', '-30min', None]
+    ).to_numpy()
+    components = pd.Series(time_deltas).dt.components
+    hours, minutes = get_hours_and_minutes(time_deltas)
+    np.testing.assert_array_equal(hours, components['hours'])
+    np.testing.assert_array_equal(minutes, components['minutes'])
+
+def test_remove_non_alpha_unique():
+    names = pd.Series(['Mary-Ann', "O'Neil Jr.", 'Mary-Ann', 'José', np.nan])
+    result = remove_non_alpha_unique(names)
+    np.testing.assert_array_equal(
+        result[:4], [remove_non_alpha(name) for name in names[:4]]
+    )
+    assert result.tolist()[:4] == ['MaryAnn', 'ONeilJr', 'MaryAnn', 'Jos']
+    assert pd.isna(result[4])
+
+def test_factorize_rows():
+    left = pd.DataFrame({'tenant': ['x', 'x', 'y', 'x'], 'id': ['a', 'b', 'a', None]})
+    right = pd.DataFrame({'tenant': ['y', 'x', 'z'], 'id': ['a', 'a', 'c']}).set_index('id')
+    left_codes, right_codes = factorize_rows([left, right], ['tenant', 'id'])
+    # (tenant, id) pairs share codes across frames, rows with a missing value get -1
+    np.testing.assert_array_equal(left_codes, [0, 1, 2, -1])
+    np.testing.assert_array_equal(right_codes, [2, 0, 3])
+
+class TestParseUnique:
+    def test_parses_each_unique_value_once(self):
+        parsed_values = []
+
+        def recording_parse_time_of_day(times):
+            parsed_values.extend(times)
+            return parse_time_of_day(times)
+
+        times = pd.Series(['8:30 AM', np.nan, '5:00 PM', '8:30 AM', np.nan])
+        np.testing.assert_array_equal(
+            parse_unique(times, recording_parse_time_of_day),
+            parse_time_of_day(times)
+        )
+        assert len(parsed_values) == 3
+
+    def test_all_missing(self):
+        dates = pd.Series([np.nan, np.nan], dtype=object)
+        assert np.isnat(parse_unique(dates, parse_date)).all()
@@ -1,5 +1,18 @@
+import os
 import re
 
+import numpy as np
+import pandas as pd
+
+# constants
+# 12 hour time of day, e.g. 8:30 AM or 08:30 pm
+TIME_OF_DAY_PATTERN = r'^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])\s*$'
+# month/day/year date, e.g. 09/01/2020
+DATE_PATTERN = r'^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$'
+NS_PER_MINUTE = 60 * 10**9
+# characters removed from names to build child ids
+NON_ALPHA_PATTERN = re.compile(r'[^a-zA-Z]+')
+
 def pad_hour(string):
     '''Adds leading zero to 12 hour time string'''
     try:
@@ -12,7 +25,238 @@ def pad_hour(string):
 
 def remove_non_alpha(string):
     '''Removes all non-alphabetical characters'''
-    return re.sub('[^a-zA-Z]+', '', string)
+    return NON_ALPHA_PATTERN.sub('', string)
+
+def remove_non_alpha_unique(values):
+    '''
+    Removes all non-alphabetical characters from a series of strings, running
+    the regex over the unique values only.
+
+    Returns an array with a value per row, NaN for missing values.
+    '''
+    return parse_unique(
+        values,
+        lambda strings: strings.str.replace(NON_ALPHA_PATTERN, '', regex=True)
+                               .to_numpy()
+    )
+
+def raise_for_invalid_values(values, invalid, message):
+    '''Raises an error listing the values flagged as invalid'''
+    if invalid.any():
+        raise ValueError(
+            message, ', '.join(str(value) for value in pd.unique(values[invalid]))
+        )
+
+def to_char_codes(values, width):
+    '''
+    Converts strings to a (len(values), width) array of unicode code points,
+    padded with zeros. Strings longer than width - 1 are truncated, which
+    leaves a non zero code in the last column.
+    '''
+    chars = np.asarray(values, dtype='U' + str(width))
+    return chars.view(np.uint32).reshape(len(chars), width).astype(np.int64)
+
+def is_digit(codes):
+    '''Returns whether each character code (int array) is an ascii digit'''
+    return (codes >= ord('0')) & (codes <= ord('9'))
+
+def extract_time_of_day(times):
+    '''
+    Parses 12 hour time strings into minutes since midnight with a regular
+    expression, which allows flexible whitespace and zero padding.
+
+    Returns a float array, raises an error for other formats.
+    '''
+    parts = times.str.extract(TIME_OF_DAY_PATTERN)
+    hours = parts[0].astype(float).to_numpy()
+    minutes = parts[1].astype(float).to_numpy()
+    is_pm = (parts[2].str.upper() == 'PM').to_numpy()
+    valid = (hours >= 1) & (hours <= 12) & (minutes <= 59)
+    raise_for_invalid_values(
+        times.to_numpy(), times.notna().to_numpy() & ~valid,
+        'The following times are not in H:MM AM/PM format'
+    )
+    return ((hours % 12) + 12 * is_pm) * 60 + minutes
+
+def parse_time_of_day(times):
+    '''
+    Parses 12 hour time strings in 'H:MM AM' format into minutes since midnight.
+
+    Strings in the exact 'H:MM AM' or 'HH:MM AM' shape are decoded from their
+    character codes, others are parsed by extract_time_of_day.
+
+    Missing times are returned as nan. Raises an error for other formats.
+
+    Returns a float array.
+    '''
+    codes = to_char_codes(times.to_numpy(), 9)
+    # right align 'H:MM AM' to 'HH:MM AM' with a leading zero
+    one_digit_hour = (codes[:, 1] == ord(':')) & (codes[:, 7] == 0)
+    aligned = np.where(
+        one_digit_hour[:, np.newaxis],
+        np.column_stack([np.full(len(codes), ord('0')), codes[:, :8]]),
+        codes
+    )
+    digits = aligned - ord('0')
+    hours = digits[:, 0] * 10 + digits[:, 1]
+    minutes = digits[:, 3] * 10 + digits[:, 4]
+    period = aligned[:, 6] | 0x20  # lower case
+    fixed_format = (
+        is_digit(aligned[:, [0, 1, 3, 4]]).all(axis=1)
+        & (aligned[:, 2] == ord(':'))
+        & (aligned[:, 5] == ord(' '))
+        & ((period == ord('a')) | (period == ord('p')))
+        & ((aligned[:, 7] | 0x20) == ord('m'))
+        & (aligned[:, 8] == 0)
+        & (hours >= 1) & (hours <= 12) & (minutes <= 59)
+    )
+    parsed = np.where(
+        fixed_format,
+        ((hours % 12) + 12 * (period == ord('p'))) * 60 + minutes,
+        np.nan
+    )
+    if not fixed_format.all():
+        parsed[~fixed_format] = extract_time_of_day(times[~fixed_format])
+    return parsed
+
+def extract_date(dates):
+    '''
+    Parses date strings into year, month and day with a regular expression,
+    which allows flexible whitespace and zero padding.
+
+    Returns a tuple of float arrays, nan for missing dates.
+    '''
+    parts = dates.str.extract(DATE_PATTERN).astype(float)
+    return parts[2].to_numpy(), parts[0].to_numpy(), parts[1].to_numpy()
+
+def parse_date(dates):
+    '''
+    Parses date strings in 'MM/DD/YYYY' format without intermediate strings.
+
+    Strings in the exact 'MM/DD/YYYY' shape are decoded from their character
+    codes, others are parsed by extract_date.
+
+    Missing dates are returned as NaT. Raises an error for other formats.
+
+    Returns a datetime64[ns] array.
+    '''
+    codes = to_char_codes(dates.to_numpy(), 11)
+    digits = codes - ord('0')
+    fixed_format = (
+        is_digit(codes[:, [0, 1, 3, 4, 6, 7, 8, 9]]).all(axis=1)
+        & (codes[:, 2] == ord('/'))
+        & (codes[:, 5] == ord('/'))
+        & (codes[:, 10] == 0)
+    )
+    month = (digits[:, 0] * 10 + digits[:, 1]).astype(float)
+    day = (digits[:, 3] * 10 + digits[:, 4]).astype(float)
+    year = (
+        digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    ).astype(float)
+    if not fixed_format.all():
+        year[~fixed_format], month[~fixed_format], day[~fixed_format] = extract_date(
+            dates[~fixed_format]
+        )
+    present = ~np.isnan(year)
+
+    # months since epoch give the first day of the month, which also gives the
+    # number of days in the month to validate the day against
+    month_index = np.where(present, (year - 1970) * 12 + month - 1, 0).astype('int64')
+    month_start = month_index.astype('datetime64[M]').astype('datetime64[D]')
+    days_in_month = (
+        (month_index + 1).astype('datetime64[M]').astype('datetime64[D]') - month_start
+    ).astype('int64')
+    valid = present & (month >= 1) & (month <= 12) & (day >= 1) & (day <= days_in_month)
+    raise_for_invalid_values(
+        dates.to_numpy(), dates.notna().to_numpy() & ~valid,
+        'The following dates are not in MM/DD/YYYY format'
+    )
+
+    parsed = (
+        month_start + np.where(valid, day - 1, 0).astype('int64')
+    ).astype('datetime64[ns]')
+    parsed[~valid] = np.datetime64('NaT')
+    return parsed
+
+def parse_unique(values, parse):
+    '''
+    Applies parse to the unique values of a series only and broadcasts the
+    parsed values back to every row through the factorized codes.
+
+    Attendance exports repeat a small set of times of day and dates, so this
+    parses a few thousand strings instead of one per row.
+
+    Returns an array with a parsed value per row.
+    '''
+    codes, uniques = pd.factorize(values)
+    # missing values have code -1, which takes the parsed missing value
+    # appended after the uniques
+    parsed = parse(pd.Series(np.append(uniques.astype(object), np.nan)))
+    return parsed.take(codes)
+
+def get_column(df, col):
+    '''Returns the values of a column or index level of df as an array'''
+    if col in df.columns:
+        return df[col].to_numpy()
+    return df.index.get_level_values(col).to_numpy()
+
+def factorize_rows(frames, cols):
+    '''
+    Assigns a dense integer code to each distinct combination of the values
+    of cols (columns or index levels) over the rows of all frames, in order of
+    first appearance. Each column is hashed once over all frames, and
+    combinations are factorized as integers. Rows with a missing value get -1.
+
+    Returns a list with an array of codes per frame
+    '''
+    lengths = [len(df) for df in frames]
+    codes = np.zeros(sum(lengths), dtype=np.int64)
+    missing = np.zeros(sum(lengths), dtype=bool)
+    for col in cols:
+        col_codes, uniques = pd.factorize(
+            np.concatenate([get_column(df, col) for df in frames])
+        )
+        missing |= col_codes < 0
+        codes, _ = pd.factorize(codes * (len(uniques) + 1) + col_codes + 1)
+    if missing.any():
+        codes[~missing] = pd.factorize(codes[~missing])[0]
+        codes[missing] = -1
+    return np.split(codes, np.cumsum(lengths)[:-1])
+
+def combine_date_and_time(dates, minutes):
+    '''
+    Combines dates (datetime64[ns] array) with times as minutes since midnight
+    (float array) using integer nanosecond arithmetic.
+
+    Returns a datetime64[ns] array, NaT where either value is missing.
+    '''
+    missing = np.isnat(dates) | np.isnan(minutes)
+    timestamps = (
+        dates.view('int64')
+        + np.where(missing, 0, minutes).astype('int64') * NS_PER_MINUTE
+    ).view('datetime64[ns]')
+    timestamps[missing] = np.datetime64('NaT')
+    return timestamps
+
+def get_hours_and_minutes(time_deltas):
+    '''
+    Splits time deltas (timedelta64[ns] array) into the hours and minutes
+    components, as pd.Series.dt.components, using integer arithmetic.
+
+    Returns a tuple of float arrays, NaN where the time delta is missing.
+    '''
+    missing = np.isnat(time_deltas)
+    ns_of_day = time_deltas.view('int64') % (24 * 60 * NS_PER_MINUTE)
+    hours = (ns_of_day // (60 * NS_PER_MINUTE)).astype(float)
+    minutes = (ns_of_day % (60 * NS_PER_MINUTE) // NS_PER_MINUTE).astype(float)
+    hours[missing] = np.nan
+    minutes[missing] = np.nan
+    return hours, minutes
+
+def get_file_signature(filepath):
+    '''Returns the modification time and size of a file to detect changes'''
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
 
 if __name__ == '__main__':
     pass
\ No newline at end of file